@@ -0,0 +1,307 @@
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from .indicators import ichimoku, bbands, dmi_dx, sma
+from .signals import run_signals, compile_plan, SIGNAL_NAMES
+from .dsl import masks as strategy_masks, FIELDS as DSL_FIELDS
+
+# 과거 전 구간에서 "그 봉이 마지막 봉이었다면" 신호가 떴는지를 종목당 한 번의 계산으로 구한다.
+# 지표는 모두 인과적(과거만 사용)이므로 전체 히스토리로 한 번 계산한 값을 각 봉에서 그대로 쓸 수 있다.
+
+HORIZONS = (1, 5, 20)
+
+def _b(x):
+    return np.asarray(x, dtype=bool)
+
+def mask_cloud_pullback_rebreak_full(
+    df,
+    tenkan=9, kijun=26, senkou_b=52, displacement=26,
+    retrace="into", min_gap_bars=3, min_retrace_bars=1, require_open_cross=True,
+    resistance_mode="swing_high", use_open_for_now=True,
+    bb_window=55, bb_k=2.0, retrace_vol_mult=2.0
+):
+    n = len(df)
+    out = np.zeros(n, dtype=bool)
+    need = max(senkou_b, kijun) + 80
+    if n < need: return out
+
+    ich = ichimoku(df, tenkan, kijun, senkou_b, displacement)
+    cloud_top = np.maximum(ich["span_a_now"], ich["span_b_now"])
+    cloud_bot = np.minimum(ich["span_a_now"], ich["span_b_now"])
+    prev_top = cloud_top.shift(1)
+    if require_open_cross:
+        breakout_up = (df["Open"] > cloud_top) & (df["Close"].shift(1) <= prev_top)
+    else:
+        breakout_up = (df["Close"] > cloud_top) & (df["Close"].shift(1) <= prev_top)
+    retrace_mask = _b((df["Close"] < cloud_bot) if retrace == "below" else (df["Close"] <= cloud_top))
+    # 구간 합을 O(1)로: csum[j] = retrace_mask[:j].sum()
+    csum = np.concatenate([[0], np.cumsum(retrace_mask)])
+
+    _, _, bb_up = bbands(df["Close"], window=int(bb_window), k=float(bb_k))
+    bb_up = bb_up.to_numpy()
+    price = (df["Open"] if use_open_for_now else df["Close"]).to_numpy(dtype=np.float64)
+    high = df["High"].to_numpy(dtype=np.float64)
+    vol = df["Volume"].to_numpy(dtype=np.float64)
+
+    events = np.where(_b(breakout_up.fillna(False)))[0]
+    for k in range(1, len(events)):
+        e2 = events[k]
+        if e2 + 1 < need: continue
+        idx1 = retrace_start = None
+        resist = np.nan
+        for e1 in events[k-1::-1]:
+            if e2 - e1 <= max(1, int(min_gap_bars)): continue
+            if csum[e2] - csum[e1+1] >= int(min_retrace_bars):
+                retrace_start = e1 + 1 + int(np.argmax(retrace_mask[e1+1:e2]))
+                resist = float(high[e1]) if resistance_mode == "bar_high" else float(np.nanmax(high[e1:retrace_start]))
+                idx1 = e1
+                break
+        if idx1 is None: continue
+
+        now_price, prev_price = price[e2], price[e2-1]
+        cond_res_break = now_price > resist and prev_price <= resist
+        prev_bb_up = bb_up[e2-1]
+        cond_bb = (now_price > bb_up[e2]) and (prev_price <= (prev_bb_up if not np.isnan(prev_bb_up) else np.inf))
+        retrace_avg = float(np.mean(vol[retrace_start:e2])) if (e2 - retrace_start) >= 1 else 0.0
+        cond_vol = (retrace_avg > 0) and (vol[e2] >= float(retrace_vol_mult) * retrace_avg)
+        out[e2] = cond_res_break and cond_bb and cond_vol
+    return out
+
+def mask_ichimoku_tenkan_golden_combo(
+    df,
+    tenkan=9, kijun=26, senkou_b=52, displacement=26,
+    lookback_cross_bars=1, dx_period=14, ma_fast=5, ma_mid=10
+):
+    ich = ichimoku(df, tenkan, kijun, senkou_b, displacement)
+    tk, kj = ich["tenkan"], ich["kijun"]
+    close = df["Close"]
+    d = int(displacement)
+
+    valid = tk.notna() & kj.notna()
+    xup = (tk > kj) & (tk.shift(1) <= kj.shift(1))
+    cond_A = (tk > kj) & (xup | (lookback_cross_bars >= 1) & xup.shift(1, fill_value=False))
+
+    # i 봉 기준 후행스팬(i0 = i - d)은 close[i], 비교 대상은 tenkan[i - d]
+    tk_d = tk.shift(d)
+    c_xup = (close > tk_d) & (close.shift(1) <= tk_d.shift(1))
+    cond_B = (close > tk_d) & (c_xup | (lookback_cross_bars >= 1) & c_xup.shift(1, fill_value=False))
+    cond_B &= pd.Series(np.arange(len(df)) - d >= 2, index=df.index) & tk_d.notna()
+
+    _, _, dx = dmi_dx(df, period=int(dx_period))
+    cond_C = dx > dx.shift(1)
+    ma5 = sma(close, int(ma_fast)); ma10 = sma(close, int(ma_mid))
+    cond_D = close > ma5
+    cond_E = ma5 > ma10
+    cond_F = kj > kj.shift(1)
+    cond_G = close > kj
+    return _b(valid & cond_A & cond_B & cond_C & cond_D & cond_E & cond_F & cond_G)
+
+def _rolling_prev(x, window, fn):
+    # x[g-window+1 .. g-1] (현재 주 제외) 의 rolling max/min
+    s = pd.Series(x)
+    if window <= 1:
+        return np.full(len(x), -np.inf if fn == "max" else np.inf)
+    r = s.shift(1).rolling(window - 1, min_periods=window - 1)
+    return (r.max() if fn == "max" else r.min()).to_numpy()
+
+def mask_major_uptrend_pullback_bounce(
+    df,
+    min_market_cap_krw=100_000_000_000,
+    min_close=1000, max_close=99_999_999,
+    min_daily_volume=100_000, max_daily_volume=999_999_999,
+    weekly_lookback=135, nhigh_weeks=299, week_ending="FRI",
+    market_cap=None
+):
+    n = len(df)
+    # 과거 시점의 시가총액은 알 수 없으므로 현재 시가총액으로 고정 필터
+    if market_cap is None or market_cap < float(min_market_cap_krw):
+        return np.zeros(n, dtype=bool)
+    close = df["Close"].to_numpy(dtype=np.float64); open_ = df["Open"].to_numpy(dtype=np.float64)
+    vol = df["Volume"].to_numpy(dtype=np.float64)
+    high = df["High"].to_numpy(dtype=np.float64); low = df["Low"].to_numpy(dtype=np.float64)
+    cheap = ((float(min_close) <= close) & (close <= float(max_close))
+             & (int(min_daily_volume) <= vol) & (vol <= int(max_daily_volume)) & (close > open_))
+
+    # 일봉 → 주 번호(데이터가 있는 주만 0,1,2,...). 주 진행 중에는 그때까지의 부분 주봉을 사용
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    per = idx.to_period(f"W-{str(week_ending).upper()}").asi8
+    new_week = np.concatenate([[True], per[1:] != per[:-1]])
+    g = np.cumsum(new_week) - 1
+    s_high = pd.Series(high); s_low = pd.Series(low)
+    p_high = s_high.groupby(g).cummax().to_numpy()
+    p_low = s_low.groupby(g).cummin().to_numpy()
+
+    WH = s_high.groupby(g).max().to_numpy(); WL = s_low.groupby(g).min().to_numpy()
+    WC = pd.Series(close).groupby(g).last().to_numpy()
+    L, H = int(weekly_lookback), int(nhigh_weeks)
+
+    prev_hi_H = _rolling_prev(WH, H, "max")[g]
+    prev_hi_L = _rolling_prev(WH, L, "max")[g]
+    prev_lo_L = _rolling_prev(WL, L, "min")[g]
+    cond_hi = p_high >= np.fmax(p_high, prev_hi_H) - 1e-8
+
+    lo0 = np.fmin(p_low, prev_lo_L); hi0 = np.fmax(p_high, prev_hi_L)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rng0 = np.where(hi0 - lo0 == 0, np.nan, hi0 - lo0)
+        pos0 = (close - lo0) / rng0
+        lo_w = pd.Series(WL).rolling(L).min().to_numpy(); hi_w = pd.Series(WH).rolling(L).max().to_numpy()
+        rng_w = np.where(hi_w - lo_w == 0, np.nan, hi_w - lo_w)
+        pos_w = (WC - lo_w) / rng_w
+    gp = np.maximum(g - 1, 0)
+    pos1 = np.where(g >= 1, pos_w[gp], np.nan)
+
+    enough = (g + 1) >= max(L, H) + 5
+    return cheap & enough & cond_hi & ((pos0 <= 0.25) | (pos1 <= 0.25)) & (pos0 >= 0.25)
+
+def mask_crash_ma_rebound(
+    df,
+    min_dod_close_change=0.01,
+    max_open_to_low_drawdown=-0.03,
+    min_low_to_close_rebound=0.02,
+    near_ma_tolerance=0.005,
+    ma_set=(5,20,60)
+):
+    close = df["Close"]; open_ = df["Open"]; low = df["Low"]
+    cond_A = (close / close.shift(1) - 1.0) >= float(min_dod_close_change)
+    cond_B = ((low / open_) - 1.0) <= float(max_open_to_low_drawdown)
+    cond_C = ((close / low) - 1.0) >= float(min_low_to_close_rebound)
+    tol = float(near_ma_tolerance)
+    near_any = pd.Series(False, index=df.index)
+    for p in ma_set:
+        ma = sma(close, int(p))
+        near_any |= ma.notna() & ((close - ma).abs() / ma <= tol)
+    enough = np.arange(1, len(df) + 1) >= max(ma_set) + 5
+    return enough & _b(cond_A & cond_B & cond_C & near_any)
+
+def mask_sanity_ma5_gt_ma10(df):
+    ma5 = sma(df["Close"], 5); ma10 = sma(df["Close"], 10)
+    return (np.arange(1, len(df) + 1) >= 10) & _b(ma5 > ma10)
+
+MASKS = {
+    "cloud_pullback_rebreak_full": mask_cloud_pullback_rebreak_full,
+    "ichimoku_tenkan_golden_combo": mask_ichimoku_tenkan_golden_combo,
+    "major_uptrend_pullback_bounce": mask_major_uptrend_pullback_bounce,
+    "crash_ma_rebound": mask_crash_ma_rebound,
+    "sanity_ma5_gt_ma10": mask_sanity_ma5_gt_ma10,
+}
+
+# 활성 신호(와 선언형 전략)별 전 구간 트리거 마스크 {키: bool ndarray}
+def signal_masks(df, cfg, ticker=None, market_cap_fetcher=None, params=None, plan=None):
+    if plan is None:
+        plan = compile_plan(cfg, params)
+    out = {}
+    for key, _, kw, need, _ in plan.steps:
+        if key == "major_uptrend_pullback_bounce":
+            mc = market_cap_fetcher(ticker) if market_cap_fetcher and ticker else None
+            m = MASKS[key](df, market_cap=mc, **kw)
+        else:
+            m = MASKS[key](df, **kw)
+        # run_signals 는 히스토리가 need 봉보다 짧으면 그 신호를 건너뛴다
+        m = np.array(m, dtype=bool)
+        m[:need - 1] = False
+        out[key] = m
+    if plan.strategies:
+        got = strategy_masks(plan.strategies, {f: df[f].to_numpy(dtype=np.float64)[:, None] for f in DSL_FIELDS.values()})
+        for st in plan.strategies:
+            m = got[st.key][:, 0].copy()
+            m[:st.need - 1] = False
+            out[st.key] = m
+    return out
+
+def forward_returns(df, horizons=HORIZONS):
+    close = df["Close"].to_numpy(dtype=np.float64)
+    out = {}
+    for h in horizons:
+        fwd = np.full(len(close), np.nan)
+        if len(close) > h:
+            fwd[:-h] = close[h:] / close[:-h] - 1.0
+        out[h] = fwd
+    return out
+
+# frames: {ticker: df} 의 신호별 트리거와 선행수익률을 acc 에 누적(청크 단위 호출 가능)
+def collect(frames, cfg, market_cap_fetcher=None, acc=None, horizons=HORIZONS):
+    plan = compile_plan(cfg)
+    if acc is None:
+        names = [(key, SIGNAL_NAMES[key]) for key, _ in plan.params] + [(st.key, st.name) for st in plan.strategies]
+        acc = {key: {"name": name, "triggers": 0, "rets": {h: [] for h in horizons}} for key, name in names}
+    for t, df in frames.items():
+        if df is None or df.empty:
+            continue
+        masks = signal_masks(df, cfg, ticker=t, market_cap_fetcher=market_cap_fetcher, plan=plan)
+        fwd = forward_returns(df, horizons)
+        for key, m in masks.items():
+            acc[key]["triggers"] += int(m.sum())
+            for h in acc[key]["rets"]:
+                acc[key]["rets"][h].append(fwd[h][m])
+    return acc
+
+# 신호별 트리거 수와 1/5/20일 선행수익률 통계(적중률 = 수익률>0 비율)
+def summarize(acc):
+    report = {}
+    for key, a in acc.items():
+        r = {"name": a.get("name") or SIGNAL_NAMES[key], "triggers": a["triggers"]}
+        for h, parts in a["rets"].items():
+            x = np.concatenate(parts) if parts else np.array([])
+            x = x[~np.isnan(x)]
+            r[f"{h}d"] = {
+                "n": int(len(x)),
+                "hit_rate": float((x > 0).mean()) if len(x) else None,
+                "mean": float(x.mean()) if len(x) else None,
+                "median": float(np.median(x)) if len(x) else None,
+                "p10": float(np.percentile(x, 10)) if len(x) else None,
+                "p90": float(np.percentile(x, 90)) if len(x) else None,
+            }
+        report[key] = r
+    return report
+
+def run_backtest(frames, cfg, market_cap_fetcher=None, horizons=HORIZONS):
+    return summarize(collect(frames, cfg, market_cap_fetcher=market_cap_fetcher, horizons=horizons))
+
+# 마지막 봉의 마스크 값이 run_signals(오늘 판정)과 같은지 확인. 불일치 신호 키 목록 반환
+def parity_check(df, cfg, ticker=None, market_cap_fetcher=None):
+    plan = compile_plan(cfg)
+    masks = signal_masks(df, cfg, ticker=ticker, market_cap_fetcher=market_cap_fetcher, plan=plan)
+    fired = {f["name"] for f in run_signals(df, cfg, ticker=ticker, market_cap_fetcher=market_cap_fetcher, trim=False, plan=plan)}
+    names = {key: SIGNAL_NAMES[key] for key, _ in plan.params}
+    names.update((st.key, st.name) for st in plan.strategies)
+    return [key for key, name in names.items() if bool(masks[key][-1]) != (name in fired)]
+
+# python -m app.backtest [출력.json]  — 현재 설정의 유니버스/신호로 과거 구간 성과 리포트
+def main():
+    from datetime import datetime, timedelta
+    from .main import load_config
+    from .universe import load_universe_and_names
+    from .scan import fetch_frames, open_store, open_market_caps, CHUNK_SIZE
+    from .bars import as_frame
+
+    cfg = load_config(os.environ.get("APP_CONFIG", "config.yaml"))
+    scan_cfg = cfg["scan"]
+    tickers, _ = load_universe_and_names(cfg)
+    limit = int(os.getenv("BACKTEST_LIMIT", "0"))
+    if limit > 0:
+        tickers = tickers[:limit]
+    # 스캔은 신호 LOOKBACK 만큼만 받지만 백테스트는 긴 구간이 필요
+    start = datetime.utcnow() - timedelta(days=int(os.getenv("BACKTEST_DAYS", "2200")))
+    store = open_store(cfg)
+    market_caps = open_market_caps(cfg)
+
+    acc = None
+    for i in range(0, len(tickers), CHUNK_SIZE):
+        batch = tickers[i:i+CHUNK_SIZE]
+        frames = fetch_frames(batch, start, interval=str(scan_cfg.get("interval", "1d")), store=store)
+        frames = {t: as_frame(b) for t, b in frames.items()}
+        acc = collect(frames, cfg, market_cap_fetcher=market_caps, acc=acc)
+    report = summarize(acc or {})
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
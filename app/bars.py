@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+
+# 가격은 float32 로 정확히 표현될 때만(원 단위 정수 가격은 2^24 미만까지) float32, 아니면 float64.
+# 거래량은 정수면 int64. 신호 값이 바뀌지 않도록 손실 없는 경우에만 줄인다
+def _prices(a):
+    a32 = a.astype(np.float32)
+    return a32 if np.array_equal(a32, a, equal_nan=True) else np.array(a, dtype=np.float64)
+
+def _volume(a):
+    ok = np.isfinite(a)
+    if np.array_equal(np.round(a[ok]), a[ok]):
+        return np.where(ok, a, 0).astype(np.int64)
+    return np.array(a, dtype=np.float64)
+
+# 종목 하나의 OHLCV(열마다 연속 배열 + 날짜 인덱스). 다운로드 청크로 만든 것은 청크 날짜 인덱스를 공유한다
+class Bars:
+    __slots__ = ("index", "open", "high", "low", "close", "volume")
+
+    def __init__(self, index, open, high, low, close, volume):
+        self.index = index
+        self.open, self.high, self.low, self.close, self.volume = open, high, low, close, volume
+
+    @classmethod
+    def from_frame(cls, df):
+        if df is None or df.empty:
+            return cls(pd.DatetimeIndex([]), *([np.empty(0)] * 5))
+        p = [_prices(df[f].to_numpy(dtype=np.float64)) for f in FIELDS[:4]]
+        return cls(df.index.copy(), *p, _volume(df["Volume"].to_numpy(dtype=np.float64)))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def empty(self):
+        return len(self.index) == 0
+
+    def __getitem__(self, field):
+        return getattr(self, field.lower())
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.open, self.high, self.low, self.close, self.volume)) + self.index.nbytes
+
+    def tail(self, n):
+        s = slice(max(0, len(self) - int(n)), None)
+        return Bars(self.index[s], self.open[s], self.high[s], self.low[s], self.close[s], self.volume[s])
+
+    # 청크 배열과 분리된 사본(결과처럼 오래 들고 있을 때)
+    def copy(self):
+        return Bars(self.index.copy(), self.open.copy(), self.high.copy(), self.low.copy(), self.close.copy(), self.volume.copy())
+
+    # 신호/차트용 float64 DataFrame
+    def frame(self):
+        return pd.DataFrame({f: np.asarray(self[f], dtype=np.float64) for f in FIELDS}, index=self.index)
+
+def as_frame(x):
+    return x.frame() if isinstance(x, Bars) else x
+
+# yf.download(group_by="ticker") 결과 → {ticker: Bars}. 다운로드 프레임의 열(view)에서 다섯 필드가
+# 모두 있는 봉만 골라 바로 압축 배열로 옮긴다(종목별 DataFrame 을 만들지 않음). 날짜는 청크 인덱스를 공유
+def bars_from_download(data, tickers):
+    if data is None or data.empty:
+        return {}
+    cols = data.columns
+    if not isinstance(cols, pd.MultiIndex):
+        if len(tickers) != 1:
+            return {}
+        cols = pd.MultiIndex.from_tuples([(tickers[0], c) for c in cols])
+    pos = {c: j for j, c in enumerate(cols)}
+    out = {}
+    for t in tickers:
+        keys = [(t, f) for f in FIELDS]
+        if not all(k in pos for k in keys):
+            out[t] = Bars.from_frame(None)
+            continue
+        arrs = [np.asarray(data.iloc[:, pos[k]].to_numpy(), dtype=np.float64) for k in keys]
+        ok = ~np.isnan(arrs[0])
+        for a in arrs[1:]:
+            ok &= ~np.isnan(a)
+        rows = np.flatnonzero(ok)
+        if not len(rows):
+            out[t] = Bars.from_frame(None)
+            continue
+        # 중간 결측이 없으면 연속 구간(slice), 있으면 해당 행만
+        sel = slice(rows[0], rows[-1] + 1) if rows[-1] - rows[0] + 1 == len(rows) else rows
+        p = [_prices(a[sel]) for a in arrs[:4]]
+        out[t] = Bars(data.index[sel], *p, _volume(arrs[4][sel]))
+    return out
@@ -1,9 +1,25 @@
 import io
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-import mplfinance as mpf
 from .indicators import ichimoku
+from .store import naive_index
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+ICH_LINES = ("tenkan", "kijun", "span_a_fwd", "span_b_fwd")
+
+# matplotlib/mplfinance 는 처음 그릴 때 불러온다(send_chart: false 거나 알림이 없으면 import 비용 없음)
+@lru_cache(maxsize=None)
+def _mpf():
+    import matplotlib
+    matplotlib.use("Agg")
+    import mplfinance
+    return mplfinance
 
 def render_chart_png_bytes(df, title):
+    mpf = _mpf()
     fig_bytes = io.BytesIO()
     style = mpf.make_mpf_style(base_mpf_style="yahoo", gridstyle=":")
     mpf.plot(df, type="candle", mav=(20,50,200), volume=True, style=style, title=title,
@@ -11,8 +27,13 @@ def render_chart_png_bytes(df, title):
     fig_bytes.seek(0)
     return fig_bytes
 
-def render_chart_png_bytes_with_ichimoku(df, title, tenkan=9, kijun=26, senkou_b=52, displacement=26, resistance=None):
-    ich = ichimoku(df, tenkan, kijun, senkou_b, displacement)
+# ich: 전체 히스토리로 미리 계산된 일목 지표(지표 캐시)가 있으면 df 구간만 잘라 사용
+def render_chart_png_bytes_with_ichimoku(df, title, tenkan=9, kijun=26, senkou_b=52, displacement=26, resistance=None, ich=None):
+    mpf = _mpf()
+    if ich is None:
+        ich = ichimoku(df, tenkan, kijun, senkou_b, displacement)
+    else:
+        ich = ich.loc[df.index]
     apds = [
         mpf.make_addplot(ich["tenkan"], color="#ff8c00"),
         mpf.make_addplot(ich["kijun"], color="#1e90ff"),
@@ -24,7 +45,110 @@ def render_chart_png_bytes_with_ichimoku(df, title, tenkan=9, kijun=26, senkou_b
     style = mpf.make_mpf_style(base_mpf_style="yahoo", gridstyle=":")
     mpf.plot(df, type="candle", mav=(20,50,200), volume=True, style=style, title=title,
              addplot=apds,
-             fill_between=dict(y1=ich["span_a_fwd"], y2=ich["span_b_fwd"], alpha=0.12, color="#7cb342"),
+             fill_between=dict(y1=ich["span_a_fwd"].to_numpy(), y2=ich["span_b_fwd"].to_numpy(), alpha=0.12, color="#7cb342"),
              savefig=dict(fname=fig_bytes, dpi=160, bbox_inches="tight"))
     fig_bytes.seek(0)
     return fig_bytes
+
+# ---- 배치 렌더러: 스타일 1회 생성, Agg figure/axes 재사용, 프로세스 풀 병렬 ----
+
+@lru_cache(maxsize=None)
+def chart_style():
+    return _mpf().make_mpf_style(base_mpf_style="yahoo", gridstyle=":")
+
+# 렌더 작업: DataFrame 대신 차트에 필요한 꼬리 구간 배열만 담는다(프로세스 간 전달 비용 최소화)
+def chart_job(df, title, tail=220, ich=None, resistance=None):
+    t = df.tail(tail)
+    job = {"title": title, "dates": naive_index(t.index).asi8, "ohlcv": t[FIELDS].to_numpy(dtype=np.float64)}
+    if ich is not None:
+        ich = ich.loc[t.index]
+        job["ich"] = {k: ich[k].to_numpy(dtype=np.float64) for k in ICH_LINES}
+    if resistance is not None:
+        job["resistance"] = float(resistance)
+    return job
+
+class ChartRenderer:
+    def __init__(self, dpi=160, fmt="png"):
+        self.dpi = int(dpi)
+        self.fmt = str(fmt).lower()
+        self.fig = _mpf().figure(style=chart_style(), figsize=(8, 5.75))
+        self.ax = self.fig.add_axes([0.07, 0.30, 0.83, 0.62])
+        self.vax = self.fig.add_axes([0.07, 0.10, 0.83, 0.18])
+
+    def render(self, job):
+        mpf = _mpf()
+        ax, vax = self.ax, self.vax
+        ax.clear(); vax.clear()
+        idx = pd.DatetimeIndex(np.asarray(job["dates"]).astype("datetime64[ns]"))
+        df = pd.DataFrame(job["ohlcv"], columns=FIELDS, index=idx)
+        kw = {}
+        apds = []
+        ich = job.get("ich")
+        if ich is not None:
+            apds += [
+                mpf.make_addplot(ich["tenkan"], ax=ax, color="#ff8c00"),
+                mpf.make_addplot(ich["kijun"], ax=ax, color="#1e90ff"),
+            ]
+            kw["fill_between"] = dict(y1=ich["span_a_fwd"], y2=ich["span_b_fwd"], alpha=0.12, color="#7cb342")
+        if job.get("resistance") is not None:
+            apds.append(mpf.make_addplot(np.full(len(df), job["resistance"]), ax=ax, color="#777", linestyle="--", width=1.2))
+        if apds:
+            kw["addplot"] = apds
+        mpf.plot(df, ax=ax, type="candle", mav=(20,50,200), **kw)
+        self._volume(df)
+        ax.set_title(job["title"])
+        ax.tick_params(labelbottom=False)
+        buf = io.BytesIO()
+        # 레이아웃이 고정이므로 bbox_inches="tight"(이중 렌더링) 생략
+        self.fig.savefig(buf, format=self.fmt, dpi=self.dpi)
+        buf.seek(0)
+        buf.name = f"chart.{self.fmt}"
+        return buf
+
+    # 거래량: 봉마다 patch 를 만드는 ax.bar 대신 사각형 컬렉션 1개
+    def _volume(self, df):
+        from matplotlib.collections import PolyCollection
+        mc = chart_style()["marketcolors"]["volume"]
+        n = len(df)
+        x = np.arange(n, dtype=np.float64)
+        v = df["Volume"].to_numpy()
+        up = df["Close"].to_numpy() >= df["Open"].to_numpy()
+        verts = np.empty((n, 4, 2))
+        verts[:, 0, 0] = verts[:, 1, 0] = x - 0.4
+        verts[:, 2, 0] = verts[:, 3, 0] = x + 0.4
+        verts[:, 0, 1] = verts[:, 3, 1] = 0.0
+        verts[:, 1, 1] = verts[:, 2, 1] = v
+        colors = np.where(up, mc["up"], mc["down"])
+        self.vax.add_collection(PolyCollection(verts, facecolors=colors, edgecolors=colors, linewidths=0.5))
+        self.vax.set_xlim(self.ax.get_xlim())
+        self.vax.set_ylim(0, float(np.nanmax(v)) * 1.05 if n else 1.0)
+        self.vax.set_ylabel("Volume")
+        ticks = [int(t) for t in self.ax.get_xticks() if 0 <= t < n]
+        self.vax.set_xticks(ticks)
+        self.vax.set_xticklabels([df.index[t].strftime("%b-%d") for t in ticks], rotation=45, fontsize=8)
+
+_RENDERER = {}
+
+def _init_render_worker(dpi, fmt):
+    _RENDERER["r"] = ChartRenderer(dpi=dpi, fmt=fmt)
+
+def _render_many(jobs):
+    return [_RENDERER["r"].render(j).getvalue() for j in jobs]
+
+# jobs 순서대로 이미지(BytesIO) 반환. workers>0 이면 프로세스 풀(워커당 렌더러 1개)
+def render_batch(jobs, workers=0, dpi=160, fmt="png", chunk=8):
+    if not jobs:
+        return []
+    if workers <= 0:
+        r = ChartRenderer(dpi=dpi, fmt=fmt)
+        return [r.render(j) for j in jobs]
+    parts = [jobs[i:i+chunk] for i in range(0, len(jobs), chunk)]
+    out = []
+    with ProcessPoolExecutor(max_workers=int(workers), mp_context=mp.get_context("spawn"),
+                             initializer=_init_render_worker, initargs=(dpi, fmt)) as ex:
+        for imgs in ex.map(_render_many, parts):
+            for b in imgs:
+                buf = io.BytesIO(b)
+                buf.name = f"chart.{str(fmt).lower()}"
+                out.append(buf)
+    return out
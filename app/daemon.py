@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+
+# 상주 스캔 데몬. 인터프리터와 무거운 모듈(pandas, 지표, 차트), 설정, 유니버스, 프로세스 캐시
+# (상장 목록, 차트 스타일)를 띄워 둔 채 요청마다 app.main 과 같은 스캔 한 번(샤드/리포트/비용 포함)을 돌린다.
+#   python -m app.daemon               서버(daemon.socket 유닉스 소켓 / daemon.trigger_file 폴링)
+#   python -m app.daemon send scan     요청: scan | ping | reload | stop → 응답 JSON 한 줄
+#   touch <trigger_file>               파일 내용(없으면 scan)을 실행하고 지운 뒤 <trigger_file>.result.json 에 응답을 쓴다
+# 클라이언트(send)는 표준 라이브러리만 쓰므로 cron 에서 바로 부르면 된다.
+
+COMMANDS = ("scan", "ping", "reload", "stop")
+
+def _daemon_cfg(cfg):
+    d = (cfg.get("daemon") or {}) if isinstance(cfg, dict) else {}
+    return d if isinstance(d, dict) else {}
+
+class Daemon:
+    def __init__(self, cfg_path):
+        self.cfg_path = cfg_path
+        self.started = time.monotonic()
+        self.scans = 0
+        self.last = None
+        self.load()
+
+    # 설정/유니버스 적재와 모듈 예열. reload 요청이나 KST 날짜가 바뀌었을 때 다시 부른다
+    def load(self):
+        from .main import load_config
+        from .universe import load_universe_and_names, load_krx_listing, _kst_today
+        from . import scan, merge, telegram_client  # noqa: F401  (요청 때 import 하지 않도록 예열)
+
+        t0 = time.monotonic()
+        load_krx_listing.cache_clear()
+        self.cfg = load_config(self.cfg_path)
+        self.tickers, self.name_map = load_universe_and_names(self.cfg)
+        self.day = _kst_today()
+        if self.cfg["scan"].get("send_chart", True):
+            from .chart import chart_style
+            chart_style()
+        print(f"[daemon] {len(self.tickers)}종목 적재 ({time.monotonic() - t0:.1f}s)")
+
+    def scan(self):
+        from .main import run_scheduled
+        from .metrics import METRICS
+        from .universe import _kst_today
+
+        if _kst_today() != self.day:
+            self.load()
+        METRICS.reset()
+        t0 = time.monotonic()
+        stats = run_scheduled(self.cfg, self.tickers, self.name_map) or {}
+        self.scans += 1
+        self.last = {"ok": True, "tickers": len(self.tickers), "matched": int(stats.get("matched", 0)),
+                     "errors": int(stats.get("errors", 0)), "wall_s": round(time.monotonic() - t0, 2)}
+        return self.last
+
+    def handle(self, cmd):
+        cmd = (cmd or "scan").strip().lower() or "scan"
+        if cmd not in COMMANDS:
+            return {"ok": False, "error": f"알 수 없는 요청 '{cmd}' ({'|'.join(COMMANDS)})"}
+        try:
+            if cmd == "scan":
+                return self.scan()
+            if cmd == "reload":
+                self.load()
+            return {"ok": True, "cmd": cmd, "tickers": len(self.tickers), "scans": self.scans,
+                    "uptime_s": round(time.monotonic() - self.started, 1), "last": self.last}
+        except Exception as e:
+            print(f"[daemon] {cmd} error: {e}")
+            return {"ok": False, "error": str(e)}
+
+    # 요청을 하나씩 처리(스캔은 겹치지 않는다). stop 을 받으면 반환
+    def serve(self):
+        d = _daemon_cfg(self.cfg)
+        path, trigger = d.get("socket") or "", d.get("trigger_file") or ""
+        poll = float(d.get("poll_seconds", 5))
+        if not path and not trigger:
+            sys.exit("[daemon] daemon.socket 또는 daemon.trigger_file 이 필요합니다")
+        srv = None
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            srv.bind(path)
+            srv.listen(4)
+            srv.settimeout(poll if trigger else None)
+        print(f"[daemon] ready socket={path or '-'} trigger={trigger or '-'}")
+        try:
+            while True:
+                if trigger and os.path.exists(trigger):
+                    with open(trigger, "r", encoding="utf-8") as f:
+                        cmd = f.read()
+                    os.unlink(trigger)
+                    res = self.handle(cmd)
+                    with open(trigger + ".result.json", "w", encoding="utf-8") as f:
+                        json.dump(res, f, ensure_ascii=False)
+                    if res.get("cmd") == "stop":
+                        return
+                if srv is None:
+                    time.sleep(poll)
+                    continue
+                try:
+                    conn, _ = srv.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    cmd = conn.makefile("r", encoding="utf-8").readline()
+                    res = self.handle(cmd)
+                    try:
+                        conn.sendall((json.dumps(res, ensure_ascii=False) + "\n").encode("utf-8"))
+                    except OSError:
+                        pass
+                if res.get("cmd") == "stop":
+                    return
+        finally:
+            if srv is not None:
+                srv.close()
+                if os.path.exists(path):
+                    os.unlink(path)
+
+# 소켓으로 요청을 보내고 응답(dict)을 돌려준다. 스캔은 오래 걸리므로 기본 timeout 없음
+def send(path, cmd="scan", timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall((cmd + "\n").encode("utf-8"))
+        return json.loads(s.makefile("r", encoding="utf-8").readline() or "{}")
+
+def _socket_path(cfg_path):
+    # 클라이언트는 yaml 없이도 돌도록 DAEMON_SOCKET 을 먼저 본다
+    if os.getenv("DAEMON_SOCKET"):
+        return os.environ["DAEMON_SOCKET"]
+    import yaml
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        return _daemon_cfg(yaml.safe_load(f) or {}).get("socket") or ""
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.daemon")
+    ap.add_argument("cmd", nargs="?", default="serve", choices=["serve", "send"])
+    ap.add_argument("request", nargs="?", default="scan", choices=COMMANDS)
+    ap.add_argument("--timeout", type=float, default=None, help="send: 응답 대기(초)")
+    args = ap.parse_args(argv)
+    cfg_path = os.environ.get("APP_CONFIG", "config.yaml")
+
+    if args.cmd == "send":
+        path = _socket_path(cfg_path)
+        if not path:
+            sys.exit("[daemon] daemon.socket(또는 DAEMON_SOCKET)이 설정되어 있지 않습니다")
+        res = send(path, args.request, timeout=args.timeout)
+        print(json.dumps(res, ensure_ascii=False))
+        sys.exit(0 if res.get("ok") else 1)
+
+    Daemon(cfg_path).serve()
+
+if __name__ == "__main__":
+    main()
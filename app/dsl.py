@@ -0,0 +1,236 @@
+import ast
+import numpy as np
+import pandas as pd
+
+# config.yaml strategies: 섹션의 선언형 조건식. 코드 수정 없이 새 전략을 추가한다.
+#   strategies:
+#     ma20_volume_breakout:
+#       enabled: true
+#       name: "20일선 돌파+거래량"
+#       when:                                   # 모두 참이면 트리거(AND)
+#         - "crosses_above(close, sma(close, 20))"
+#         - "volume >= 2 * sma(volume, 20)[1]"  # x[k]: k 봉 전 값
+# 식은 시작 시 한 번 파싱해 (봉 × 종목) 행렬 위의 NumPy/pandas 연산으로 컴파일하고
+# 같은 하위식(sma(close, 20) 등)은 전략 간에 한 번만 계산한다. 종목별/패널 경로가 같은 코드를 쓴다.
+
+FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+def _wide(a):
+    return pd.DataFrame(a, copy=False)
+
+def _float(a):
+    return a.astype(np.float64) if a.dtype == bool else a
+
+def _bool(a):
+    return a if a.dtype == bool else np.nan_to_num(a) != 0
+
+def _shift(a, k):
+    a = _float(a)
+    if k <= 0 or np.ndim(a) == 0:
+        return a
+    out = np.full_like(a, np.nan)
+    if k < len(a):
+        out[k:] = a[:-k]
+    return out
+
+# 창 함수: (구현, 추가로 필요한 봉 수)
+ROLLING = {
+    "sma": (lambda w, n: w.rolling(n, min_periods=n).mean(), lambda n: n - 1),
+    "highest": (lambda w, n: w.rolling(n, min_periods=n).max(), lambda n: n - 1),
+    "lowest": (lambda w, n: w.rolling(n, min_periods=n).min(), lambda n: n - 1),
+    "sum": (lambda w, n: w.rolling(n, min_periods=n).sum(), lambda n: n - 1),
+    "std": (lambda w, n: w.rolling(n, min_periods=n).std(ddof=0), lambda n: n - 1),
+    # ewm 은 LOOKBACK(DX)과 같이 기간×20 봉을 워밍업으로 둔다
+    "ema": (lambda w, n: w.ewm(span=n, adjust=False).mean(), lambda n: 20 * n),
+    "rma": (lambda w, n: w.ewm(alpha=1.0 / n, adjust=False).mean(), lambda n: 20 * n),
+}
+
+# 두 값 함수: (구현, 추가로 필요한 봉 수)
+def _crosses_above(a, b):
+    a, b = _float(a), _float(b)
+    return (a > b) & (_shift(a, 1) <= _shift(b, 1))
+
+def _crosses_below(a, b):
+    a, b = _float(a), _float(b)
+    return (a < b) & (_shift(a, 1) >= _shift(b, 1))
+
+PAIR = {
+    "crosses_above": (_crosses_above, 1),
+    "crosses_below": (_crosses_below, 1),
+    "above": (lambda a, b: _float(a) > _float(b), 0),
+    "below": (lambda a, b: _float(a) < _float(b), 0),
+    "max": (lambda a, b: np.fmax(_float(a), _float(b)), 0),
+    "min": (lambda a, b: np.fmin(_float(a), _float(b)), 0),
+}
+
+# x 와 n 봉 전 값의 비교/변화. n 은 정수 상수(기본 1)
+LAG = {
+    "change": lambda a, n: _float(a) - _shift(a, n),
+    "pct": lambda a, n: _float(a) / _shift(a, n) - 1.0,
+    "rising": lambda a, n: _float(a) > _shift(a, n),
+    "falling": lambda a, n: _float(a) < _shift(a, n),
+}
+
+BINOP = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+CMP = {ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less, ast.LtE: np.less_equal,
+       ast.Eq: np.equal, ast.NotEq: np.not_equal}
+
+# 컴파일된 식 노드. env: {"Open": 행렬, ..., "_memo": {}} → 행렬(float 또는 bool)
+class Node:
+    __slots__ = ("key", "fn", "depth")
+
+    def __init__(self, key, fn, depth):
+        self.key, self.fn, self.depth = key, fn, depth
+
+    def __call__(self, env):
+        memo = env["_memo"]
+        v = memo.get(self.key)
+        if v is None:
+            v = memo[self.key] = self.fn(env)
+        return v
+
+def _int_arg(node, what):
+    if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool) and node.value >= 0:
+        return node.value
+    raise ValueError(f"{what}: 0 이상의 정수 상수가 필요합니다")
+
+def _compile(node):
+    key = ast.dump(node)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        val = float(node.value)
+        return Node(key, lambda env: np.float64(val), 0)
+    if isinstance(node, ast.Name):
+        if node.id not in FIELDS:
+            raise ValueError(f"알 수 없는 이름 '{node.id}' ({', '.join(FIELDS)} 만 사용 가능)")
+        field = FIELDS[node.id]
+        return Node(key, lambda env: env[field], 1)
+    if isinstance(node, ast.Subscript):
+        k = _int_arg(node.slice, "x[k]")
+        x = _compile(node.value)
+        return Node(key, lambda env: _shift(x(env), k), x.depth + k)
+    if isinstance(node, ast.UnaryOp):
+        x = _compile(node.operand)
+        if isinstance(node.op, ast.USub):
+            return Node(key, lambda env: -_float(x(env)), x.depth)
+        if isinstance(node.op, ast.Not):
+            return Node(key, lambda env: ~_bool(x(env)), x.depth)
+    if isinstance(node, ast.BinOp) and type(node.op) in BINOP:
+        op = BINOP[type(node.op)]
+        a, b = _compile(node.left), _compile(node.right)
+        return Node(key, lambda env: op(_float(a(env)), _float(b(env))), max(a.depth, b.depth))
+    if isinstance(node, ast.BoolOp):
+        xs = [_compile(v) for v in node.values]
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        def fn(env):
+            out = _bool(xs[0](env))
+            for x in xs[1:]:
+                out = op(out, _bool(x(env)))
+            return out
+        return Node(key, fn, max(x.depth for x in xs))
+    if isinstance(node, ast.Compare):
+        xs = [_compile(v) for v in [node.left] + node.comparators]
+        ops = []
+        for o in node.ops:
+            if type(o) not in CMP:
+                raise ValueError(f"지원하지 않는 비교: {ast.unparse(node)}")
+            ops.append(CMP[type(o)])
+        def fn(env):
+            out = None
+            for op, a, b in zip(ops, xs, xs[1:]):
+                r = op(_float(a(env)), _float(b(env)))
+                out = r if out is None else out & r
+            return out
+        return Node(key, fn, max(x.depth for x in xs))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        name, args = node.func.id, node.args
+        if name in ROLLING and len(args) == 2:
+            impl, extra = ROLLING[name]
+            x, n = _compile(args[0]), _int_arg(args[1], name)
+            if n < 1:
+                raise ValueError(f"{name}: 기간은 1 이상")
+            return Node(key, lambda env: impl(_wide(_float(x(env))), n).to_numpy(), x.depth + extra(n))
+        if name in PAIR and len(args) == 2:
+            impl, extra = PAIR[name]
+            a, b = _compile(args[0]), _compile(args[1])
+            return Node(key, lambda env: impl(a(env), b(env)), max(a.depth, b.depth) + extra)
+        if name in LAG and len(args) in (1, 2):
+            impl = LAG[name]
+            x = _compile(args[0])
+            n = _int_arg(args[1], name) if len(args) == 2 else 1
+            return Node(key, lambda env: impl(x(env), n), x.depth + n)
+        if name == "abs" and len(args) == 1:
+            x = _compile(args[0])
+            return Node(key, lambda env: np.abs(_float(x(env))), x.depth)
+        raise ValueError(f"알 수 없는 함수 또는 인자 수: {ast.unparse(node)}")
+    raise ValueError(f"지원하지 않는 식: {ast.unparse(node)}")
+
+def compile_expr(text):
+    try:
+        tree = ast.parse(str(text).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"조건식 문법 오류: {text!r} ({e.msg})") from None
+    return _compile(tree.body)
+
+# 전략 하나: 조건 노드들(AND), 최소 봉 수(need) 와 넘길 꼬리 봉 수(window)
+class Strategy:
+    def __init__(self, key, name, when, lookback_bars=None, detail=None):
+        self.key, self.name = key, name
+        self.when = [str(w) for w in when]
+        self.conds = [compile_expr(w) for w in self.when]
+        self.need = max([c.depth for c in self.conds] + [1])
+        self.window = max(self.need, int(lookback_bars or 0))
+        self.detail = detail or " & ".join(self.when)
+
+# 활성 전략 목록(설정 순서). 식 오류는 시작 시 ValueError 로 알린다
+def compile_strategies(cfg):
+    out = []
+    for key, c in (cfg.get("strategies") or {}).items():
+        if not isinstance(c, dict) or not c.get("enabled"):
+            continue
+        when = c.get("when") or []
+        if isinstance(when, str):
+            when = [when]
+        if not when:
+            raise ValueError(f"strategies.{key}: when 조건이 없습니다")
+        try:
+            out.append(Strategy(str(key), str(c.get("name") or key), when, c.get("lookback_bars"), c.get("detail")))
+        except ValueError as e:
+            raise ValueError(f"strategies.{key}: {e}") from None
+    return out
+
+def _env(arrays):
+    env = {f: np.asarray(a, dtype=np.float64) for f, a in arrays.items()}
+    env["_memo"] = {}
+    return env
+
+# arrays: {"Open": (봉 × 종목) 행렬, ...} → {전략 키: (봉 × 종목) bool 마스크}. 공통 하위식은 한 번만 계산
+def masks(strategies, arrays):
+    env = _env(arrays)
+    out = {}
+    for s in strategies:
+        m = None
+        for c in s.conds:
+            r = _bool(np.broadcast_to(c(env), env["Close"].shape))
+            m = r if m is None else m & r
+        out[s.key] = m
+    return out
+
+def _finding(s):
+    return {"name": s.name, "trigger": True, "detail": s.detail}
+
+# 종목 하나(df)의 마지막 봉 판정 → findings 목록
+def frame_findings(df, strategies, window, trim=True):
+    view = df.iloc[-window:] if trim and len(df) > window else df
+    arrays = {f: view[f].to_numpy(dtype=np.float64)[:, None] for f in FIELDS.values()}
+    got = masks(strategies, arrays)
+    return [_finding(s) for s in strategies if len(df) >= s.need and got[s.key][-1, 0]]
+
+# 패널(이미 window 로 자른 것)의 마지막 봉 판정 → {ticker: findings}
+def panel_findings(P, strategies, lengths):
+    got = masks(strategies, {f: P[f].to_numpy() for f in FIELDS.values()})
+    out = {}
+    for s in strategies:
+        hit = got[s.key][-1] & (lengths >= s.need)
+        for j in np.flatnonzero(hit):
+            out.setdefault(P.tickers[j], []).append(_finding(s))
+    return out
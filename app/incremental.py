@@ -0,0 +1,493 @@
+import os
+import math
+import pickle
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from .indicators import sma, rma, bbands, ichimoku, dmi_dx, to_weekly, to_monthly
+from .timeframes import TIMEFRAMES, DAY, period_ends, resample
+from .signals import INDICATORS, enabled_signal_params, signal_windows, compile_plan
+from .metrics import METRICS
+
+# 종목별 지표 상태를 저장해 두고 새 봉만 반영(봉당 O(1)).
+# 처음(또는 과거 봉이 바뀌었을 때)은 indicators.py 의 배치 계산으로 상태를 채우고,
+# 이후 실행은 마지막 상태 이후 봉만 push 한다. 신호가 받는 꼬리 view 와 같은 모양으로
+# 꺼내 IndicatorCache 에 넣어 두면 신호는 지표를 다시 계산하지 않는다.
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+NAN = float("nan")
+
+# 최근 size 개 값만 보관하는 링버퍼
+class Ring:
+    def __init__(self, size):
+        self.buf = np.full(max(1, int(size)), np.nan)
+        self.pos = 0
+        self.count = 0
+
+    def push(self, x):
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % len(self.buf)
+        self.count += 1
+
+    def fill(self, values):
+        values = np.asarray(values, dtype=np.float64)[-len(self.buf):]
+        self.buf[:len(values)] = values
+        self.pos = len(values) % len(self.buf)
+        self.count = len(values)
+
+    # 최근 m 개(오래된 것부터)
+    def tail(self, m):
+        m = min(int(m), len(self.buf), self.count)
+        return self.buf[(self.pos - m + np.arange(m)) % len(self.buf)]
+
+# 최근 window 개의 최대(최소): 단조 deque, push 분할상환 O(1)
+class RollingExtreme:
+    def __init__(self, window, mode="max"):
+        self.window = int(window)
+        self.sign = 1.0 if mode == "max" else -1.0
+        self.q = deque()
+        self.i = 0
+
+    def push(self, x):
+        s = self.sign * x
+        while self.q and self.q[-1][1] <= s:
+            self.q.pop()
+        self.q.append((self.i, s))
+        if self.q[0][0] <= self.i - self.window:
+            self.q.popleft()
+        self.i += 1
+
+    @property
+    def value(self):
+        return self.sign * self.q[0][1] if self.i >= self.window else NAN
+
+# 최근 window 개의 합/제곱합(평균, 모표준편차). window 번마다 다시 합해 오차 누적을 막는다
+class RollingMean:
+    def __init__(self, window):
+        self.window = int(window)
+        self.q = deque()
+        self.s = 0.0
+        self.ss = 0.0
+        self.k = 0
+
+    def push(self, x):
+        self.q.append(x)
+        self.s += x; self.ss += x * x
+        if len(self.q) > self.window:
+            y = self.q.popleft()
+            self.s -= y; self.ss -= y * y
+        self.k += 1
+        if self.k % self.window == 0:
+            self.s = math.fsum(self.q); self.ss = math.fsum(v * v for v in self.q)
+
+    @property
+    def mean(self):
+        return self.s / self.window if len(self.q) == self.window else NAN
+
+    @property
+    def std(self):
+        if len(self.q) < self.window:
+            return NAN
+        m = self.s / self.window
+        return math.sqrt(max(self.ss / self.window - m * m, 0.0))
+
+# indicators.rma 와 같은 ewm(adjust=False): 첫 값에서 시작
+class Ewm:
+    def __init__(self, period):
+        self.alpha = 1.0 / period
+        self.value = None
+
+    def push(self, x):
+        self.value = x if self.value is None else (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+def _masked(a, k):
+    a = np.array(a, dtype=np.float64)
+    a[:max(0, k)] = np.nan
+    return a
+
+def _shift(a, d):
+    out = np.full(len(a), np.nan)
+    if d >= 0:
+        out[d:] = a[:len(a) - d]
+    else:
+        out[:d] = a[-d:]
+    return out
+
+# ---- 지표별 상태. seed(df): 배치 결과로 채움 / push(ts, o,h,l,c,v): 한 봉 반영 / value(view): 꼬리 view 기준 값 ----
+
+class SmaLine:
+    def __init__(self, params, keep):
+        self.field, self.w = params[0], int(params[1])
+        self.fi = FIELDS.index(self.field)
+        self.m = RollingMean(self.w)
+        self.ring = Ring(keep)
+
+    def seed(self, df):
+        for x in df[self.field].to_numpy(dtype=np.float64)[-self.w:]:
+            self.m.push(x)
+        self.ring.fill(sma(df[self.field], self.w).to_numpy())
+
+    def push(self, ts, o, h, l, c, v):
+        self.m.push((o, h, l, c, v)[self.fi])
+        self.ring.push(self.m.mean)
+
+    def value(self, view):
+        return pd.Series(_masked(self.ring.tail(len(view)), self.w - 1), index=view.index, name=self.field)
+
+class BBandsLine:
+    def __init__(self, params, keep):
+        self.w, self.k = int(params[0]), float(params[1])
+        self.m = RollingMean(self.w)
+        self.rings = [Ring(keep) for _ in range(3)]
+
+    def seed(self, df):
+        for x in df["Close"].to_numpy(dtype=np.float64)[-self.w:]:
+            self.m.push(x)
+        for r, s in zip(self.rings, bbands(df["Close"], window=self.w, k=self.k)):
+            r.fill(s.to_numpy())
+
+    def push(self, ts, o, h, l, c, v):
+        self.m.push(c)
+        mid, sd = self.m.mean, self.m.std
+        for r, x in zip(self.rings, (mid - self.k * sd, mid, mid + self.k * sd)):
+            r.push(x)
+
+    def value(self, view):
+        return tuple(pd.Series(_masked(r.tail(len(view)), self.w - 1), index=view.index, name="Close") for r in self.rings)
+
+class IchimokuLine:
+    NAMES = ("tenkan", "kijun", "span_a_now", "span_b_now")
+
+    def __init__(self, params, keep):
+        self.p = tuple(int(x) for x in params)
+        ws = sorted(set(self.p[:3]))
+        self.hi = {w: RollingExtreme(w, "max") for w in ws}
+        self.lo = {w: RollingExtreme(w, "min") for w in ws}
+        self.rings = {k: Ring(keep) for k in self.NAMES}
+
+    def seed(self, df):
+        for w in self.hi:
+            # 마지막 w 봉만 넣되 봉 번호는 전체 기준
+            self.hi[w].i = self.lo[w].i = len(df) - min(w, len(df))
+            for h, l in zip(df["High"].to_numpy()[-w:], df["Low"].to_numpy()[-w:]):
+                self.hi[w].push(h); self.lo[w].push(l)
+        ich = ichimoku(df, *self.p)
+        for k in self.NAMES:
+            self.rings[k].fill(ich[k].to_numpy())
+
+    def push(self, ts, o, h, l, c, v):
+        for w in self.hi:
+            self.hi[w].push(h); self.lo[w].push(l)
+        t, k, sb = ((self.hi[w].value + self.lo[w].value) / 2.0 for w in self.p[:3])
+        for name, x in zip(self.NAMES, (t, k, (t + k) / 2.0, sb)):
+            self.rings[name].push(x)
+
+    def value(self, view):
+        t, k, sb, d = self.p
+        m = len(view)
+        tk = _masked(self.rings["tenkan"].tail(m), t - 1)
+        kj = _masked(self.rings["kijun"].tail(m), k - 1)
+        sa = _masked(self.rings["span_a_now"].tail(m), max(t, k) - 1)
+        sbn = _masked(self.rings["span_b_now"].tail(m), sb - 1)
+        close = view["Close"].to_numpy(dtype=np.float64)
+        return pd.DataFrame({"tenkan": tk, "kijun": kj, "span_a_now": sa, "span_b_now": sbn,
+                             "span_a_fwd": _shift(sa, d), "span_b_fwd": _shift(sbn, d),
+                             "chikou": _shift(close, -d)}, index=view.index)
+
+class DmiLine:
+    def __init__(self, params, keep):
+        self.period = int(params[0])
+        self.tr, self.pdm, self.mdm = Ewm(self.period), Ewm(self.period), Ewm(self.period)
+        self.prev = None
+        self.rings = [Ring(keep) for _ in range(3)]
+
+    def seed(self, df):
+        h, l, c = (df[f].to_numpy(dtype=np.float64) for f in ("High", "Low", "Close"))
+        tr = np.fmax(np.fmax(h - l, np.abs(h - np.r_[np.nan, c[:-1]])), np.abs(l - np.r_[np.nan, c[:-1]]))
+        up = np.r_[np.nan, np.diff(h)]; down = np.r_[np.nan, -np.diff(l)]
+        with np.errstate(invalid="ignore"):
+            pdm = np.where((up > down) & (up > 0), up, 0.0)
+            mdm = np.where((down > up) & (down > 0), down, 0.0)
+        for e, x in ((self.tr, tr), (self.pdm, pdm), (self.mdm, mdm)):
+            e.value = float(rma(pd.Series(x), self.period).iloc[-1])
+        self.prev = (h[-1], l[-1], c[-1])
+        for r, s in zip(self.rings, dmi_dx(df, period=self.period)):
+            r.fill(s.to_numpy())
+
+    def push(self, ts, o, h, l, c, v):
+        if self.prev is None:
+            tr, pdm, mdm = h - l, 0.0, 0.0
+        else:
+            ph, pl, pc = self.prev
+            up, down = h - ph, pl - l
+            tr = max(h - l, abs(h - pc), abs(l - pc))
+            pdm = up if (up > down and up > 0) else 0.0
+            mdm = down if (down > up and down > 0) else 0.0
+        self.prev = (h, l, c)
+        tr, pdm, mdm = self.tr.push(tr), self.pdm.push(pdm), self.mdm.push(mdm)
+        pdi = 100 * pdm / tr if tr != 0 else NAN
+        mdi = 100 * mdm / tr if tr != 0 else NAN
+        s = pdi + mdi
+        dx = 100 * abs(pdi - mdi) / s if s != 0 else NAN
+        for r, x in zip(self.rings, (pdi, mdi, dx)):
+            r.push(x)
+
+    # ewm 은 시작점에 의존하므로 꼬리 view 에서 다시 계산한 값이 아니라 누적 히스토리 기준 값(전체 df 배치 결과와 같음).
+    # 상태 없이 view 에서 계산하는 신호 경로와는 view 앞쪽 워밍업 구간이 다르고, 신호가 읽는 마지막 봉들에서는
+    # 초기값 잔여((1-1/기간)^(기간×20) ≈ e^-20)만큼만 다르다(LOOKBACK 의 기간×20 워밍업, tests/test_states.py 에서 확인)
+    def value(self, view):
+        return tuple(pd.Series(r.tail(len(view)), index=view.index) for r in self.rings)
+
+# 주봉/월봉: 마감된 주기 링버퍼(행 = [주기 마지막 날(epoch 일), O,H,L,C,V]) + 진행 중인 주기(open).
+# 새 일봉은 진행 중인 주기만 갱신한다. 라벨은 resample(W-<요일>/월말)과 같은 주기 마지막 날
+class PeriodLine:
+    def __init__(self, rule, keep_periods):
+        self.rule = rule
+        self.buf = np.full((max(2, int(keep_periods)), 6), np.nan)
+        self.pos = 0
+        self.count = 0
+        self.open = None
+
+    def _end(self, ts):
+        return int(period_ends([pd.Timestamp(ts).normalize().value // DAY], self.rule)[0])
+
+    def _close_period(self, row):
+        self.buf[self.pos] = row
+        self.pos = (self.pos + 1) % len(self.buf)
+        self.count += 1
+
+    def _periods(self):
+        m = min(self.count, len(self.buf))
+        return self.buf[(self.pos - m + np.arange(m)) % len(self.buf)]
+
+    def seed(self, df):
+        w = resample(df, self.rule)
+        rows = np.column_stack([w.index.as_unit("ns").asi8 // DAY, w[FIELDS].to_numpy(dtype=np.float64)])
+        for r in rows[:-1][-len(self.buf):]:
+            self._close_period(r)
+        self.open = [float(x) for x in rows[-1]] if len(rows) else None
+
+    def push(self, ts, o, h, l, c, v):
+        end = self._end(ts)
+        w = self.open
+        if w is not None and w[0] == end:
+            w[2] = max(w[2], h); w[3] = min(w[3], l); w[4] = c; w[5] += v
+            return
+        if w is not None:
+            self._close_period(w)
+        self.open = [float(end), o, h, l, c, v]
+
+    # resample(view) 와 같은 행: 잘린 첫 주기는 view 에서 직접 집계, 나머지는 상태에서
+    def value(self, view):
+        if self.open is None or not len(view):
+            return None
+        first_end = self._end(view.index[0])
+        if self.open[0] == first_end:
+            return resample(view, self.rule)
+        periods = self._periods()
+        if not len(periods) or periods[0, 0] > period_ends([first_end + 1], self.rule)[0]:
+            return None
+        head = view.loc[view.index < pd.Timestamp((first_end + 1) * DAY)]
+        first = [first_end, head["Open"].iloc[0], head["High"].max(), head["Low"].min(),
+                 head["Close"].iloc[-1], head["Volume"].sum()]
+        rows = np.vstack([first, periods[periods[:, 0] > first_end], self.open])
+        idx = pd.DatetimeIndex(rows[:, 0].astype(np.int64) * DAY)
+        return pd.DataFrame(rows[:, 1:], columns=FIELDS, index=idx)
+
+class WeeklyLine(PeriodLine):
+    def __init__(self, params, keep_weeks):
+        super().__init__(TIMEFRAMES["weekly"](params), keep_weeks)
+
+class MonthlyLine(PeriodLine):
+    def __init__(self, params, keep_months):
+        super().__init__(TIMEFRAMES["monthly"](params), keep_months)
+
+LINES = {"sma": SmaLine, "bbands": BBandsLine, "ichimoku": IchimokuLine, "dmi_dx": DmiLine, "weekly": WeeklyLine, "monthly": MonthlyLine}
+
+# 검증용 배치 계산(indicators.py)
+BATCH = {
+    "sma": lambda df, p: sma(df[p[0]], int(p[1])),
+    "bbands": lambda df, p: bbands(df["Close"], window=int(p[0]), k=float(p[1])),
+    "ichimoku": lambda df, p: ichimoku(df, *p),
+    "dmi_dx": lambda df, p: dmi_dx(df, period=int(p[0])),
+    "weekly": lambda df, p: to_weekly(df, week_ending=str(p[0])),
+    "monthly": lambda df, p: to_monthly(df),
+}
+
+# 설정(활성 신호)에서 유지할 지표 목록과 링 길이. names 로 지표 종류 제한(평가 엔진이 꺼내 쓰는 것만)
+def state_spec(cfg, names=None):
+    params = enabled_signal_params(cfg)
+    windows = signal_windows(cfg, params)
+    spec = set()
+    keep, keep_weeks = 2, 2
+    for key, kw in params:
+        lines = [ln for ln in INDICATORS[key](kw) if names is None or ln[0] in names]
+        if not lines:
+            continue
+        spec.update(lines)
+        if any(name in TIMEFRAMES for name, _ in lines):
+            keep_weeks = max(keep_weeks, windows[key][1] // 5 + 10)
+        else:
+            keep = max(keep, windows[key][1])
+    return frozenset(spec), keep, keep_weeks
+
+# 상태 파일 형식. 줄 클래스 구조가 바뀌면 올려서 이전 파일을 다시 채우게 한다
+STATE_VERSION = 2
+
+class IndicatorState:
+    def __init__(self, spec, keep, keep_weeks):
+        self.version = STATE_VERSION
+        self.spec = (spec, keep, keep_weeks)
+        self.lines = {s: LINES[s[0]](s[1], keep_weeks if s[0] in TIMEFRAMES else keep) for s in spec}
+        self.keep = keep
+        self.last = None
+        self.n = 0
+
+    @classmethod
+    def from_frame(cls, df, spec, keep, keep_weeks):
+        st = cls(spec, keep, keep_weeks)
+        if df is not None and not df.empty:
+            for line in st.lines.values():
+                line.seed(df)
+            st.n = len(df)
+            st.last = (df.index[-1], df[FIELDS].iloc[-1].to_numpy(dtype=np.float64))
+        return st
+
+    def update(self, ts, o, h, l, c, v):
+        for line in self.lines.values():
+            line.push(ts, o, h, l, c, v)
+        self.last = (ts, np.array([o, h, l, c, v], dtype=np.float64))
+        self.n += 1
+
+    # 마지막 상태 이후 봉만 반영. 마지막 반영 봉이 없거나 값이 바뀌었으면 False(재구축 필요)
+    def advance(self, df):
+        if self.last is None:
+            return False
+        ts, row = self.last
+        pos = df.index.searchsorted(ts)
+        if pos >= len(df) or df.index[pos] != ts:
+            return False
+        if not np.allclose(df[FIELDS].iloc[pos].to_numpy(dtype=np.float64), row, rtol=1e-9, atol=0.0):
+            return False
+        new = df.iloc[pos + 1:]
+        for ts, r in zip(new.index, new[FIELDS].to_numpy(dtype=np.float64)):
+            self.update(ts, *r)
+        METRICS.count("state.bars", len(new))
+        return True
+
+    # view(같은 종목 df 의 꼬리) 기준 지표 값. 상태로 만들 수 없으면 None
+    def value(self, name, params, view):
+        line = self.lines.get((name, params))
+        if line is None or self.last is None or not len(view) or view.index[-1] != self.last[0]:
+            return None
+        if name not in TIMEFRAMES and len(view) > min(self.keep, self.n):
+            return None
+        return line.value(view)
+
+def _max_rel_err(a, b):
+    if a is None or b is None:
+        return np.inf
+    if isinstance(a, tuple):
+        return max(_max_rel_err(x, y) for x, y in zip(a, b))
+    if isinstance(a, pd.DataFrame):
+        if len(a) != len(b) or not a.index.equals(b.index):
+            return np.inf
+        return max(_max_rel_err(a[c], b[c]) for c in b.columns)
+    x, y = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if x.shape != y.shape or not np.array_equal(np.isnan(x), np.isnan(y)):
+        return np.inf
+    ok = ~np.isnan(x)
+    if not ok.any():
+        return 0.0
+    return float(np.max(np.abs(x[ok] - y[ok]) / np.maximum(np.abs(y[ok]), 1e-9)))
+
+# 검증: df[:split] 로 상태를 채운 뒤 나머지를 한 봉씩 반영해 배치 결과와 비교. {지표: 최대 상대오차}
+# dmi_dx 는 전체 df 배치 결과의 꼬리와, 나머지는 view 에서 다시 계산한 배치 결과와 비교한다
+def verify_frame(df, spec, keep, keep_weeks, split=None, view_len=None):
+    split = len(df) // 2 if split is None else split
+    st = IndicatorState.from_frame(df.iloc[:split], spec, keep, keep_weeks)
+    for ts, r in zip(df.index[split:], df[FIELDS].iloc[split:].to_numpy(dtype=np.float64)):
+        st.update(ts, *r)
+    out = {}
+    for name, params in sorted(spec, key=str):
+        m = min(len(df), view_len or (keep_weeks * 5 - 50 if name in TIMEFRAMES else keep))
+        view = df.iloc[-m:]
+        if name == "dmi_dx":
+            ref = tuple(s.iloc[-m:] for s in BATCH[name](df, params))
+        else:
+            ref = BATCH[name](view, params)
+        out[f"{name}{params}"] = _max_rel_err(st.value(name, params, view), ref)
+    return out
+
+# 종목별 상태 파일: <root>/<interval>/<ticker>.pkl
+class StateStore:
+    def __init__(self, root, interval, cfg, verify=False, names=None):
+        self.dir = os.path.join(root, interval)
+        os.makedirs(self.dir, exist_ok=True)
+        self.spec, self.keep, self.keep_weeks = state_spec(cfg, names)
+        self.verify = verify
+
+    def _path(self, ticker):
+        return os.path.join(self.dir, f"{ticker}.pkl")
+
+    def load(self, ticker):
+        try:
+            with open(self._path(ticker), "rb") as f:
+                st = pickle.load(f)
+            if getattr(st, "version", 1) != STATE_VERSION:
+                return None
+            return st if st.spec == (self.spec, self.keep, self.keep_weeks) else None
+        except Exception:
+            return None
+
+    def save(self, ticker, st):
+        tmp = self._path(ticker) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(st, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(ticker))
+
+    # 저장 상태를 df 끝까지 진행(불가하면 df 로 재구축)하고 저장. 새 봉이 없으면 파일을 다시 쓰지 않는다
+    def sync(self, ticker, df):
+        st = self.load(ticker)
+        n = st.n if st is not None else None
+        if st is None or not st.advance(df):
+            st = IndicatorState.from_frame(df, self.spec, self.keep, self.keep_weeks)
+            METRICS.count("state.rebuild")
+        elif st.n == n:
+            METRICS.count("state.unchanged")
+            return st
+        self.save(ticker, st)
+        return st
+
+    def seed(self, cache, ticker, df, cfg, params=None, names=None, plan=None):
+        if df is None or df.empty:
+            return
+        seed_cache(cache, ticker, self.sync(ticker, df), df, cfg, params=params, names=names, verify=self.verify, plan=plan)
+
+# 신호가 받을 꼬리 view 마다 상태의 지표 값을 cache 에 넣는다. names 로 지표 종류 제한 가능
+# 여러 신호가 같은 view 에서 쓰는 지표는 plan.nodes 에서 한 번만 넣는다
+def seed_cache(cache, ticker, st, df, cfg, params=None, names=None, verify=False, plan=None):
+    if plan is None:
+        plan = compile_plan(cfg, params)
+    for name, p, need, window in plan.nodes:
+        if len(df) < need:
+            continue
+        if names is not None and name not in names:
+            continue
+        view = df.iloc[-window:] if len(df) > window else df
+        val = st.value(name, p, view)
+        if val is None:
+            continue
+        if verify:
+            # dmi_dx 는 상태가 유지하는 전체 히스토리 기준 값과 비교(DmiLine.value 참고)
+            ref = BATCH[name](df, p) if name == "dmi_dx" else BATCH[name](view, p)
+            if name == "dmi_dx":
+                ref = tuple(s.iloc[-len(view):] for s in ref)
+            err = _max_rel_err(val, ref)
+            if err > 1e-7:
+                METRICS.count("state.mismatch")
+                print(f"[state] {ticker} {name}{p} mismatch {err:.2e}")
+                continue
+        cache.put(ticker, view, name, p, val)
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from .timeframes import resample
+
 def sma(series, window):
     return series.rolling(window, min_periods=window).mean()
 
@@ -14,8 +16,8 @@ def bbands(series, window=20, k=2.0):
     lower = mid - k * std
     return lower, mid, upper
 
-def ichimoku(df, tenkan=9, kijun=26, senkou_b=52, displacement=26):
-    high = df["High"]; low = df["Low"]; close = df["Close"]
+# Series/와이드 DataFrame(봉 × 종목) 모두 지원
+def ichimoku_lines(high, low, close, tenkan=9, kijun=26, senkou_b=52, displacement=26):
     conv = (high.rolling(tenkan, min_periods=tenkan).max() + low.rolling(tenkan, min_periods=tenkan).min()) / 2.0
     base = (high.rolling(kijun, min_periods=kijun).max() + low.rolling(kijun, min_periods=kijun).min()) / 2.0
     span_a_now = (conv + base) / 2.0
@@ -23,22 +25,27 @@ def ichimoku(df, tenkan=9, kijun=26, senkou_b=52, displacement=26):
     span_a_fwd = span_a_now.shift(displacement)
     span_b_fwd = span_b_now.shift(displacement)
     chikou = close.shift(-displacement)
-    return pd.DataFrame({
+    return {
         "tenkan": conv, "kijun": base,
         "span_a_now": span_a_now, "span_b_now": span_b_now,
         "span_a_fwd": span_a_fwd, "span_b_fwd": span_b_fwd,
         "chikou": chikou
-    }, index=df.index)
+    }
+
+def ichimoku(df, tenkan=9, kijun=26, senkou_b=52, displacement=26):
+    lines = ichimoku_lines(df["High"], df["Low"], df["Close"], tenkan, kijun, senkou_b, displacement)
+    return pd.DataFrame(lines, index=df.index)
 
 def dmi_dx(df, period=14):
     high, low, close = df["High"], df["Low"], df["Close"]
     up = high.diff(); down = -low.diff()
-    plus_dm = pd.Series(np.where((up > down) & (up > 0), up, 0.0), index=df.index)
-    minus_dm = pd.Series(np.where((down > up) & (down > 0), down, 0.0), index=df.index)
+    plus_dm = up.where((up > down) & (up > 0), 0.0)
+    minus_dm = down.where((down > up) & (down > 0), 0.0)
     tr1 = high - low
     tr2 = (high - close.shift(1)).abs()
     tr3 = (low - close.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    # NaN 무시 최대값(와이드 DataFrame에서도 동작)
+    tr = np.fmax(np.fmax(tr1, tr2), tr3)
     tr_r = rma(tr, period)
     p_r = rma(plus_dm, period)
     m_r = rma(minus_dm, period)
@@ -47,13 +54,61 @@ def dmi_dx(df, period=14):
     dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0, np.nan)
     return plus_di, minus_di, dx
 
+# 주봉/월봉 집계는 app.timeframes(경계별 reduceat, 필드별 resample 대신)
 def to_weekly(df, week_ending="FRI"):
-    rule = f"W-{week_ending.upper()}"
-    w = {
-        "Open": df["Open"].resample(rule).first(),
-        "High": df["High"].resample(rule).max(),
-        "Low": df["Low"].resample(rule).min(),
-        "Close": df["Close"].resample(rule).last(),
-        "Volume": df["Volume"].resample(rule).sum(),
-    }
-    return pd.DataFrame(w).dropna()
+    return resample(df, f"W-{week_ending.upper()}")
+
+def to_monthly(df):
+    return resample(df, "M")
+
+# 종목별 지표 메모이제이션: (ticker, 지표명, 파라미터) → 결과.
+# 같은 실행 안에서 신호/차트가 같은 지표를 한 번만 계산하도록 공유하고,
+# 종목의 평가·차트가 끝나면 evict 로 비운다. 마지막 봉이 바뀌면 자동 무효화.
+# 신호마다 길이가 다른 꼬리 view 를 받으므로 길이도 키에 넣는다.
+class IndicatorCache:
+    def __init__(self):
+        self._data = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ticker, df, name, params, compute):
+        stamp = df.index[-1] if len(df) else None
+        ent = self._data.get(ticker)
+        if ent is None or ent[0] != stamp:
+            ent = (stamp, {})
+            self._data[ticker] = ent
+        key = (name, params, len(df))
+        if key in ent[1]:
+            self.hits += 1
+            return ent[1][key]
+        self.misses += 1
+        val = compute()
+        ent[1][key] = val
+        return val
+
+    def has(self, ticker, df, name, params):
+        ent = self._data.get(ticker)
+        stamp = df.index[-1] if len(df) else None
+        return ent is not None and ent[0] == stamp and (name, params, len(df)) in ent[1]
+
+    # 미리 계산된 값(증분 상태 등)을 넣어 둠
+    def put(self, ticker, df, name, params, val):
+        stamp = df.index[-1] if len(df) else None
+        ent = self._data.get(ticker)
+        if ent is None or ent[0] != stamp:
+            ent = (stamp, {})
+            self._data[ticker] = ent
+        ent[1][(name, params, len(df))] = val
+
+    def evict(self, ticker):
+        self._data.pop(ticker, None)
+
+    def clear(self):
+        self._data.clear()
+
+CACHE = IndicatorCache()
+
+def cached(cache, ticker, df, name, params, compute):
+    if cache is None or ticker is None:
+        return compute()
+    return cache.get(ticker, df, name, params, compute)
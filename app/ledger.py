@@ -0,0 +1,95 @@
+import io
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+from .metrics import METRICS
+
+# 알림 원장(SQLite). 보낸 알림을 (종목, 신호, 트리거 봉 날짜)로 기록해
+#  - 같은 봉의 같은 신호는 다시 보내지 않고(08:00/16:00 실행이 같은 봉을 보는 경우)
+#  - 같은 종목/신호가 cooldown_days(트리거 봉 날짜 기준 달력일) 안에 다시 뜨면 억제한다(연속 발생).
+# 억제는 차트를 그리기 전에 한다. 기록은 전송 뒤에 하므로 실패한 알림은 다음 실행에서 다시 나간다.
+# 렌더한 차트는 (종목, 봉 날짜, 작업 해시)로 chart_days 동안 보관해 그런 재전송에 다시 쓴다.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    ticker TEXT NOT NULL, signal TEXT NOT NULL, bar_date TEXT NOT NULL, sent_at REAL NOT NULL,
+    PRIMARY KEY (ticker, signal, bar_date));
+CREATE TABLE IF NOT EXISTS charts (
+    ticker TEXT NOT NULL, bar_date TEXT NOT NULL, job TEXT NOT NULL, fmt TEXT NOT NULL, img BLOB NOT NULL,
+    created REAL NOT NULL, PRIMARY KEY (ticker, bar_date, job));
+"""
+
+def bar_date(df):
+    return pd.Timestamp(df.index[-1]).strftime("%Y-%m-%d")
+
+# 차트 작업(chart.chart_job) + 렌더 옵션의 해시. 데이터/제목/저항선이 같으면 같은 이미지
+def job_key(job, dpi, fmt):
+    h = hashlib.sha1(f"{job['title']}|{job.get('resistance')}|{int(dpi)}|{fmt}".encode())
+    h.update(np.ascontiguousarray(job["dates"]).tobytes())
+    h.update(np.ascontiguousarray(job["ohlcv"]).tobytes())
+    for k, v in sorted((job.get("ich") or {}).items()):
+        h.update(k.encode())
+        h.update(np.ascontiguousarray(v).tobytes())
+    return h.hexdigest()
+
+class AlertLedger:
+    def __init__(self, path, cooldown_days=0, chart_days=3, keep_days=120):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.cooldown = max(0, int(cooldown_days))
+        self.suppressed = 0
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute("DELETE FROM charts WHERE created < ?", (now - float(chart_days) * 86400,))
+            self.db.execute("DELETE FROM alerts WHERE sent_at < ?", (now - max(float(keep_days), self.cooldown + 7) * 86400,))
+
+    # 아직 보내지 않은(쿨다운 밖) findings 만 남긴다
+    def fresh(self, ticker, date, findings):
+        since = (pd.Timestamp(date) - timedelta(days=self.cooldown)).strftime("%Y-%m-%d")
+        out = []
+        with self.lock:
+            for f in findings:
+                row = self.db.execute("SELECT 1 FROM alerts WHERE ticker = ? AND signal = ? AND bar_date >= ? LIMIT 1",
+                                      (ticker, f["name"], since)).fetchone()
+                if row is None:
+                    out.append(f)
+        if len(out) < len(findings):
+            self.suppressed += len(findings) - len(out)
+            METRICS.count("ledger.suppressed", len(findings) - len(out))
+        return out
+
+    def record(self, ticker, date, findings):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?)",
+                                [(ticker, f["name"], date, now) for f in findings])
+
+    def chart(self, ticker, date, key):
+        with self.lock:
+            row = self.db.execute("SELECT img, fmt FROM charts WHERE ticker = ? AND bar_date = ? AND job = ?",
+                                  (ticker, date, key)).fetchone()
+        if row is None:
+            return None
+        METRICS.count("ledger.chart_hit")
+        buf = io.BytesIO(row[0])
+        buf.name = f"chart.{row[1]}"
+        return buf
+
+    def put_chart(self, ticker, date, key, img, fmt):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO charts VALUES (?, ?, ?, ?, ?, ?)",
+                            (ticker, date, key, str(fmt), sqlite3.Binary(img.getvalue()), time.time()))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,7 +1,10 @@
 import os, yaml
-from .scan import scan_and_collect, notify_results
-from .telegram_client import send_telegram_message, send_telegram_photo
 from .universe import load_universe_and_names
+from .metrics import METRICS, write_report, profiled
+from .sharding import load_costs, save_costs, costs_digest, cost_shards, modulo_shards
+from .providers import open_provider, use, flush
+
+# 스캔/전송 모듈(pandas, 지표, requests)은 run 에서 불러온다. load_config 만 쓰는 실행(app.universe 등)은 가볍게 시작
 
 def load_config(path="config.yaml"):
     with open(path, "r", encoding="utf-8") as f:
@@ -15,27 +18,88 @@ def load_config(path="config.yaml"):
         return cfg[section]
     ensure_dict("telegram", {"bot_token": "", "chat_id": ""})
     ensure_dict("universe", {"source": "krx_all", "include_markets": ["KOSPI","KOSDAQ"], "exclude_markets": ["KONEX"]})
-    ensure_dict("scan", {"interval": "1d", "lookback_days": 2200, "send_chart": True, "max_alerts_per_run": 200})
+    ensure_dict("scan", {"interval": "1d", "lookback_days": "auto", "send_chart": True, "max_alerts_per_run": 200})
     ensure_dict("signals", {})
+    ensure_dict("strategies", {})
+    ensure_dict("provider", {"mode": "live"})
+    use(open_provider(cfg))
     return cfg
 
-def shard_list(lst, shard_index, tot_shards):
+# costs(sharding.load_costs 결과)를 주면 비용 균형 분배, 아니면 i % N
+def shard_list(lst, shard_index, tot_shards, costs=None):
     if tot_shards <= 1: return lst
-    return [x for i, x in enumerate(lst) if i % tot_shards == shard_index]
+    if costs is not None:
+        return cost_shards(lst, costs["costs"], tot_shards, prev=costs["assign"])[shard_index]
+    return modulo_shards(lst, tot_shards)[shard_index]
 
-def main():
-    cfg_path = os.environ.get("APP_CONFIG","config.yaml")
-    cfg = load_config(cfg_path)
+# merge: {"path", "shard", "tot", "digest"} 이면 알림 대신 샤드 결과 파일을 쓴다(app.merge 가 한 번에 전송)
+def run(cfg, shard_tickers, shard_info, name_map, merge=None):
+    from .scan import scan_and_collect, notify_results, telegram_credentials, StreamingNotifier
+    from .telegram_client import send_telegram_message, send_telegram_photo, TelegramDelivery
+    from .merge import write_shard
+    tele_cfg = cfg["telegram"]
+    if merge:
+        results, stats = scan_and_collect(shard_tickers, cfg)
+        names = {t: name_map.get(t) or name_map.get(t.split(".")[0]) for t, _, _ in results} if name_map else {}
+        write_shard(merge["path"], merge["shard"], merge["tot"], results, stats,
+                    names={t: n for t, n in names.items() if n}, digest=merge["digest"], tickers=shard_tickers)
+        print(f"[shard] {len(results)}건 → {merge['path']}")
+        return stats
 
-    tickers, name_map = load_universe_and_names(cfg)
+    if str(tele_cfg.get("delivery", "direct")).lower() == "queue":
+        # 스캔과 동시에 전송(커넥션 재사용, 최대 10장씩 앨범, 429 대기)
+        token, chat_id = telegram_credentials(cfg)
+        delivery = TelegramDelivery(token, chat_id,
+                                    min_interval=float(tele_cfg.get("min_interval", 1.0)),
+                                    group_size=int(tele_cfg.get("media_group_size", 10)))
+        notifier = StreamingNotifier(cfg, delivery, name_map=name_map)
+        results, stats = scan_and_collect(shard_tickers, cfg, on_match=notifier)
+        notifier.finish(stats, shard_info)
+        return stats
+
+    results, stats = scan_and_collect(shard_tickers, cfg)
+    notify_results(results, stats, cfg, send_telegram_message, send_telegram_photo, shard_info=shard_info, name_map=name_map)
+    return stats
 
+# 샤드 선택 → run → 비용/리포트 기록. 상주 모드(app.daemon)도 요청마다 이것을 부른다
+def run_scheduled(cfg, tickers, name_map):
     tot_shards = int(os.getenv("TOT_SHARDS","1"))
     shard_index = int(os.getenv("SHARD_INDEX","0"))
-    shard_tickers = shard_list(tickers, shard_index, tot_shards)
+    scan_cfg = cfg["scan"]
+    # scan.sharding "cost": 이전 실행 비용으로 균형 분배(모든 샤드가 같은 cost_path 파일을 봐야 함)
+    cost_path = scan_cfg.get("cost_path")
+    costs = load_costs(str(cost_path)) if cost_path else None
+    balanced = str(scan_cfg.get("sharding", "modulo")).lower() == "cost" and costs is not None
+    shard_tickers = shard_list(tickers, shard_index, tot_shards, costs=costs if balanced else None)
     shard_info = f"(shard {shard_index+1}/{tot_shards}, {len(shard_tickers)}종목)"
+    digest = costs_digest(costs) if balanced else None
+    merge = None
+    if tot_shards > 1 and scan_cfg.get("merge_shards", False):
+        merge = {"path": os.path.join(str(scan_cfg.get("shard_dir") or "data/shards"), f"shard_{shard_index}.pkl"),
+                 "shard": shard_index, "tot": tot_shards, "digest": digest}
 
-    results, stats = scan_and_collect(shard_tickers, cfg)
-    notify_results(results, stats, cfg, send_telegram_message, send_telegram_photo, shard_info=shard_info, name_map=name_map)
+    # 실행 리포트(단계/신호/네트워크 시간 p50/p95/max)와 프로파일(SCAN_PROFILE=cprofile|sample)
+    report_dir = str(cfg["scan"].get("report_dir") or "data/reports")
+    report = os.environ.get("RUN_REPORT") or os.path.join(report_dir, f"scan_{shard_index}.json")
+    stats = None
+    try:
+        stats = profiled(lambda: run(cfg, shard_tickers, shard_info, name_map, merge=merge),
+                         os.getenv("SCAN_PROFILE"), os.path.splitext(report)[0])
+        # 단일 실행이면 여기서 비용을 누적(샤드 실행은 app.merge 가 모아서 갱신)
+        if cost_path and tot_shards <= 1 and stats:
+            save_costs(str(cost_path), stats.get("costs") or {})
+    finally:
+        flush()
+        write_report(report, shard=shard_info, tickers=len(shard_tickers), costs_digest=digest,
+                     stats={k: v for k, v in (stats or {}).items() if k != "costs"} if stats else None)
+        print(f"[report] {report} {METRICS.compact()}")
+    return stats
+
+def main():
+    cfg_path = os.environ.get("APP_CONFIG","config.yaml")
+    cfg = load_config(cfg_path)
+    tickers, name_map = load_universe_and_names(cfg)
+    run_scheduled(cfg, tickers, name_map)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,69 @@
+import os
+import json
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from .universe import krx_snapshot, market_caps_from
+from .metrics import METRICS
+
+def _kst_today():
+    return datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d")
+
+# KRX 상장목록(유니버스 스냅샷)의 Marcap 열로 전 종목 시가총액을 한 번에 적재
+def load_krx_market_caps(cfg=None):
+    return market_caps_from(krx_snapshot(cfg))
+
+# 시가총액 조회: 일괄 적재값(당일 디스크 캐시) → 없으면 종목별 fallback(야후) 후 메모
+class MarketCapProvider:
+    def __init__(self, cache_dir=None, fallback=None, loader=load_krx_market_caps):
+        self.cache_dir = cache_dir
+        self.fallback = fallback
+        self.loader = loader
+        self.caps = None
+        self.misses = 0
+        # 종목별 fallback 조회 시간(샤드 비용 산정용)
+        self.spent = {}
+
+    def _path(self):
+        return os.path.join(self.cache_dir, f"marcap_{_kst_today()}.json") if self.cache_dir else None
+
+    def load(self):
+        if self.caps is not None:
+            return self.caps
+        path = self._path()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.caps = json.load(f)
+                return self.caps
+            except Exception:
+                pass
+        try:
+            with METRICS.timer("net.krx_listing"):
+                self.caps = self.loader() or {}
+        except Exception as e:
+            print(f"[marketcap] bulk load failed: {e}")
+            self.caps = {}
+        if path and self.caps:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.caps, f)
+            os.replace(tmp, path)
+        return self.caps
+
+    def get(self, ticker):
+        caps = self.load()
+        code = str(ticker).split(".")[0]
+        mc = caps.get(code)
+        if mc is None and self.fallback:
+            self.misses += 1
+            t0 = time.monotonic()
+            mc = self.fallback(ticker)
+            self.spent[ticker] = time.monotonic() - t0
+            # 실패(None)도 메모해 같은 실행에서 재조회하지 않음
+            caps[code] = mc
+        return mc
+
+    __call__ = get
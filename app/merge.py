@@ -0,0 +1,137 @@
+import os
+import sys
+import glob
+import pickle
+
+from .signals import SIGNAL_ORDER, SIGNAL_NAMES
+from .metrics import METRICS, write_report
+from .sharding import save_costs
+
+# 샤드 결과 병합. 샤드는 알림 대신 <shard_dir>/shard_<i>.pkl 에 결과/통계를 남기고
+# python -m app.merge [shard_dir] 가 모두 모아 한 번에 순위를 매겨 전송한다(헤더/완료 메시지 1회).
+
+def write_shard(path, shard_index, tot_shards, results, stats, names=None, digest=None, tickers=()):
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    out = {"shard": shard_index, "tot": tot_shards, "results": results, "stats": stats, "names": names or {},
+           "digest": digest, "tickers": list(tickers), "metrics": METRICS.summary(), "compact": METRICS.compact()}
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(out, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+def load_shards(shard_dir):
+    out = []
+    for path in sorted(glob.glob(os.path.join(shard_dir, "**", "shard_*.pkl"), recursive=True)):
+        try:
+            with open(path, "rb") as f:
+                out.append(pickle.load(f))
+        except Exception as e:
+            print(f"[merge] skip {path}: {e}")
+    return sorted(out, key=lambda s: s["shard"])
+
+_RANK = {SIGNAL_NAMES[k]: i for i, k in enumerate(SIGNAL_ORDER)}
+
+# 순위: 동시에 걸린 신호 수 ↓, 가장 앞선 신호(SIGNAL_ORDER) ↑, 거래대금 ↓
+def rank_results(results):
+    def key(r):
+        t, bars, findings = r
+        first = min(_RANK.get(f["name"], len(_RANK)) for f in findings)
+        value = float(bars["Close"][-1]) * float(bars["Volume"][-1]) if len(bars) else 0.0
+        return (-len(findings), first, -value, t)
+    return sorted(results, key=key)
+
+def merge_stats(shards):
+    stats = {"total": 0, "ok": 0, "empty": 0, "matched": 0, "errors": 0, "per_signal": {}, "conditions": {}, "costs": {}, "shards": []}
+    pre = None
+    for s in shards:
+        st = s["stats"] or {}
+        for k in ("total", "ok", "empty", "matched", "errors"):
+            stats[k] += int(st.get(k, 0))
+        for name, n in (st.get("per_signal") or {}).items():
+            stats["per_signal"][name] = stats["per_signal"].get(name, 0) + n
+        for key, rows in (st.get("conditions") or {}).items():
+            merged = stats["conditions"].setdefault(key, {})
+            for name, row in rows.items():
+                m = merged.setdefault(name, {"evaluated": 0, "passed": 0})
+                m["evaluated"] += row["evaluated"]
+                m["passed"] += row["passed"]
+        stats["costs"].update(st.get("costs") or {})
+        if st.get("prescreen"):
+            pre = pre or {"total": 0, "passed": 0}
+            pre["total"] += st["prescreen"]["total"]
+            pre["passed"] += st["prescreen"]["passed"]
+        stats["shards"].append({"shard": s["shard"], "tickers": len(s["tickers"]), "matched": int(st.get("matched", 0)),
+                                "wall_s": s["metrics"]["wall_s"], "cost_s": round(sum((st.get("costs") or {}).values()), 1)})
+    if pre:
+        stats["prescreen"] = pre
+    for rows in stats["conditions"].values():
+        for row in rows.values():
+            row["rate"] = round(row["passed"] / row["evaluated"], 4) if row["evaluated"] else 0.0
+    return stats
+
+# 완료 메시지: 샤드별 소요시간(가장 느린 샤드가 전체 시간을 정한다)
+def shards_line(stats):
+    walls = [s["wall_s"] for s in stats["shards"]]
+    if not walls:
+        return ""
+    line = f"⏱ 샤드 {len(walls)}개 최대 {max(walls):.0f}s · 평균 {sum(walls) / len(walls):.0f}s"
+    pre = stats.get("prescreen")
+    if pre and pre["total"]:
+        line += f" 선별 {pre['passed']}/{pre['total']}"
+    return line
+
+def main():
+    from .main import load_config
+    from .providers import flush
+    from .scan import notify_results, telegram_credentials, StreamingNotifier
+    from .telegram_client import send_telegram_message, send_telegram_photo, TelegramDelivery
+
+    cfg = load_config(os.environ.get("APP_CONFIG", "config.yaml"))
+    scan_cfg = cfg["scan"]
+    shard_dir = sys.argv[1] if len(sys.argv) > 1 else str(scan_cfg.get("shard_dir") or "data/shards")
+    shards = load_shards(shard_dir)
+    if not shards:
+        sys.exit(f"[merge] {shard_dir} 에 샤드 결과가 없습니다")
+    tot = shards[0]["tot"]
+    if len(shards) != tot:
+        print(f"[merge] 샤드 {len(shards)}/{tot}개만 있음: {[s['shard'] for s in shards]}")
+    if len({s["digest"] for s in shards}) > 1:
+        print(f"[merge] 샤드별 비용 파일이 다릅니다(분배 불일치 가능): {[s['digest'] for s in shards]}")
+
+    results = rank_results([r for s in shards for r in s["results"]])
+    stats = merge_stats(shards)
+    names = {}
+    for s in shards:
+        names.update(s["names"])
+    shard_info = f"(샤드 {len(shards)}/{tot} 병합, {sum(len(s['tickers']) for s in shards)}종목)"
+    footer = shards_line(stats)
+
+    try:
+        if str(cfg["telegram"].get("delivery", "direct")).lower() == "queue":
+            tele_cfg = cfg["telegram"]
+            token, chat_id = telegram_credentials(cfg)
+            delivery = TelegramDelivery(token, chat_id, min_interval=float(tele_cfg.get("min_interval", 1.0)),
+                                        group_size=int(tele_cfg.get("media_group_size", 10)))
+            notifier = StreamingNotifier(cfg, delivery, name_map=names)
+            for t, bars, findings in results:
+                notifier(t, bars.frame(), findings)
+            notifier.finish(stats, shard_info, footer=footer)
+        else:
+            notify_results(results, stats, cfg, send_telegram_message, send_telegram_photo,
+                           shard_info=shard_info, name_map=names, footer=footer)
+    finally:
+        flush()
+        cost_path = scan_cfg.get("cost_path")
+        if cost_path:
+            assign = {t: s["shard"] for s in shards for t in s["tickers"]}
+            save_costs(str(cost_path), stats["costs"], assign=assign if len(shards) == tot else None)
+        report_dir = str(scan_cfg.get("report_dir") or "data/reports")
+        path = write_report(os.path.join(report_dir, "scan_merged.json"), shard=shard_info,
+                            stats={k: v for k, v in stats.items() if k != "costs"})
+        print(f"[merge] {len(results)}건 {footer} → {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+
+# 단계/신호/네트워크 호출별 소요시간(monotonic)과 카운터. 스레드(수집/전송)에서도 기록
+#   stage.*  : 스캔 단계(수집 대기, 평가, 차트)
+#   signal.* : 신호별 평가(종목 경로는 종목당 1회, 패널 경로는 청크당 1회)
+#   net.*    : 야후/KRX/텔레그램 호출
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.counters = Counter()
+            self.started = time.monotonic()
+
+    def add(self, name, secs):
+        with self.lock:
+            self.samples.setdefault(name, []).append(secs)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    @contextmanager
+    def timer(self, name):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - t0)
+
+    # 지금까지의 기록을 꺼내고 비운다(워커 프로세스가 작업 단위로 부모에 돌려줄 때)
+    def drain(self):
+        with self.lock:
+            out = (self.samples, dict(self.counters))
+            self.samples, self.counters = {}, Counter()
+        return out
+
+    # drain() 결과를 합친다
+    def merge(self, samples, counters):
+        with self.lock:
+            for k, v in samples.items():
+                self.samples.setdefault(k, []).extend(v)
+            self.counters.update(counters)
+
+    def total(self, prefix):
+        with self.lock:
+            return sum(sum(v) for k, v in self.samples.items() if k == prefix or k.startswith(prefix + "."))
+
+    def summary(self):
+        with self.lock:
+            items = {k: np.asarray(v) for k, v in self.samples.items()}
+            counters = dict(self.counters)
+            wall = time.monotonic() - self.started
+        timers = {}
+        for k in sorted(items):
+            a = items[k] * 1000
+            timers[k] = {"n": int(a.size), "total_s": round(float(a.sum()) / 1000, 3),
+                         "p50_ms": round(float(np.percentile(a, 50)), 2),
+                         "p95_ms": round(float(np.percentile(a, 95)), 2),
+                         "max_ms": round(float(a.max()), 2)}
+        return {"wall_s": round(wall, 2), "timers": timers, "counters": counters}
+
+    # 완료 메시지용 한 줄 요약
+    def compact(self):
+        wall = time.monotonic() - self.started
+        parts = [("수집", self.total("net.yf_download")), ("대기", self.total("stage.fetch_wait")),
+                 ("평가", self.total("stage.evaluate")),
+                 ("차트", self.total("stage.chart") + self.total("stage.chart_batch")),
+                 ("전송", self.total("net.telegram"))]
+        with self.lock:
+            retries = self.counters.get("fetch.retry", 0)
+            screened = (self.counters.get("prescreen.passed", 0), self.counters.get("prescreen.total", 0))
+        line = " · ".join(f"{k} {v:.0f}s" for k, v in parts if v >= 0.5)
+        line = f"⏱ {wall:.0f}s" + (f" ({line})" if line else "")
+        if screened[1]:
+            line += f" 선별 {screened[0]}/{screened[1]}"
+        return line + (f" 재시도 {retries}" if retries else "")
+
+METRICS = Metrics()
+
+def write_report(path, **extra):
+    report = dict(extra, metrics=METRICS.summary())
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(tmp, path)
+    return path
+
+# 샘플링 프로파일러: interval 마다 대상 스레드의 스택을 떠서 함수별 누적 횟수를 센다
+class Sampler:
+    def __init__(self, interval=0.01, thread_id=None):
+        self.interval = float(interval)
+        self.thread_id = thread_id or threading.get_ident()
+        self.leaf = Counter()
+        self.inclusive = Counter()
+        self.n = 0
+        self._stop = threading.Event()
+        self.th = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def start(self):
+        self.th.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.n += 1
+            seen = set()
+            first = True
+            while frame is not None:
+                co = frame.f_code
+                key = f"{os.path.basename(co.co_filename)}:{co.co_name}"
+                if first:
+                    self.leaf[f"{key}:{frame.f_lineno}"] += 1
+                    first = False
+                if key not in seen:
+                    self.inclusive[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def stop(self, path=None, top=40):
+        self._stop.set()
+        self.th.join()
+        out = {"samples": self.n, "interval_s": self.interval,
+               "leaf": self.leaf.most_common(top), "inclusive": self.inclusive.most_common(top)}
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(out, f, ensure_ascii=False, indent=1)
+        return out
+
+# SCAN_PROFILE=cprofile|sample 이면 fn 실행을 프로파일해 path(.prof / .json)에 기록
+def profiled(fn, mode, path):
+    mode = (mode or "").lower()
+    if mode in ("cprofile", "1", "true"):
+        import cProfile
+        prof = cProfile.Profile()
+        try:
+            return prof.runcall(fn)
+        finally:
+            prof.dump_stats(path + ".prof")
+            print(f"[profile] {path}.prof")
+    if mode == "sample":
+        s = Sampler(float(os.getenv("SCAN_PROFILE_INTERVAL", "0.01"))).start()
+        try:
+            return fn()
+        finally:
+            s.stop(path + ".sample.json")
+            print(f"[profile] {path}.sample.json ({s.n} samples)")
+    return fn()
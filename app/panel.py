@@ -0,0 +1,383 @@
+import time
+import numpy as np
+import pandas as pd
+
+from .indicators import ichimoku_lines, bbands, dmi_dx, sma
+from .timeframes import cached_many
+from .signals import run_signals, compile_plan, CONDITION_ORDER, _Lazy
+from .dsl import panel_findings
+from .metrics import METRICS
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+
+# 종목별 히스토리를 "마지막 봉" 기준으로 우측 정렬한 (봉 × 종목) 행렬.
+# 신호는 모두 마지막 봉에서 판정하고 rolling/ewm 은 앞쪽 NaN 을 건너뛰므로
+# 종목별 경로(run_signals)와 같은 값을 열 단위로 한 번에 계산할 수 있다.
+class Panel:
+    def __init__(self, frames):
+        self.frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        self.tickers = list(self.frames)
+        self.lengths = np.array([len(df) for df in self.frames.values()], dtype=np.int64)
+        n = int(self.lengths.max()) if len(self.lengths) else 0
+        self.n = n
+        self._cols = {}
+        for f in FIELDS:
+            arr = np.full((n, len(self.tickers)), np.nan)
+            for j, df in enumerate(self.frames.values()):
+                arr[n - len(df):, j] = np.asarray(df[f], dtype="float64")
+            self._cols[f] = pd.DataFrame(arr, columns=self.tickers)
+        self.index = pd.RangeIndex(n)
+
+    def __getitem__(self, field):
+        return self._cols[field]
+
+    def __len__(self):
+        return self.n
+
+    # 마지막 n 봉만 보는 패널(종목별 경로의 꼬리 view 와 같은 구간). 행렬/프레임 모두 view
+    def tail(self, n):
+        if n >= self.n:
+            return self
+        P = Panel.__new__(Panel)
+        P.frames = {t: df.iloc[-n:] for t, df in self.frames.items()}
+        P.tickers = self.tickers
+        P.lengths = np.minimum(self.lengths, n)
+        P.n = n
+        P._cols = {f: w.iloc[-n:].reset_index(drop=True) for f, w in self._cols.items()}
+        P.index = pd.RangeIndex(n)
+        return P
+
+    # 종목 j 의 실제 구간(패딩 제외) 배열
+    def column(self, wide, j):
+        return np.asarray(wide.iloc[:, j].to_numpy())[self.n - self.lengths[j]:]
+
+def _last(wide, k=1):
+    return wide.iloc[-k].to_numpy() if len(wide) >= k else np.full(wide.shape[1], np.nan)
+
+# 종목 경로의 _passes 와 같은 순서/카운터로 조건을 적용한다. 각 조건은 아직 살아 있는 종목 위치 idx 만 받아
+# bool 배열을 돌려주므로, 살아남은 종목이 없으면 뒤 조건(비싼 지표)은 청크 전체에서 계산하지 않는다.
+# alive: 평가 대상(히스토리가 충분한 종목) 마스크
+def _panel_passes(key, conds, alive, order=None):
+    alive = np.asarray(alive, dtype=bool).copy()
+    for name in order or CONDITION_ORDER[key]:
+        idx = np.flatnonzero(alive)
+        if len(idx) == 0:
+            break
+        METRICS.count(f"cond.{key}.{name}", len(idx))
+        alive[idx] = np.asarray(conds[name](idx), dtype=bool)
+        METRICS.count(f"cond.{key}.{name}.pass", int(alive.sum()))
+    return alive
+
+def panel_cloud_pullback_rebreak_full(
+    P,
+    tenkan=9, kijun=26, senkou_b=52, displacement=26,
+    retrace="into", min_gap_bars=3, min_retrace_bars=1, require_open_cross=True,
+    resistance_mode="swing_high", use_open_for_now=True,
+    bb_window=55, bb_k=2.0, retrace_vol_mult=2.0,
+    alive=None, order=None
+):
+    name = "구름돌파-조정-재돌파(저항+BB55+물량)"
+    need = max(senkou_b, kijun) + 80
+    price = P["Open"] if use_open_for_now else P["Close"]
+    now_price, prev_price = _last(price, 1), _last(price, 2)
+
+    def cloud():
+        ich = ichimoku_lines(P["High"], P["Low"], P["Close"], tenkan, kijun, senkou_b, displacement)
+        cloud_top = np.maximum(ich["span_a_now"], ich["span_b_now"])
+        cloud_bot = np.minimum(ich["span_a_now"], ich["span_b_now"])
+        prev_top = cloud_top.shift(1)
+        cross = P["Open"] if require_open_cross else P["Close"]
+        breakout_up = (cross > cloud_top) & (P["Close"].shift(1) <= prev_top)
+        retrace_mask = (P["Close"] < cloud_bot) if retrace == "below" else (P["Close"] <= cloud_top)
+        return breakout_up, retrace_mask
+
+    def bb_up():
+        return bbands(P["Close"], window=int(bb_window), k=float(bb_k))[2]
+
+    v = _Lazy(cloud=cloud, bb_up=bb_up)
+    pulls, avgs = {}, {}
+
+    # 2차 돌파(마지막 봉) 이전의 1차 돌파 + 조정 구간 탐색 → pulls[j] = (1차 돌파, 조정 시작, 저항)
+    def pullback(idx):
+        breakout_up, retrace_mask = v.cloud
+        ok = np.zeros(len(idx), dtype=bool)
+        for r, j in enumerate(idx):
+            events = np.where(P.column(breakout_up, j))[0]
+            rm = P.column(retrace_mask, j)
+            high = P.column(P["High"], j)
+            e2 = events[-1]
+            for e1 in reversed(events[:-1]):
+                if e2 - e1 <= max(1, int(min_gap_bars)): continue
+                seg = rm[e1+1:e2]
+                if seg.sum() >= int(min_retrace_bars):
+                    retrace_start = e1 + 1 + np.where(seg)[0][0]
+                    resist = float(high[e1]) if resistance_mode == "bar_high" else float(np.nanmax(high[e1:retrace_start]))
+                    pulls[j] = (e1, retrace_start, resist)
+                    ok[r] = True
+                    break
+        return ok
+
+    def volume(idx):
+        ok = np.zeros(len(idx), dtype=bool)
+        for r, j in enumerate(idx):
+            vol = P.column(P["Volume"], j)
+            e2 = len(vol) - 1
+            retrace_start = pulls[j][1]
+            avgs[j] = float(np.mean(vol[retrace_start:e2])) if (e2 - retrace_start) >= 1 else 0.0
+            ok[r] = (avgs[j] > 0) and (float(vol[-1]) >= float(retrace_vol_mult) * avgs[j])
+        return ok
+
+    def bb_break(idx):
+        up1, up2 = _last(v.bb_up, 1)[idx], _last(v.bb_up, 2)[idx]
+        return (now_price[idx] > up1) & (prev_price[idx] <= np.where(np.isnan(up2), np.inf, up2))
+
+    def resistance(idx):
+        resist = np.array([pulls[j][2] for j in idx])
+        return (now_price[idx] > resist) & (prev_price[idx] <= resist)
+
+    conds = {
+        "rising": lambda idx: now_price[idx] > prev_price[idx],
+        "bbands": bb_break,
+        # 마지막 봉이 구름 돌파이고 이전 돌파 이벤트가 있는 종목
+        "breakout": lambda idx: _last(v.cloud[0]).astype(bool)[idx] & (v.cloud[0].iloc[:, idx].sum().to_numpy() >= 2),
+        "pullback": pullback,
+        "resistance": resistance,
+        "volume": volume,
+    }
+    start = (P.lengths >= need) if alive is None else (alive & (P.lengths >= need))
+    hit = _panel_passes("cloud_pullback_rebreak_full", conds, start, order)
+
+    out = {}
+    for j in np.flatnonzero(hit):
+        idx1, _, resist = pulls[j]
+        idx = P.frames[P.tickers[j]].index
+        e2 = len(idx) - 1
+        now_vol = float(P.column(P["Volume"], j)[-1])
+        d1 = idx[idx1].strftime("%Y-%m-%d"); d2 = idx[e2].strftime("%Y-%m-%d")
+        out[P.tickers[j]] = {
+            "name": name, "trigger": True,
+            "detail": (f"{d2} 2차 구름 상향돌파. 저항 {resist:.2f} 돌파 + BB55 상단(시가) 돌파. "
+                       f"당일거래량 {now_vol:,.0f} ≥ {retrace_vol_mult:.1f}× 조정평균 {avgs[j]:,.0f}."),
+            "extras": {"resistance": resist},
+        }
+    return out
+
+def panel_ichimoku_tenkan_golden_combo(
+    P,
+    tenkan=9, kijun=26, senkou_b=52, displacement=26,
+    lookback_cross_bars=1, dx_period=14, ma_fast=5, ma_mid=10,
+    alive=None, order=None
+):
+    def lines():
+        ich = ichimoku_lines(P["High"], P["Low"], P["Close"], tenkan, kijun, senkou_b, displacement)
+        return ich["tenkan"], ich["kijun"], ich["chikou"]
+
+    def tenkan_cross():
+        tk, kj, _ = v.lines
+        t1, t2, t3 = _last(tk, 1), _last(tk, 2), _last(tk, 3)
+        k1, k2, k3 = _last(kj, 1), _last(kj, 2), _last(kj, 3)
+        return (t1 > k1) & ((t1 > k1) & (t2 <= k2) | ((lookback_cross_bars >= 1) & (t2 > k2) & (t3 <= k3)))
+
+    # 우측 정렬이므로 i0(= 길이 - displacement - 1)는 모든 종목에서 같은 행
+    def chikou_cross():
+        tk, _, ck = v.lines
+        r0 = P.n - int(displacement) - 1
+        if r0 < 2:
+            return np.zeros(len(P.tickers), dtype=bool)
+        c0, c1, c2 = ck.iloc[r0].to_numpy(), ck.iloc[r0-1].to_numpy(), ck.iloc[r0-2].to_numpy()
+        n0, n1, n2 = tk.iloc[r0].to_numpy(), tk.iloc[r0-1].to_numpy(), tk.iloc[r0-2].to_numpy()
+        above_now = c0 > n0
+        xup_now = (c0 > n0) & (c1 <= n1)
+        xup_prev = (c1 > n1) & (c2 <= n2)
+        return (P.lengths - int(displacement) - 1 >= 2) & above_now & (xup_now | ((lookback_cross_bars >= 1) & xup_prev))
+
+    def dx_rising():
+        _, _, dx = dmi_dx(P, period=int(dx_period))
+        return (P.lengths >= 2) & (_last(dx, 1) > _last(dx, 2))
+
+    v = _Lazy(
+        lines=lines, tenkan_cross=tenkan_cross, chikou_cross=chikou_cross, dx_rising=dx_rising,
+        k1=lambda: _last(v.lines[1], 1), k2=lambda: _last(v.lines[1], 2),
+        ma5=lambda: _last(sma(P["Close"], int(ma_fast))),
+        ma10=lambda: _last(sma(P["Close"], int(ma_mid))),
+    )
+    close = _last(P["Close"])
+    conds = {
+        "tenkan_cross": lambda idx: v.tenkan_cross[idx],
+        "chikou_cross": lambda idx: v.chikou_cross[idx],
+        "dx_rising": lambda idx: v.dx_rising[idx],
+        "above_ma_fast": lambda idx: close[idx] > v.ma5[idx],
+        "ma_fast_above_mid": lambda idx: v.ma5[idx] > v.ma10[idx],
+        "kijun_rising": lambda idx: v.k1[idx] > v.k2[idx],
+        "above_kijun": lambda idx: close[idx] > v.k1[idx],
+    }
+    hit = _panel_passes("ichimoku_tenkan_golden_combo", conds, np.ones(len(P.tickers), dtype=bool) if alive is None else alive, order)
+    return {
+        P.tickers[j]: {
+            "name": "전화선 골크 콤보", "trigger": True,
+            "detail": "전환선>기준선 골크(1봉내) 지속, 후행스팬>전환선 골크(1봉내) 지속, DX↑, 종>MA5>MA10, 기준선↑ & 종>기준선",
+        }
+        for j in np.where(hit)[0]
+    }
+
+def panel_major_uptrend_pullback_bounce(
+    P,
+    min_market_cap_krw=100_000_000_000,
+    min_close=1000, max_close=99_999_999,
+    min_daily_volume=100_000, max_daily_volume=999_999_999,
+    weekly_lookback=135, nhigh_weeks=299, week_ending="FRI",
+    market_cap_fetcher=None, cache=None, alive=None, order=None
+):
+    close = _last(P["Close"]); vol = _last(P["Volume"]); open_ = _last(P["Open"])
+    caps, weekly = {}, {}
+
+    def market_cap(idx):
+        ok = np.zeros(len(idx), dtype=bool)
+        for r, j in enumerate(idx):
+            mc = market_cap_fetcher(P.tickers[j]) if market_cap_fetcher else None
+            if mc is not None and mc >= float(min_market_cap_krw):
+                caps[P.tickers[j]] = mc
+                ok[r] = True
+        return ok
+
+    # 후보 종목의 주봉을 한 번에 집계(상태/캐시에 있으면 그대로)
+    def weekly_high(idx):
+        weekly.update(cached_many(cache, {P.tickers[j]: P.frames[P.tickers[j]] for j in idx}, "weekly", (str(week_ending),)))
+        ok = np.zeros(len(idx), dtype=bool)
+        for r, j in enumerate(idx):
+            w = weekly[P.tickers[j]]
+            if len(w) < max(int(weekly_lookback), int(nhigh_weeks)) + 5: continue
+            hi_299 = w["High"].rolling(int(nhigh_weeks), min_periods=int(nhigh_weeks)).max().iloc[-1]
+            ok[r] = w["High"].iloc[-1] >= hi_299 - 1e-8
+        return ok
+
+    def rebound(idx):
+        ok = np.zeros(len(idx), dtype=bool)
+        for r, j in enumerate(idx):
+            w = weekly[P.tickers[j]]
+            lo_ll = w["Low"].rolling(int(weekly_lookback)).min()
+            hi_ll = w["High"].rolling(int(weekly_lookback)).max()
+            rng = (hi_ll - lo_ll).replace(0, np.nan)
+            pos0 = (w["Close"].iloc[-1] - lo_ll.iloc[-1]) / rng.iloc[-1]
+            pos1 = (w["Close"].iloc[-2] - lo_ll.iloc[-2]) / rng.iloc[-2]
+            ok[r] = (pos0 <= 0.25 or pos1 <= 0.25) and pos0 >= 0.25
+        return ok
+
+    conds = {
+        "price": lambda idx: (float(min_close) <= close[idx]) & (close[idx] <= float(max_close)),
+        "volume": lambda idx: (int(min_daily_volume) <= vol[idx]) & (vol[idx] <= int(max_daily_volume)),
+        "bullish": lambda idx: close[idx] > open_[idx],
+        "market_cap": market_cap,
+        "weekly_high": weekly_high,
+        "rebound": rebound,
+    }
+    hit = _panel_passes("major_uptrend_pullback_bounce", conds, np.ones(len(P.tickers), dtype=bool) if alive is None else alive, order)
+    return {
+        P.tickers[j]: {
+            "name": "대세상승 후 하락구간 반등", "trigger": True,
+            "detail": (f"주봉 299 신고가 + (전주≤25% 또는 금주≤25%) → 금주≥25% 반등, 양봉. 시총 {caps[P.tickers[j]]:,.0f} KRW"),
+        }
+        for j in np.flatnonzero(hit)
+    }
+
+def panel_crash_ma_rebound(
+    P,
+    min_dod_close_change=0.01,
+    max_open_to_low_drawdown=-0.03,
+    min_low_to_close_rebound=0.02,
+    near_ma_tolerance=0.005,
+    ma_set=(5,20,60),
+    alive=None, order=None
+):
+    c1, c2 = _last(P["Close"], 1), _last(P["Close"], 2)
+    o1, l1 = _last(P["Open"]), _last(P["Low"])
+    tol = float(near_ma_tolerance)
+
+    def near_ma(idx):
+        near_any = np.zeros(len(idx), dtype=bool)
+        for p in ma_set:
+            ma = _last(P["Close"].iloc[:, idx].rolling(int(p)).mean())
+            with np.errstate(invalid="ignore", divide="ignore"):
+                near_any |= ~np.isnan(ma) & (np.abs(c1[idx] - ma) / ma <= tol)
+        return near_any
+
+    conds = {
+        "gain": lambda idx: (c1[idx] / c2[idx] - 1.0) >= float(min_dod_close_change),
+        "drawdown": lambda idx: ((l1[idx] / o1[idx]) - 1.0) <= float(max_open_to_low_drawdown),
+        "rebound": lambda idx: ((c1[idx] / l1[idx]) - 1.0) >= float(min_low_to_close_rebound),
+        "near_ma": near_ma,
+    }
+    start = P.lengths >= max(ma_set) + 5
+    hit = _panel_passes("crash_ma_rebound", conds, start if alive is None else alive & start, order)
+    out = {}
+    for j in np.where(hit)[0]:
+        c, p, l, o = c1[j], c2[j], l1[j], o1[j]
+        out[P.tickers[j]] = {
+            "name": "폭락후 이평선반등", "trigger": True,
+            "detail": (f"종가 +{(c/p-1)*100:.2f}% | 장중 -{(1 - l/o)*100:.2f}% → "
+                       f"+{(c/l-1)*100:.2f}% | MA 근접±{tol*100:.1f}% ({', '.join(map(str,ma_set))})"),
+        }
+    return out
+
+def panel_sanity_ma5_gt_ma10(P, alive=None, order=None):
+    ma5 = _last(P["Close"].rolling(5).mean())
+    ma10 = _last(P["Close"].rolling(10).mean())
+    start = P.lengths >= 10
+    hit = _panel_passes("sanity_ma5_gt_ma10", {"ma5_gt_ma10": lambda idx: ma5[idx] > ma10[idx]},
+                        start if alive is None else alive & start, order)
+    return {P.tickers[j]: {"name": "SANITY MA5>MA10", "trigger": True, "detail": "파이프라인 점검용"} for j in np.where(hit)[0]}
+
+PANEL_SIGNALS = {
+    "cloud_pullback_rebreak_full": panel_cloud_pullback_rebreak_full,
+    "ichimoku_tenkan_golden_combo": panel_ichimoku_tenkan_golden_combo,
+    "major_uptrend_pullback_bounce": panel_major_uptrend_pullback_bounce,
+    "crash_ma_rebound": panel_crash_ma_rebound,
+    "sanity_ma5_gt_ma10": panel_sanity_ma5_gt_ma10,
+}
+
+# 유니버스 전체를 한 번에 판정. {ticker: findings} (run_signals 와 같은 순서/형식)
+# cache: 종목별 주봉은 IndicatorCache(증분 상태로 채워졌을 수 있음)에서 가져옴
+# plan: compile_plan(cfg) (없으면 호출마다 해석)
+def run_signals_panel(frames, cfg, market_cap_fetcher=None, cache=None, plan=None):
+    P = frames if isinstance(frames, Panel) else Panel(frames)
+    found = {t: [] for t in P.tickers}
+    if not P.tickers:
+        return {}
+    if plan is None:
+        plan = compile_plan(cfg)
+    for key, _, params, need, window in plan.steps:
+        fn = PANEL_SIGNALS[key]
+        short = P.lengths < need
+        if short.any():
+            METRICS.count(f"skip.{key}", int(short.sum()))
+        if short.all():
+            continue
+        Q = P.tail(window)
+        t0 = time.monotonic()
+        if key == "major_uptrend_pullback_bounce":
+            hits = fn(Q, market_cap_fetcher=market_cap_fetcher, cache=cache, alive=~short, order=plan.orders[key], **params)
+        else:
+            hits = fn(Q, alive=~short, order=plan.orders[key], **params)
+        METRICS.add(f"signal.{key}", time.monotonic() - t0)
+        skip = {t for t, s in zip(P.tickers, short) if s}
+        for t, res in hits.items():
+            if t not in skip:
+                found[t].append(res)
+    if plan.strategies:
+        t0 = time.monotonic()
+        for t, res in panel_findings(P.tail(plan.dsl_window), plan.strategies, P.lengths).items():
+            found[t] += res
+        METRICS.add("signal.strategies", time.monotonic() - t0)
+    return {t: f for t, f in found.items() if f}
+
+# 종목별 경로(기준 구현)와 결과 비교. 불일치 종목 목록 반환
+def compare_with_reference(frames, cfg, market_cap_fetcher=None):
+    got = run_signals_panel(frames, cfg, market_cap_fetcher=market_cap_fetcher)
+    bad = []
+    for t, df in frames.items():
+        if df is None or df.empty:
+            continue
+        ref = run_signals(df, cfg, ticker=t, market_cap_fetcher=market_cap_fetcher)
+        if ref != got.get(t, []):
+            bad.append(t)
+    return bad
@@ -0,0 +1,99 @@
+import numpy as np
+
+from .panel import Panel
+from .metrics import METRICS
+
+# 1단계 선별: 최근 몇 봉만으로 판정 가능한 신호별 "필요조건"을 (봉 × 종목) 스냅샷 패널에 일괄 적용한다.
+# 조건은 신호 함수와 같은 식을 쓰되 어느 신호의 필요조건이라도 통과하면 2단계(전체 히스토리)로 넘긴다.
+# 스냅샷 봉이 모자란 종목은 판정하지 않고 통과시킨다(거짓 음성 없음).
+# 이동평균처럼 누적 오차가 있는 값은 SLACK 만큼 느슨하게 비교한다.
+SLACK = 1e-9
+
+def _rows(P, field, k):
+    a = P[field].to_numpy()
+    return a[-k:] if P.n >= k else np.full((k, a.shape[1]), np.nan)
+
+def _mean(P, field, k):
+    return _rows(P, field, k).mean(axis=0)
+
+def _mid(P, k, end=0):
+    hi, lo = _rows(P, "High", k + end), _rows(P, "Low", k + end)
+    n = len(hi) - end
+    return (hi[:n].max(axis=0) + lo[:n].min(axis=0)) / 2
+
+# 2차 돌파: 구름 상단(≥ 선행스팬A) 위에서 돌파, 저항 돌파(전봉 ≤ 저항 < 현재봉) → 기준가 상승,
+# 물량 조건(조정평균 > 0) → 당일 거래량 > 0. 조정 구간 시작을 모르므로 거래량 배수는 판정할 수 없다
+def pre_cloud_pullback_rebreak_full(P, kw, caps=None):
+    ref = "Open" if kw["use_open_for_now"] else "Close"
+    brk = "Open" if kw["require_open_cross"] else "Close"
+    x = _rows(P, ref, 2)
+    span_a = (_mid(P, kw["tenkan"]) + _mid(P, kw["kijun"])) / 2
+    ok = (x[-1] > x[-2]) & (_rows(P, brk, 1)[-1] > span_a)
+    if kw["retrace_vol_mult"] > 0:
+        ok &= _rows(P, "Volume", 1)[-1] > 0
+    return ok
+
+# 종 > MA(fast) > MA(mid), 기준선 상승, 종 > 기준선
+def pre_ichimoku_tenkan_golden_combo(P, kw, caps=None):
+    close = _rows(P, "Close", 1)[-1]
+    ma_f, ma_m = _mean(P, "Close", kw["ma_fast"]), _mean(P, "Close", kw["ma_mid"])
+    kij0, kij1 = _mid(P, kw["kijun"]), _mid(P, kw["kijun"], end=1)
+    return (close > ma_f * (1 - SLACK)) & (ma_f > ma_m * (1 - SLACK)) & (kij0 > kij1) & (close > kij0)
+
+# 양봉 + 종가/거래량 범위 + 시가총액(일괄 적재값이 있는 종목만) + 주봉 신고가.
+# 이번 주 봉은 최근 WEEK_BARS 일봉 안에 있고 N주 고가 구간은 스냅샷 전체를 덮으므로
+# 스냅샷 최고가가 최근 WEEK_BARS 봉에서 나와야 한다
+WEEK_BARS = 5
+
+def pre_major_uptrend_pullback_bounce(P, kw, caps=None):
+    last = {f: _rows(P, f, 1)[-1] for f in ("Open", "Close", "Volume")}
+    c, v = last["Close"], last["Volume"]
+    hi = _rows(P, "High", min(max(P.n, WEEK_BARS), 5 * int(kw["nhigh_weeks"])))
+    with np.errstate(invalid="ignore"):
+        ok = hi[-WEEK_BARS:].max(axis=0) >= np.fmax.reduce(hi, axis=0) - 1e-8
+    ok &= (c >= float(kw["min_close"])) & (c <= float(kw["max_close"]))
+    ok &= (v >= int(kw["min_daily_volume"])) & (v <= int(kw["max_daily_volume"])) & (c > last["Open"])
+    if caps:
+        mc = np.array([caps.get(t.split(".")[0], np.inf) for t in P.tickers], dtype=np.float64)
+        ok &= ~(np.nan_to_num(mc, nan=-np.inf) < float(kw["min_market_cap_krw"]))
+    return ok
+
+# 전일 대비 상승 + 장중 낙폭 + 저가 대비 반등
+def pre_crash_ma_rebound(P, kw, caps=None):
+    close, open_, low = _rows(P, "Close", 2), _rows(P, "Open", 1)[-1], _rows(P, "Low", 1)[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ok = (close[-1] / close[-2] - 1.0) >= float(kw["min_dod_close_change"])
+        ok &= ((low / open_) - 1.0) <= float(kw["max_open_to_low_drawdown"])
+        ok &= ((close[-1] / low) - 1.0) >= float(kw["min_low_to_close_rebound"])
+    return ok
+
+def pre_sanity_ma5_gt_ma10(P, kw, caps=None):
+    return _mean(P, "Close", 5) > _mean(P, "Close", 10) * (1 - SLACK)
+
+# 키 → (필요 봉 수(파라미터 → int), 조건 함수). 없는 신호는 선별하지 않는다(전 종목 통과)
+PRESCREEN = {
+    "cloud_pullback_rebreak_full": (lambda p: max(2, p["tenkan"], p["kijun"]), pre_cloud_pullback_rebreak_full),
+    "ichimoku_tenkan_golden_combo": (lambda p: max(p["ma_mid"], p["ma_fast"], p["kijun"] + 1), pre_ichimoku_tenkan_golden_combo),
+    "major_uptrend_pullback_bounce": (lambda p: WEEK_BARS, pre_major_uptrend_pullback_bounce),
+    "crash_ma_rebound": (lambda p: 2, pre_crash_ma_rebound),
+    "sanity_ma5_gt_ma10": (lambda p: 10, pre_sanity_ma5_gt_ma10),
+}
+
+# 스냅샷에 필요한 봉 수. 선별할 수 없는 신호가 켜져 있으면 None(선별 생략)
+def snapshot_bars(params):
+    if not params or any(key not in PRESCREEN for key, _ in params):
+        return None
+    return max(PRESCREEN[key][0](kw) for key, kw in params)
+
+# frames: {ticker: 최근 봉 df}. 통과 종목 집합과 신호별 통과 수
+def prescreen_frames(frames, params, caps=None):
+    P = Panel(frames)
+    passed = np.zeros(len(P.tickers), dtype=bool)
+    per_signal = {}
+    for key, kw in params:
+        bars, fn = PRESCREEN[key]
+        with METRICS.timer(f"prescreen.{key}"):
+            ok = np.asarray(fn(P, kw, caps), dtype=bool) | (P.lengths < bars(kw))
+        per_signal[key] = int(ok.sum())
+        passed |= ok
+    return {t for t, ok in zip(P.tickers, passed) if ok}, per_signal
@@ -0,0 +1,263 @@
+import os
+import gzip
+import atexit
+import json
+import numpy as np
+
+# 외부 데이터 공급자. 일봉 다운로드/상장 목록/시가총액/종목명을 한 인터페이스로 받는다.
+#   download(tickers, start, interval) → yf.download(group_by="ticker") 모양의 프레임
+#   listing(market)                   → FDR StockListing 모양의 DataFrame
+#   market_cap(ticker) / name(ticker) → 값 또는 None
+# provider.mode(또는 DATA_PROVIDER): "live"(야후+FDR), "record"(live 응답을 fixtures_dir 에 압축 저장),
+# "replay"(fixtures_dir 만 읽음, 네트워크 없음). replay 는 offline=True 라 다운로드 속도 제한/재시도를 건너뛴다.
+#   <fixtures_dir>/bars/<interval>/<ticker>.npz, listing/<market>.csv.gz, market_caps.json.gz, names.json.gz
+# yfinance/FDR/pandas 는 쓰는 메서드 안에서 불러온다(스냅샷만 읽는 유니버스 실행은 import 하지 않음)
+FIELDS = ["Open","High","Low","Close","Volume"]
+
+class YahooProvider:
+    offline = False
+
+    def download(self, tickers, start, interval="1d"):
+        import yfinance as yf
+        return yf.download(tickers=tickers, start=start, interval=interval, group_by="ticker",
+                           auto_adjust=False, threads=True, progress=False)
+
+    def market_cap(self, ticker):
+        import yfinance as yf
+        tk = yf.Ticker(ticker)
+        fi = getattr(tk, "fast_info", None)
+        if fi and getattr(fi, "market_cap", None):
+            return float(fi.market_cap)
+        info = tk.info or {}
+        return float(info.get("marketCap")) if "marketCap" in info else None
+
+    def name(self, ticker):
+        import yfinance as yf
+        info = yf.Ticker(ticker).info or {}
+        nm = info.get("shortName") or info.get("longName")
+        return str(nm) if nm else None
+
+class FdrProvider:
+    offline = False
+
+    def listing(self, market):
+        import FinanceDataReader as fdr
+        return fdr.StockListing(market)
+
+# 기본값: 시세/시가총액/종목명은 야후, 상장 목록은 FDR
+class LiveProvider(YahooProvider, FdrProvider):
+    pass
+
+def _gz_json(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+def _put_gz_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+# 기록 파일 읽기/쓰기 공용
+class Fixtures:
+    def __init__(self, root):
+        self.root = root
+        self._bars = {}
+        self._maps = {}
+        # put 으로 받은 뒤 아직 파일에 쓰지 않은 항목(kind → {ticker: 값})
+        self._pending = {}
+
+    def _bars_path(self, ticker, interval):
+        return os.path.join(self.root, "bars", interval, f"{ticker}.npz")
+
+    def _listing_path(self, market):
+        return os.path.join(self.root, "listing", f"{market}.csv.gz")
+
+    def _map_path(self, kind):
+        return os.path.join(self.root, f"{kind}.json.gz")
+
+    def bars(self, ticker, interval):
+        import pandas as pd
+        key = (ticker, interval)
+        if key not in self._bars:
+            try:
+                with np.load(self._bars_path(ticker, interval), allow_pickle=False) as z:
+                    idx = pd.DatetimeIndex(z["date"].astype("datetime64[ns]"))
+                    tz = str(z["tz"])
+                    if tz:
+                        idx = idx.tz_localize("UTC").tz_convert(tz)
+                    self._bars[key] = pd.DataFrame({f: z[f] for f in FIELDS}, index=idx)
+            except FileNotFoundError:
+                self._bars[key] = None
+        return self._bars[key]
+
+    # 기존 기록과 합쳐 저장(같은 봉은 새 값)
+    def put_bars(self, ticker, interval, df):
+        import pandas as pd
+        df = df[FIELDS].dropna(how="all")
+        if df.empty:
+            return
+        old = self.bars(ticker, interval)
+        if old is not None and not old.empty and (old.index.tz is None) == (df.index.tz is None):
+            df = pd.concat([old, df])
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+        idx = pd.DatetimeIndex(df.index)
+        tz = str(idx.tz) if idx.tz is not None else ""
+        naive = idx.tz_convert("UTC").tz_localize(None) if tz else idx
+        path = self._bars_path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, date=naive.as_unit("ns").asi8, tz=np.array(tz),
+                                **{c: np.asarray(df[c], dtype=np.float64) for c in FIELDS})
+        os.replace(tmp, path)
+        self._bars[(ticker, interval)] = df
+
+    def listing(self, market):
+        import pandas as pd
+        try:
+            return pd.read_csv(self._listing_path(market), dtype={"Code": str})
+        except FileNotFoundError:
+            return None
+
+    def put_listing(self, market, df):
+        path = self._listing_path(market)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False, compression="gzip")
+
+    def get(self, kind, ticker):
+        if kind not in self._maps:
+            self._maps[kind] = _gz_json(self._map_path(kind))
+        return self._maps[kind].get(ticker)
+
+    # 메모리에만 넣고 flush 에서 한 번에 쓴다(호출마다 전체 파일을 다시 쓰지 않음)
+    def put(self, kind, ticker, value):
+        self.get(kind, ticker)
+        self._maps[kind][ticker] = value
+        self._pending.setdefault(kind, {})[ticker] = value
+
+    # 쓰지 않은 항목을 디스크의 현재 파일에 합쳐 저장(다른 프로세스가 그새 쓴 항목도 유지)
+    def flush(self):
+        for kind, items in self._pending.items():
+            data = _gz_json(self._map_path(kind))
+            data.update(items)
+            _put_gz_json(self._map_path(kind), data)
+            self._maps[kind] = data
+        self._pending = {}
+
+# 기록된 응답만으로 동작(네트워크 없음). 없는 종목은 다운로드에서 빠지고 시가총액/이름은 None
+class ReplayProvider:
+    offline = True
+
+    def __init__(self, root):
+        self.fx = Fixtures(root)
+
+    def download(self, tickers, start, interval="1d"):
+        import pandas as pd
+        if isinstance(tickers, str):
+            tickers = tickers.split()
+        parts = {}
+        for t in tickers:
+            df = self.fx.bars(t, interval)
+            if df is None:
+                continue
+            s = pd.Timestamp(start)
+            if df.index.tz is not None and s.tz is None:
+                s = s.tz_localize(df.index.tz)
+            df = df.loc[df.index >= s]
+            if len(df):
+                parts[t] = df
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1)
+
+    def listing(self, market):
+        df = self.fx.listing(market)
+        if df is None:
+            raise RuntimeError(f"기록된 상장 목록이 없습니다: {market} ({self.fx.root})")
+        return df
+
+    def market_cap(self, ticker):
+        return self.fx.get("market_caps", ticker)
+
+    def name(self, ticker):
+        return self.fx.get("names", ticker)
+
+# inner 의 응답을 그대로 돌려주면서 기록
+class RecordingProvider:
+    offline = False
+
+    def __init__(self, inner, root):
+        self.inner = inner
+        self.fx = Fixtures(root)
+        # 시가총액/종목명은 flush 때 쓴다. 진입점이 flush 를 부르지 않아도 종료 시 한 번 쓴다
+        atexit.register(self.flush)
+
+    def flush(self):
+        self.fx.flush()
+
+    def download(self, tickers, start, interval="1d"):
+        import pandas as pd
+        data = self.inner.download(tickers, start, interval)
+        if data is not None and not data.empty:
+            if isinstance(data.columns, pd.MultiIndex):
+                for t in data.columns.get_level_values(0).unique():
+                    sub = data[t]
+                    if all(f in sub.columns for f in FIELDS):
+                        self.fx.put_bars(t, interval, sub)
+            else:
+                one = tickers.split() if isinstance(tickers, str) else list(tickers)
+                if len(one) == 1:
+                    self.fx.put_bars(one[0], interval, data)
+        return data
+
+    def listing(self, market):
+        df = self.inner.listing(market)
+        if df is not None and not df.empty:
+            self.fx.put_listing(market, df)
+        return df
+
+    def market_cap(self, ticker):
+        v = self.inner.market_cap(ticker)
+        if v is not None:
+            self.fx.put("market_caps", ticker, v)
+        return v
+
+    def name(self, ticker):
+        v = self.inner.name(ticker)
+        if v:
+            self.fx.put("names", ticker, v)
+        return v
+
+PROVIDER = LiveProvider()
+
+def current():
+    return PROVIDER
+
+def use(provider):
+    global PROVIDER
+    PROVIDER = provider
+    return provider
+
+# 기록 공급자의 밀린 기록을 파일로(다른 공급자는 할 일 없음)
+def flush():
+    fn = getattr(PROVIDER, "flush", None)
+    if fn is not None:
+        fn()
+
+# provider: 섹션(또는 DATA_PROVIDER/DATA_FIXTURES) → 공급자
+def open_provider(cfg):
+    pcfg = (cfg.get("provider") or {}) if isinstance(cfg, dict) else {}
+    mode = str(os.getenv("DATA_PROVIDER") or pcfg.get("mode") or "live").lower()
+    root = str(os.getenv("DATA_FIXTURES") or pcfg.get("fixtures_dir") or "data/fixtures")
+    if mode == "live":
+        return LiveProvider()
+    if mode == "record":
+        return RecordingProvider(LiveProvider(), root)
+    if mode == "replay":
+        return ReplayProvider(root)
+    raise ValueError(f"provider.mode: 알 수 없는 값 '{mode}' (live|record|replay)")
@@ -0,0 +1,43 @@
+import threading
+import time
+
+# 적응형 토큰 버킷: 초당 rate 개 토큰, 최대 burst 개 적립.
+# 요청 오류(예외)면 rate 를 절반으로(AIMD), 정상 응답이 오면 step 만큼 올린다.
+# 빈 응답은 호출 쪽(scan.fetch_chunk)에서 속도를 건드리지 않고 한 번만 다시 묻는다.
+class AdaptiveRateLimiter:
+    def __init__(self, rate=1.0, burst=1, min_rate=0.05, max_rate=4.0, step=0.1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.step = float(step)
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    # 토큰을 하나 얻을 때까지 대기. 대기한 시간(초) 반환
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                need = (1.0 - self.tokens) / self.rate
+            time.sleep(need)
+            waited += need
+
+    def success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def failure(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2.0)
+            self.tokens = 0.0
@@ -1,101 +1,391 @@
 import os
 import time
+import queue
+import threading
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
-from .signals import run_signals
-from .chart import render_chart_png_bytes, render_chart_png_bytes_with_ichimoku
+from .signals import run_signals, history_days, compile_plan, condition_stats, SIGNALS, signal_window
+from .indicators import CACHE, ichimoku
+from .panel import run_signals_panel
+from .prescreen import snapshot_bars, prescreen_frames
+from .store import BarStore, OVERLAP_DAYS, since
+from .bars import Bars, bars_from_download, as_frame
+from .incremental import StateStore
+from .marketcap import MarketCapProvider, load_krx_market_caps
+from .universe import NameCache
+from .ledger import AlertLedger, bar_date, job_key
+from .ratelimit import AdaptiveRateLimiter
+from .workers import SignalPool
+from .metrics import METRICS
+from . import providers
 
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "60"))
 CHUNK_PAUSE = float(os.getenv("CHUNK_PAUSE", "1.0"))
+FETCH_TRIES = int(os.getenv("FETCH_TRIES", "4"))
 
-def fetch_chunk(tickers, start, interval="1d"):
-    for attempt in range(3):
+# 다운로드 요청 속도 제한(고정 pause 대신). 초기 속도는 CHUNK_PAUSE 기준
+LIMITER = AdaptiveRateLimiter(rate=1.0 / max(CHUNK_PAUSE, 0.05), max_rate=float(os.getenv("FETCH_MAX_RATE", "4")))
+
+# 빈 응답은 속도 제한 신호가 아니다(휴장/상폐/신규 종목 청크). 속도는 그대로 두고 한 번만 더 물어본 뒤 빈 결과로 끝낸다
+EMPTY_TRIES = 2
+
+def fetch_chunk(tickers, start, interval="1d", limiter=None):
+    limiter = limiter or LIMITER
+    provider = providers.current()
+    empty = 0
+    for attempt in range(FETCH_TRIES):
+        # 기록 재생(offline)은 속도 제한/재시도 없이 디스크에서 바로
+        if not provider.offline:
+            METRICS.add("fetch.limiter_wait", limiter.acquire())
         try:
-            data = yf.download(
-                tickers=tickers,
-                start=start,
-                interval=interval,
-                group_by="ticker",
-                auto_adjust=False,
-                threads=True,
-                progress=False,
-            )
+            with METRICS.timer("net.yf_download"):
+                data = provider.download(tickers, start, interval)
             if data is not None and not data.empty:
+                limiter.success()
                 return data
+            if provider.offline:
+                return pd.DataFrame()
+            empty += 1
+            METRICS.count("fetch.empty")
+            if empty >= EMPTY_TRIES:
+                return pd.DataFrame()
+            print(f"[fetch_chunk] empty {empty}/{EMPTY_TRIES} (rate {limiter.rate:.2f}/s)")
+            continue
         except Exception as e:
-            print(f"[fetch_chunk] retry {attempt+1}/3: {e}")
-            time.sleep(1.5)
+            if provider.offline:
+                raise
+            print(f"[fetch_chunk] retry {attempt+1}/{FETCH_TRIES}: {e}")
+        METRICS.count("fetch.retry")
+        limiter.failure()
     return pd.DataFrame()
 
+# 종목 하나를 DataFrame 으로(원본 프레임을 건드리지 않음). 청크 전체는 _extract_all(Bars)
 def extract_single_ticker_df(data, ticker):
+    cols = ["Open","High","Low","Close","Volume"]
     try:
         if isinstance(data.columns, pd.MultiIndex):
             if ticker not in data.columns.get_level_values(0):
                 return pd.DataFrame()
-            sub = data[ticker]
-            cols = ["Open","High","Low","Close","Volume"]
-            for c in cols:
-                if c not in sub.columns:
-                    sub[c] = np.nan
-            return sub[cols].dropna()
-        else:
-            cols = ["Open","High","Low","Close","Volume"]
-            for c in cols:
-                if c not in data.columns:
-                    data[c] = np.nan
-            return data[cols].dropna()
+            return data[ticker].reindex(columns=cols).dropna()
+        return data.reindex(columns=cols).dropna()
     except Exception:
         return pd.DataFrame()
 
+def _extract_all(data, tickers):
+    return bars_from_download(data, tickers)
+
+# {ticker: Bars}. 평가 직전에 DataFrame 으로 바꾸므로 대기열(pipeline)의 청크는 압축 배열로 들고 있다
+def fetch_frames(batch, start, interval="1d", store=None):
+    # 저장소가 없으면 매번 전체 기간 다운로드
+    if store is None:
+        return _extract_all(fetch_chunk(batch, start=start, interval=interval), batch)
+
+    frames = {}
+    stored = {t: store.load(t) for t in batch}
+    # 저장본이 요청 시작일을 덮지 못하면 전체 수집, 아니면 마지막 저장일 이후만 수집
+    full = [t for t in batch if stored[t].empty or not store.covers(t, start)]
+    incr = [t for t in batch if t not in full]
+
+    if incr:
+        last = min(stored[t].index[-1] for t in incr)
+        data = fetch_chunk(incr, start=last - timedelta(days=OVERLAP_DAYS), interval=interval)
+        new = _extract_all(data, incr)
+        for t in incr:
+            if t not in new:
+                # 증분 수집 실패(제한/재시도 소진): 저장된 히스토리로 평가
+                METRICS.count("fetch.stale")
+                frames[t] = Bars.from_frame(since(stored[t], start))
+                continue
+            merged, revised = store.merge(stored[t], new[t].frame())
+            if revised:
+                full.append(t)
+                continue
+            store.save(t, merged)
+            frames[t] = Bars.from_frame(since(merged, start))
+
+    if full:
+        data = fetch_chunk(full, start=start, interval=interval)
+        for t, df in _extract_all(data, full).items():
+            if df is not None and not df.empty:
+                store.save(t, df, fetched_from=start)
+            frames[t] = df
+    store.flush()
+    return frames
+
+def open_store(cfg):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    root = scan_cfg.get("store_dir")
+    if not root:
+        return None
+    return BarStore(str(root), interval=str(scan_cfg.get("interval", "1d")))
+
+# 평가 경로가 상태에서 꺼내 쓰는 지표 종류(None: 전부). 워커는 캐시를 공유하지 않아 쓰지 않고,
+# 패널은 행렬로 한 번에 계산하므로 종목별 주봉만 쓴다
+def state_names(engine="ticker", workers=0):
+    if workers > 0:
+        return ()
+    return ("weekly",) if engine == "panel" else None
+
+# 종목별 증분 지표 상태(scan.state_dir). STATE_VERIFY=1 이면 배치 계산과 대조
+# names 로 유지할 지표를 제한하고, 쓰는 지표가 없으면(names=()) 상태를 열지 않는다
+def open_states(cfg, names=None):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    root = scan_cfg.get("state_dir")
+    if not root or names == ():
+        return None
+    return StateStore(str(root), str(scan_cfg.get("interval", "1d")), cfg, verify=os.getenv("STATE_VERIFY", "") == "1", names=names)
+
+def _seed_states(states, valid, cfg, names=None, plan=None):
+    with METRICS.timer("stage.state"):
+        for t, df in valid.items():
+            try:
+                states.seed(CACHE, t, df, cfg, names=names, plan=plan)
+            except Exception as e:
+                print(f"[{t}] state error: {e}")
+
 def market_cap_fetcher_krx(ticker):
     try:
-        tk = yf.Ticker(ticker)
-        fi = getattr(tk, "fast_info", None)
-        if fi and getattr(fi, "market_cap", None):
-            return float(fi.market_cap)
-        info = tk.info or {}
-        return float(info.get("marketCap")) if "marketCap" in info else None
+        with METRICS.timer("net.yf_market_cap"):
+            return providers.current().market_cap(ticker)
     except Exception:
         return None
 
-def scan_and_collect(tickers, cfg):
+# 알림 원장(scan.ledger_path, SQLite): 이미 보낸 알림 억제 + 렌더한 차트 보관
+def open_ledger(cfg):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    path = scan_cfg.get("ledger_path")
+    if not path:
+        return None
+    return AlertLedger(str(path), cooldown_days=int(scan_cfg.get("alert_cooldown_days", 0) or 0),
+                       chart_days=float(scan_cfg.get("chart_cache_days", 3)))
+
+def open_market_caps(cfg):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    return MarketCapProvider(cache_dir=scan_cfg.get("cache_dir") or None, fallback=market_cap_fetcher_krx,
+                             loader=lambda: load_krx_market_caps(cfg))
+
+# 종목명 fallback 캐시(scan.name_cache_path, 기본 cache_dir/names.json). 둘 다 없으면 None(매번 조회)
+def open_names(cfg):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    path = scan_cfg.get("name_cache_path") or (os.path.join(str(scan_cfg["cache_dir"]), "names.json") if scan_cfg.get("cache_dir") else None)
+    if not path:
+        return None
+    return NameCache(str(path), ttl_days=float(scan_cfg.get("name_cache_days", 30)))
+
+# 결과는 차트에 필요한 꼬리(260봉 + 일목 선행스팬B 52봉)만 사본으로 보관
+RESULT_BARS = 260 + 52
+
+# costs: 종목별로 따로 잰 시간(on_match 차트/전송)을 더할 dict
+def _record(t, df, findings, stats, per_signal, results, on_match=None, costs=None):
+    if findings:
+        stats["matched"] += 1
+        for f in findings:
+            per_signal[f["name"]] = per_signal.get(f["name"], 0) + 1
+        results.append((t, Bars.from_frame(df.iloc[-RESULT_BARS:]), findings))
+        if on_match is not None:
+            t0 = time.monotonic()
+            on_match(t, df, findings)
+            if costs is not None:
+                costs[t] = costs.get(t, 0.0) + time.monotonic() - t0
+
+def evaluate_batch(batch, frames, cfg, stats, per_signal, results, engine="ticker", market_cap_fetcher=market_cap_fetcher_krx, pool=None, on_match=None, states=None, costs=None, plan=None):
+    if plan is None:
+        plan = compile_plan(cfg)
+    valid = {}
+    for t in batch:
+        df = frames.get(t)
+        # 히스토리 길이는 신호별 LOOKBACK 으로 판정(run_signals / run_signals_panel)
+        if df is None or df.empty:
+            stats["empty"] += 1
+            continue
+        stats["ok"] += 1
+        valid[t] = as_frame(df)
+
+    if pool is not None and valid:
+        # 워커는 캐시를 공유하지 않으므로 상태를 쓰지 않는다(open_states(cfg, state_names(...)) 이면 None)
+        for t, findings, err in pool.evaluate(valid):
+            if err is not None:
+                stats["errors"] += 1
+                print(f"[{t}] signal error: {err}")
+                continue
+            _record(t, valid[t], findings, stats, per_signal, results, on_match, costs)
+        return
+
+    if engine == "panel" and valid:
+        # 패널은 행렬로 한 번에 계산하므로 상태에서는 종목별 주봉만 가져온다
+        if states is not None:
+            _seed_states(states, valid, cfg, names=("weekly",), plan=plan)
+        try:
+            found = run_signals_panel(valid, cfg, market_cap_fetcher=market_cap_fetcher, cache=CACHE, plan=plan)
+        except Exception as e:
+            # 패널 실패 시 종목별 경로로 재평가
+            print(f"[panel] error, fallback to per-ticker: {e}")
+        else:
+            for t, df in valid.items():
+                _record(t, df, found.get(t), stats, per_signal, results, on_match, costs)
+                if not found.get(t):
+                    CACHE.evict(t)
+            return
+    elif states is not None:
+        _seed_states(states, valid, cfg, plan=plan)
+
+    for t, df in valid.items():
+        findings = None
+        try:
+            findings = run_signals(df, cfg, ticker=t, market_cap_fetcher=market_cap_fetcher, cache=CACHE, plan=plan)
+            _record(t, df, findings, stats, per_signal, results, on_match, costs)
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"[{t}] signal error: {e}")
+        # 알림 대상은 차트에서 지표를 재사용하므로 notify 이후에 비움
+        if not findings:
+            CACHE.evict(t)
+
+def _iter_chunks(tickers, start, interval, store):
+    for i in range(0, len(tickers), CHUNK_SIZE):
+        batch = tickers[i:i+CHUNK_SIZE]
+        t0 = time.monotonic()
+        with METRICS.timer("stage.fetch"):
+            frames = fetch_frames(batch, start, interval=interval, store=store)
+        secs = time.monotonic() - t0
+        yield batch, frames, secs, 0, secs
+
+# 청크 N 평가 중에 N+1 을 미리 받는 파이프라인(최대 depth 개까지 대기열에 적재)
+def _iter_chunks_pipelined(tickers, start, interval, store, depth=2):
+    q = queue.Queue(maxsize=max(1, depth))
+    done = object()
+
+    def producer():
+        try:
+            for i in range(0, len(tickers), CHUNK_SIZE):
+                batch = tickers[i:i+CHUNK_SIZE]
+                t0 = time.monotonic()
+                with METRICS.timer("stage.fetch"):
+                    frames = fetch_frames(batch, start, interval=interval, store=store)
+                q.put((batch, frames, time.monotonic() - t0))
+        except Exception as e:
+            print(f"[pipeline] fetch error: {e}")
+        finally:
+            q.put(done)
+
+    th = threading.Thread(target=producer, name="scan-fetch", daemon=True)
+    th.start()
+    while True:
+        t0 = time.monotonic()
+        item = q.get()
+        wait = time.monotonic() - t0
+        if item is done:
+            break
+        yield item[0], item[1], wait, q.qsize(), item[2]
+    th.join()
+
+# 1단계: 최근 몇 봉(스냅샷)만 큰 청크로 받아 신호별 필요조건으로 거른다. (통과 종목, 선별 통계)
+# 스냅샷이 비었거나 선별할 수 없는 신호(선언형 전략 포함)가 켜져 있으면 그대로 통과. 조건이 일봉 기준이라 1d 에서만 동작
+# 스냅샷은 저장소(BarStore)를 거치지 않는다. 저장소가 없는 종목은 스냅샷 시작일로만 덮여(covers) 2단계에서
+# 어차피 전체를 다시 받으므로, 전 종목의 짧은 스냅샷 파일을 쓰는 것은 쓰기 비용일 뿐이다
+def prescreen(tickers, cfg, market_caps=None, plan=None):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    interval = str(scan_cfg.get("interval", "1d"))
+    plan = plan or compile_plan(cfg)
+    params = plan.params
+    bars = snapshot_bars(params)
+    if bars is None or plan.strategies or not tickers or interval != "1d":
+        return tickers, None
+    start = datetime.utcnow() - timedelta(days=int(bars * 365 / 240) + 14)
+    size = int(scan_cfg.get("prescreen_chunk", 250))
+    caps = market_caps.load() if market_caps is not None else None
+    passed = set()
+    per_signal = {key: 0 for key, _ in params}
+    empty = 0
+    t0 = time.monotonic()
+    with METRICS.timer("stage.prescreen"):
+        for i in range(0, len(tickers), size):
+            batch = tickers[i:i+size]
+            frames = fetch_frames(batch, start, interval=interval)
+            keep, ps = prescreen_frames(frames, params, caps)
+            missing = {t for t in batch if frames.get(t) is None or frames[t].empty}
+            empty += len(missing)
+            passed |= keep | missing
+            for k, n in ps.items():
+                per_signal[k] += n
+    out = [t for t in tickers if t in passed]
+    METRICS.count("prescreen.total", len(tickers))
+    METRICS.count("prescreen.passed", len(out))
+    info = {"bars": bars, "total": len(tickers), "passed": len(out), "no_snapshot": empty,
+            "selectivity": round(len(out) / len(tickers), 4), "per_signal": per_signal,
+            "seconds": round(time.monotonic() - t0, 3)}
+    print(f"[prescreen] {len(out)}/{len(tickers)} 통과 ({info['selectivity']:.1%}, 스냅샷 {bars}봉) {per_signal}")
+    return out, info
+
+# on_match(ticker, df, findings): 매칭 즉시 호출(스캔 중 알림 전송용)
+def scan_and_collect(tickers, cfg, on_match=None):
     scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
     interval = str(scan_cfg.get("interval", "1d"))
-    lookback_days = int(scan_cfg.get("lookback_days", 2200))
+    # 활성 신호(및 차트 260봉)가 요구하는 만큼만 수집
+    lookback_days = history_days(cfg, extra_bars=260 if scan_cfg.get("send_chart", True) else 0)
     start = datetime.utcnow() - timedelta(days=lookback_days)
+    engine = str(scan_cfg.get("engine", "ticker")).lower()
+    pipeline = bool(scan_cfg.get("pipeline", False))
+    # 신호 파라미터/창/선언형 전략은 여기서 한 번만 해석해 모든 청크에 넘긴다
+    plan = compile_plan(cfg)
 
     stats = {"total": len(tickers), "ok": 0, "empty": 0, "matched": 0, "errors": 0}
     per_signal = {}
+    chunks = []
+
+    workers = int(scan_cfg.get("workers", 0) or 0)
+    store = open_store(cfg)
+    states = open_states(cfg, state_names(engine, workers))
+    market_caps = open_market_caps(cfg)
+
+    # 종목별 비용(초): 청크 수집/평가 시간을 종목 수로 나눈 몫 + 종목별로 잰 시간(시가총액 조회, 알림).
+    # 다음 실행의 샤드 분배(sharding.cost_shards)에 쓴다
+    costs = {}
+
+    # 2단계: 선별을 통과한 종목만 전체 히스토리 수집/평가
+    if scan_cfg.get("prescreen", False):
+        all_tickers = tickers
+        tickers, stats["prescreen"] = prescreen(tickers, cfg, market_caps=market_caps, plan=plan)
+        if stats["prescreen"]:
+            share = stats["prescreen"]["seconds"] / max(1, len(all_tickers))
+            costs = {t: share for t in all_tickers}
+
+    if pipeline:
+        it = _iter_chunks_pipelined(tickers, start, interval, store, depth=int(scan_cfg.get("queue_depth", 2)))
+    else:
+        it = _iter_chunks(tickers, start, interval, store)
+
+    pool = SignalPool(cfg, workers, chunk=int(scan_cfg.get("worker_chunk", 16)), market_caps=market_caps) if workers > 0 else None
 
     results = []
-    for i in range(0, len(tickers), CHUNK_SIZE):
-        batch = tickers[i:i+CHUNK_SIZE]
-        data = fetch_chunk(batch, start=start, interval=interval)
-        if data is None or data.empty:
-            time.sleep(CHUNK_PAUSE)
-            continue
-        for t in batch:
-            df = extract_single_ticker_df(data, t)
-            if df is None or df.empty or len(df) < 260:
-                stats["empty"] += 1
-                continue
-            stats["ok"] += 1
-            try:
-                findings = run_signals(df, cfg, ticker=t, market_cap_fetcher=market_cap_fetcher_krx)
-                if findings:
-                    stats["matched"] += 1
-                    for f in findings:
-                        per_signal[f["name"]] = per_signal.get(f["name"], 0) + 1
-                    results.append((t, df, findings))
-            except Exception as e:
-                stats["errors"] += 1
-                print(f"[{t}] signal error: {e}")
-        time.sleep(CHUNK_PAUSE)
+    try:
+        for batch, frames, wait, depth, fetch_s in it:
+            # wait: 평가 쪽이 데이터를 기다린 시간, queue_depth: 꺼낸 뒤 대기열에 남은 청크 수
+            chunks.append({"size": len(batch), "queue_depth": depth, "wait_s": round(wait, 3), "fetch_rate": round(LIMITER.rate, 3)})
+            METRICS.add("stage.fetch_wait", wait)
+            extra = {}
+            t0 = time.monotonic()
+            if frames:
+                # 스트리밍 알림(on_match)의 차트 렌더링 시간도 포함
+                with METRICS.timer("stage.evaluate"):
+                    evaluate_batch(batch, frames, cfg, stats, per_signal, results, engine=engine, market_cap_fetcher=market_caps, pool=pool, on_match=on_match, states=states, costs=extra, plan=plan)
+            for t in batch:
+                if t in market_caps.spent:
+                    extra[t] = extra.get(t, 0.0) + market_caps.spent[t]
+            share = (fetch_s + max(0.0, time.monotonic() - t0 - sum(extra.values()))) / len(batch)
+            for t in batch:
+                costs[t] = costs.get(t, 0.0) + share + extra.get(t, 0.0)
+    finally:
+        if pool is not None:
+            pool.close()
     stats["per_signal"] = per_signal
+    stats["chunks"] = chunks
+    # 조건별 평가/통과 수(워커 실행분은 SignalPool 이 작업마다 합쳐 온다)
+    stats["conditions"] = condition_stats()
+    stats["costs"] = {t: round(c, 4) for t, c in costs.items()}
     return results, stats
 
 def _kst_now_str():
@@ -118,24 +408,32 @@ def format_header_kst(stats, shard_info=""):
     ]
     return "\n".join(lines)
 
-def resolve_display_name(ticker, name_map=None):
+# 이름: name_map(유니버스 스냅샷) → names(NameCache, 이전 실행의 야후 조회 결과) → 야후 조회 후 names 에 저장
+def resolve_display_name(ticker, name_map=None, names=None):
     if name_map:
         if ticker in name_map:
             return name_map[ticker]
         code = ticker.split(".")[0]
         if code in name_map:
             return name_map[code]
+    if names is not None:
+        nm = names.get(ticker)
+        if nm:
+            METRICS.count("names.cache_hit")
+            return nm
     try:
-        info = yf.Ticker(ticker).info or {}
-        nm = info.get("shortName") or info.get("longName")
+        with METRICS.timer("net.yf_info"):
+            nm = providers.current().name(ticker)
         if nm:
+            if names is not None:
+                names.put(ticker, nm)
             return str(nm)
     except Exception:
         pass
     return ticker
 
-def build_caption(ticker, df, findings, name_map=None):
-    name = resolve_display_name(ticker, name_map)
+def build_caption(ticker, df, findings, name_map=None, name=None):
+    name = name or resolve_display_name(ticker, name_map)
     code = ticker.split(".")[0]
     last_open = df["Open"].iloc[-1]
     last_close = df["Close"].iloc[-1]
@@ -145,36 +443,158 @@ def build_caption(ticker, df, findings, name_map=None):
     ]
     return "\n".join(lines)
 
-def notify_results(results, stats, cfg, tg_send_msg, tg_send_photo, shard_info="", name_map=None):
+CLOUD = "cloud_pullback_rebreak_full"
+
+# 구름돌파 신호가 본 꼬리 view 와 일목 파라미터(plan 이 없거나 신호가 꺼져 있으면 기본값)
+def _cloud_view(df, plan=None):
+    if plan is not None and CLOUD in plan.windows:
+        kw, window = dict(plan.params)[CLOUD], plan.windows[CLOUD][1]
+    else:
+        kw = SIGNALS[CLOUD][1]({})
+        window = signal_window(CLOUD, kw)[1]
+    params = (kw["tenkan"], kw["kijun"], kw["senkou_b"], kw["displacement"])
+    return (df.iloc[-window:] if len(df) > window else df), params
+
+# 차트의 일목은 신호와 같은 view·파라미터로 CACHE 를 조회해 신호가 계산한 값을 그대로 쓴다(종목당 한 번)
+def chart_job_for(ticker, df, findings, name_map=None, name=None, plan=None):
+    from .chart import chart_job
+    title = f"{name or resolve_display_name(ticker, name_map)} ({ticker.split('.')[0]}) (1D)"
+    s1 = next((f for f in findings if "구름돌파-조정-재돌파" in f["name"]), None)
+    if s1 and s1.get("extras",{}).get("resistance") is not None:
+        view, p = _cloud_view(df, plan)
+        ich = CACHE.get(ticker, view, "ichimoku", p, lambda: ichimoku(view, *p))
+        return chart_job(view, title, tail=260, ich=ich, resistance=s1["extras"]["resistance"])
+    return chart_job(df, title, tail=220)
+
+def telegram_credentials(cfg):
     tele_cfg = (cfg.get("telegram") or {}) if isinstance(cfg, dict) else {}
-    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
     token = os.getenv("TELEGRAM_BOT_TOKEN", tele_cfg.get("bot_token",""))
     chat_id = os.getenv("TELEGRAM_CHAT_ID", tele_cfg.get("chat_id",""))
-    send_chart = bool(scan_cfg.get("send_chart", True))
-    max_alerts = int(scan_cfg.get("max_alerts_per_run", 200))
-
     if not token or not chat_id:
         raise RuntimeError("텔레그램 토큰/chat_id가 설정되어 있지 않습니다.")
+    return token, chat_id
+
+# 스캔 중 매칭되는 즉시 차트를 그려 전송 큐(TelegramDelivery)에 넣는다.
+# 헤더(최다 신호)는 스캔이 끝나야 알 수 있으므로 finish 에서 완료 메시지와 함께 보낸다.
+class StreamingNotifier:
+    def __init__(self, cfg, delivery, name_map=None):
+        scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+        self.delivery = delivery
+        self.name_map = name_map
+        self.send_chart = bool(scan_cfg.get("send_chart", True))
+        self.max_alerts = int(scan_cfg.get("max_alerts_per_run", 200))
+        self.dpi = int(scan_cfg.get("chart_dpi", 160))
+        self.fmt = str(scan_cfg.get("chart_format", "png"))
+        self.ledger = open_ledger(cfg)
+        self.names = open_names(cfg)
+        self.renderer = None
+        self.plan = compile_plan(cfg)
+        self.sent = 0
+
+    def __call__(self, ticker, df, findings):
+        if self.sent >= self.max_alerts:
+            return
+        date = bar_date(df)
+        if self.ledger is not None:
+            findings = self.ledger.fresh(ticker, date, findings)
+            if not findings:
+                CACHE.evict(ticker)
+                return
+        name = resolve_display_name(ticker, self.name_map, self.names)
+        cap = build_caption(ticker, df, findings, name=name)
+        if self.send_chart:
+            job = chart_job_for(ticker, df, findings, name=name, plan=self.plan)
+            key = job_key(job, self.dpi, self.fmt) if self.ledger is not None else None
+            img = self.ledger.chart(ticker, date, key) if key else None
+            if img is None:
+                if self.renderer is None:
+                    from .chart import ChartRenderer
+                    self.renderer = ChartRenderer(dpi=self.dpi, fmt=self.fmt)
+                with METRICS.timer("stage.chart"):
+                    img = self.renderer.render(job)
+                if key:
+                    self.ledger.put_chart(ticker, date, key, img, self.fmt)
+        # 원장 기록은 전송이 확인된 뒤(전송 스레드). 끝내 못 보낸 알림은 다음 실행에서 다시 나간다
+        on_sent = (lambda: self.ledger.record(ticker, date, findings)) if self.ledger is not None else None
+        if self.send_chart:
+            self.delivery.send_photo(img, caption=cap, on_sent=on_sent)
+        else:
+            self.delivery.send_message(cap, on_sent=on_sent)
+        CACHE.evict(ticker)
+        self.sent += 1
+
+    def finish(self, stats, shard_info="", footer=None):
+        self.delivery.send_message(format_header_kst(stats, shard_info) + f"\n완료: 알림 {self.sent}건{_suppressed_note(self.ledger, stats)}\n{footer or METRICS.compact()}")
+        stats["telegram"] = self.delivery.close()
+        if self.ledger is not None:
+            self.ledger.close()
+        if self.names is not None:
+            self.names.save()
+        CACHE.clear()
+
+def _suppressed_note(ledger, stats):
+    if ledger is None:
+        return ""
+    stats["suppressed"] = ledger.suppressed
+    return f" (중복 {ledger.suppressed}건 제외)" if ledger.suppressed else ""
+
+def notify_results(results, stats, cfg, tg_send_msg, tg_send_photo, shard_info="", name_map=None, footer=None):
+    scan_cfg = (cfg.get("scan") or {}) if isinstance(cfg, dict) else {}
+    send_chart = bool(scan_cfg.get("send_chart", True))
+    max_alerts = int(scan_cfg.get("max_alerts_per_run", 200))
+    token, chat_id = telegram_credentials(cfg)
 
     header = format_header_kst(stats, shard_info)
     tg_send_msg(token, chat_id, header)
 
+    # 이미 보낸 알림은 차트를 그리기 전에 거른다
+    ledger = open_ledger(cfg)
+    todo = []
+    for ticker, df, findings in results:
+        if ledger is not None:
+            findings = ledger.fresh(ticker, bar_date(df), findings)
+            if not findings:
+                continue
+        todo.append((ticker, df, findings))
+    todo = todo[:max_alerts]
+    # 종목명은 알림당 한 번(캡션/차트 제목 공용)
+    names = open_names(cfg)
+    labels = [resolve_display_name(t, name_map, names) for t, _, _ in todo]
+    if names is not None:
+        names.save()
+    imgs = []
+    if send_chart:
+        dpi, fmt = int(scan_cfg.get("chart_dpi", 160)), str(scan_cfg.get("chart_format", "png"))
+        jobs = []
+        plan = compile_plan(cfg)
+        for (ticker, df, findings), name in zip(todo, labels):
+            jobs.append(chart_job_for(ticker, as_frame(df), findings, name=name, plan=plan))
+            CACHE.evict(ticker)
+        keys = [job_key(j, dpi, fmt) for j in jobs] if ledger is not None else [None] * len(jobs)
+        imgs = [ledger.chart(t, bar_date(df), k) if k else None for (t, df, _), k in zip(todo, keys)]
+        miss = [i for i, img in enumerate(imgs) if img is None]
+        from .chart import render_batch
+        with METRICS.timer("stage.chart_batch"):
+            rendered = render_batch([jobs[i] for i in miss], workers=int(scan_cfg.get("chart_workers", 0) or 0), dpi=dpi, fmt=fmt)
+        for i, img in zip(miss, rendered):
+            imgs[i] = img
+            if keys[i]:
+                ledger.put_chart(todo[i][0], bar_date(todo[i][1]), keys[i], img, fmt)
+
     sent = 0
-    for (ticker, df, findings) in results:
-        if sent >= max_alerts: break
-        cap = build_caption(ticker, df, findings, name_map=name_map)
+    for i, (ticker, df, findings) in enumerate(todo):
+        cap = build_caption(ticker, as_frame(df), findings, name=labels[i])
         if send_chart:
-            s1 = next((f for f in findings if "구름돌파-조정-재돌파" in f["name"]), None)
-            if s1 and s1.get("extras",{}).get("resistance") is not None:
-                title = f"{resolve_display_name(ticker, name_map)} ({ticker.split('.')[0]}) (1D)"
-                img = render_chart_png_bytes_with_ichimoku(df.tail(260), title=title, resistance=s1["extras"]["resistance"])
-            else:
-                title = f"{resolve_display_name(ticker, name_map)} ({ticker.split('.')[0]}) (1D)"
-                img = render_chart_png_bytes(df.tail(220), title=title)
-            tg_send_photo(token, chat_id, img, caption=cap)
+            tg_send_photo(token, chat_id, imgs[i], caption=cap)
         else:
             tg_send_msg(token, chat_id, cap)
+        if ledger is not None:
+            ledger.record(ticker, bar_date(df), findings)
         sent += 1
         time.sleep(0.5)
 
-    tg_send_msg(token, chat_id, f"완료: 알림 {sent}건")
+    CACHE.clear()
+    note = _suppressed_note(ledger, stats)
+    if ledger is not None:
+        ledger.close()
+    tg_send_msg(token, chat_id, f"완료: 알림 {sent}건{note}\n{footer or METRICS.compact()}")
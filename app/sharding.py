@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+# 샤드 분배. 이전 실행에서 잰 종목별 비용(scan_and_collect 의 stats["costs"])을 누적한 파일을
+# 모든 샤드가 똑같이 읽어 같은 분배를 계산한다(파일은 병합 단계 app.merge 또는 단일 실행에서만 갱신).
+#   {"costs": {ticker: 초(EWMA)}, "assign": {ticker: 샤드}}
+# 분배는 직전 분배(없으면 i % N)에서 출발해 부하 차이가 tol 이하가 될 때까지 가장 적게 옮긴다.
+# 샤드별 저장소 캐시(data/bars)가 그대로 맞도록 종목을 되도록 같은 샤드에 둔다.
+
+def load_costs(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f) or {}
+        return {"costs": dict(data.get("costs") or {}), "assign": dict(data.get("assign") or {})}
+    except Exception:
+        return {"costs": {}, "assign": {}}
+
+# 새 비용을 EWMA 로 합치고 이번 분배를 기록
+def save_costs(path, costs, assign=None, alpha=0.5):
+    data = load_costs(path)
+    old = data["costs"]
+    for t, c in costs.items():
+        old[t] = round(float(c) if t not in old else alpha * float(c) + (1 - alpha) * float(old[t]), 4)
+    if assign is not None:
+        data["assign"] = dict(assign)
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp, path)
+    return data
+
+# 샤드 간에 같은 입력을 봤는지 확인하는 짧은 해시
+def costs_digest(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:10]
+
+def modulo_shards(tickers, tot):
+    return [[x for i, x in enumerate(tickers) if i % tot == k] for k in range(tot)]
+
+# 비용 균형 분배. 반환: 샤드별 종목 리스트(원래 순서 유지)
+def cost_shards(tickers, costs, tot, prev=None, tol=0.05):
+    if tot <= 1:
+        return [list(tickers)]
+    known = [costs[t] for t in tickers if t in costs]
+    default = float(np.median(known)) if known else 1.0
+    cost = {t: float(costs.get(t, default)) for t in tickers}
+    prev = prev or {}
+    assign = {}
+    loads = [0.0] * tot
+    new = []
+    for i, t in enumerate(tickers):
+        k = prev.get(t) if prev else i % tot
+        if isinstance(k, int) and 0 <= k < tot:
+            assign[t] = k
+            loads[k] += cost[t]
+        else:
+            new.append(t)
+    # 신규 종목은 비용 큰 순으로 가장 가벼운 샤드에
+    for t in sorted(new, key=lambda x: -cost[x]):
+        k = int(np.argmin(loads))
+        assign[t] = k
+        loads[k] += cost[t]
+    members = [[t for t in tickers if assign[t] == k] for k in range(tot)]
+    target = tol * sum(loads) / tot
+    for _ in range(len(tickers)):
+        hi, lo = int(np.argmax(loads)), int(np.argmin(loads))
+        gap = loads[hi] - loads[lo]
+        if gap <= target:
+            break
+        # 옮겼을 때 두 샤드 차이가 가장 줄어드는 종목(비용이 gap/2 에 가장 가까운 것)
+        cand = [t for t in members[hi] if cost[t] < gap]
+        if not cand:
+            break
+        t = min(cand, key=lambda x: abs(gap / 2 - cost[x]))
+        members[hi].remove(t)
+        members[lo].append(t)
+        assign[t] = lo
+        loads[hi] -= cost[t]
+        loads[lo] += cost[t]
+    order = {t: i for i, t in enumerate(tickers)}
+    return [sorted(m, key=order.get) for m in members]
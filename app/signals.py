@@ -1,5 +1,33 @@
+import time
 import numpy as np
-from .indicators import ichimoku, bbands, dmi_dx, to_weekly
+from .indicators import ichimoku, bbands, dmi_dx, sma, to_weekly, cached
+from .metrics import METRICS
+from .dsl import compile_strategies, frame_findings
+
+def _sma_close(df, window, cache=None, ticker=None):
+    return cached(cache, ticker, df, "sma", ("Close", window), lambda: sma(df["Close"], window))
+
+# 조건을 쓰는 순간 한 번만 계산하는 중간값(지표, 이벤트 탐색 결과 등). 이름 → 인자 없는 함수
+class _Lazy:
+    def __init__(self, **makers):
+        self._makers = makers
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = self._makers[name]()
+        setattr(self, name, value)
+        return value
+
+# 조건을 order(기본 CONDITION_ORDER) 순으로 평가해 첫 거짓에서 멈춘다.
+# 평가/통과 횟수는 METRICS 카운터 cond.<신호>.<조건> / cond.<신호>.<조건>.pass
+def _passes(key, conds, order=None):
+    for name in order or CONDITION_ORDER[key]:
+        METRICS.count(f"cond.{key}.{name}")
+        if not conds[name]():
+            return False
+        METRICS.count(f"cond.{key}.{name}.pass")
+    return True
 
 # 1) 구름돌파-조정-재돌파(저항+BB55+물량: 검색당일 ≥ 조정평균×배수)
 def signal_cloud_pullback_rebreak_full(
@@ -7,105 +35,121 @@ def signal_cloud_pullback_rebreak_full(
     tenkan=9, kijun=26, senkou_b=52, displacement=26,
     retrace="into", min_gap_bars=3, min_retrace_bars=1, require_open_cross=True,
     resistance_mode="swing_high", use_open_for_now=True,
-    bb_window=55, bb_k=2.0, retrace_vol_mult=2.0
+    bb_window=55, bb_k=2.0, retrace_vol_mult=2.0,
+    cache=None, ticker=None, order=None
 ):
     out = {"name": "구름돌파-조정-재돌파(저항+BB55+물량)", "trigger": False, "detail": ""}
 
     need = max(senkou_b, kijun) + 80
     if len(df) < need: return out
 
-    ich = ichimoku(df, tenkan, kijun, senkou_b, displacement)
-    cloud_top = np.maximum(ich["span_a_now"], ich["span_b_now"])
-    cloud_bot = np.minimum(ich["span_a_now"], ich["span_b_now"])
-    prev_top = cloud_top.shift(1)
-
-    if require_open_cross:
-        breakout_up = (df["Open"] > cloud_top) & (df["Close"].shift(1) <= prev_top)
-    else:
-        breakout_up = (df["Close"] > cloud_top) & (df["Close"].shift(1) <= prev_top)
-
-    retrace_mask = (df["Close"] < cloud_bot) if retrace == "below" else (df["Close"] <= cloud_top)
-
-    events = np.where(breakout_up.fillna(False).values)[0]
-    if len(events) < 2 or events[-1] != len(df) - 1:
-        return out
-
-    e2 = events[-1]
-    idx1 = retrace_start = None
-    resist = np.nan
-
-    for e1 in reversed(events[:-1]):
-        if e2 - e1 <= max(1, int(min_gap_bars)): continue
-        seg = retrace_mask.iloc[e1+1:e2]
-        if seg.sum() >= int(min_retrace_bars):
-            first_rel = np.where(seg.values)[0][0]
-            retrace_start = e1 + 1 + first_rel
-            if resistance_mode == "bar_high":
-                resist = float(df["High"].iloc[e1])
-            else:
-                resist = float(df["High"].iloc[e1:retrace_start].max())
-            idx1 = e1
-            break
-    if idx1 is None: return out
-
-    now_price = float(df["Open"].iloc[-1]) if use_open_for_now else float(df["Close"].iloc[-1])
-    prev_price = float(df["Open"].iloc[-2]) if use_open_for_now else float(df["Close"].iloc[-2])
-
-    cond_res_break = now_price > resist and prev_price <= resist
-
-    _, _, bb_up = bbands(df["Close"], window=int(bb_window), k=float(bb_k))
-    prev_bb_up = bb_up.iloc[-2]
-    cond_bb = (now_price > bb_up.iloc[-1]) and (prev_price <= (prev_bb_up if not np.isnan(prev_bb_up) else np.inf))
-
+    price = df["Open"] if use_open_for_now else df["Close"]
+    now_price, prev_price = float(price.iloc[-1]), float(price.iloc[-2])
+    e2 = len(df) - 1
+
+    # 구름 상향돌파 이벤트 위치와 조정 구간 마스크
+    def cloud():
+        ich = cached(cache, ticker, df, "ichimoku", (tenkan, kijun, senkou_b, displacement),
+                     lambda: ichimoku(df, tenkan, kijun, senkou_b, displacement))
+        cloud_top = np.maximum(ich["span_a_now"], ich["span_b_now"])
+        cloud_bot = np.minimum(ich["span_a_now"], ich["span_b_now"])
+        prev_top = cloud_top.shift(1)
+        cross = df["Open"] if require_open_cross else df["Close"]
+        breakout_up = (cross > cloud_top) & (df["Close"].shift(1) <= prev_top)
+        retrace_mask = (df["Close"] < cloud_bot) if retrace == "below" else (df["Close"] <= cloud_top)
+        return np.where(breakout_up.fillna(False).values)[0], retrace_mask
+
+    # 마지막 봉(2차 돌파) 이전의 1차 돌파 + 조정 구간 → (1차 돌파 위치, 조정 시작, 저항) 또는 None
+    def pullback():
+        events, retrace_mask = v.cloud
+        for e1 in reversed(events[:-1]):
+            if e2 - e1 <= max(1, int(min_gap_bars)): continue
+            seg = retrace_mask.iloc[e1+1:e2]
+            if seg.sum() >= int(min_retrace_bars):
+                retrace_start = e1 + 1 + np.where(seg.values)[0][0]
+                if resistance_mode == "bar_high":
+                    resist = float(df["High"].iloc[e1])
+                else:
+                    resist = float(df["High"].iloc[e1:retrace_start].max())
+                return e1, retrace_start, resist
+        return None
+
+    def retrace_avg():
+        retrace_start = v.pullback[1]
+        return float(df["Volume"].iloc[retrace_start:e2].mean()) if (e2 - retrace_start) >= 1 else 0.0
+
+    def bb_up():
+        return cached(cache, ticker, df, "bbands", (int(bb_window), float(bb_k)),
+                      lambda: bbands(df["Close"], window=int(bb_window), k=float(bb_k)))[2]
+
+    v = _Lazy(cloud=cloud, pullback=pullback, retrace_avg=retrace_avg, bb_up=bb_up)
     now_vol = float(df["Volume"].iloc[-1])
-    retrace_avg = float(df["Volume"].iloc[retrace_start:e2].mean()) if (e2 - retrace_start) >= 1 else 0.0
-    cond_vol = (retrace_avg > 0) and (now_vol >= float(retrace_vol_mult) * retrace_avg)
+    conds = {
+        # 저항 돌파(now > 저항 ≥ prev)의 필요조건
+        "rising": lambda: now_price > prev_price,
+        "bbands": lambda: (now_price > v.bb_up.iloc[-1]) and (prev_price <= (v.bb_up.iloc[-2] if not np.isnan(v.bb_up.iloc[-2]) else np.inf)),
+        "breakout": lambda: len(v.cloud[0]) >= 2 and v.cloud[0][-1] == e2,
+        "pullback": lambda: v.pullback is not None,
+        "resistance": lambda: now_price > v.pullback[2] and prev_price <= v.pullback[2],
+        "volume": lambda: (v.retrace_avg > 0) and (now_vol >= float(retrace_vol_mult) * v.retrace_avg),
+    }
+    if not _passes("cloud_pullback_rebreak_full", conds, order):
+        return out
 
-    if cond_res_break and cond_bb and cond_vol:
-        out["trigger"] = True
-        d1 = df.index[idx1].strftime("%Y-%m-%d"); d2 = df.index[e2].strftime("%Y-%m-%d")
-        out["detail"] = (f"{d2} 2차 구름 상향돌파. 저항 {resist:.2f} 돌파 + BB55 상단(시가) 돌파. "
-                         f"당일거래량 {now_vol:,.0f} ≥ {retrace_vol_mult:.1f}× 조정평균 {retrace_avg:,.0f}.")
-        out["extras"] = {"resistance": resist}
+    idx1, _, resist = v.pullback
+    out["trigger"] = True
+    d1 = df.index[idx1].strftime("%Y-%m-%d"); d2 = df.index[e2].strftime("%Y-%m-%d")
+    out["detail"] = (f"{d2} 2차 구름 상향돌파. 저항 {resist:.2f} 돌파 + BB55 상단(시가) 돌파. "
+                     f"당일거래량 {now_vol:,.0f} ≥ {retrace_vol_mult:.1f}× 조정평균 {v.retrace_avg:,.0f}.")
+    out["extras"] = {"resistance": resist}
     return out
 
 # 2) 전화선 골든크로스 콤보
 def signal_ichimoku_tenkan_golden_combo(
     df,
     tenkan=9, kijun=26, senkou_b=52, displacement=26,
-    lookback_cross_bars=1, dx_period=14, ma_fast=5, ma_mid=10
+    lookback_cross_bars=1, dx_period=14, ma_fast=5, ma_mid=10,
+    cache=None, ticker=None, order=None
 ):
     out = {"name": "전화선 골크 콤보", "trigger": False, "detail": ""}
 
-    ich = ichimoku(df, tenkan, kijun, senkou_b, displacement)
-    if ich["tenkan"].isna().iloc[-1] or ich["kijun"].isna().iloc[-1]:
-        return out
-
-    tenkan_above = ich["tenkan"].iloc[-1] > ich["kijun"].iloc[-1]
-    tenkan_xup_now = (ich["tenkan"].iloc[-1] > ich["kijun"].iloc[-1]) and (ich["tenkan"].iloc[-2] <= ich["kijun"].iloc[-2])
-    tenkan_xup_prev = (ich["tenkan"].iloc[-2] > ich["kijun"].iloc[-2]) and (ich["tenkan"].iloc[-3] <= ich["kijun"].iloc[-3]) if len(df) >= 3 else False
-    cond_A = tenkan_above and (tenkan_xup_now or (lookback_cross_bars >= 1 and tenkan_xup_prev))
-
-    i0 = len(df) - int(displacement) - 1
-    cond_B = False
-    if i0 >= 2 and not np.isnan(ich["chikou"].iloc[i0]) and not np.isnan(ich["tenkan"].iloc[i0]):
-        above_now = ich["chikou"].iloc[i0] > ich["tenkan"].iloc[i0]
-        xup_now = (ich["chikou"].iloc[i0] > ich["tenkan"].iloc[i0]) and (ich["chikou"].iloc[i0-1] <= ich["tenkan"].iloc[i0-1])
-        xup_prev = (ich["chikou"].iloc[i0-1] > ich["tenkan"].iloc[i0-1]) and (ich["chikou"].iloc[i0-2] <= ich["tenkan"].iloc[i0-2])
-        cond_B = above_now and (xup_now or (lookback_cross_bars >= 1 and xup_prev))
-
-    _, _, dx = dmi_dx(df, period=int(dx_period))
-    cond_C = (len(dx) >= 2) and (dx.iloc[-1] > dx.iloc[-2])
-
-    ma5 = df["Close"].rolling(int(ma_fast)).mean()
-    ma10 = df["Close"].rolling(int(ma_mid)).mean()
-    cond_D = df["Close"].iloc[-1] > ma5.iloc[-1]
-    cond_E = ma5.iloc[-1] > ma10.iloc[-1]
-
-    cond_F = ich["kijun"].iloc[-1] > ich["kijun"].iloc[-2]
-    cond_G = df["Close"].iloc[-1] > ich["kijun"].iloc[-1]
-
-    if all([cond_A, cond_B, cond_C, cond_D, cond_E, cond_F, cond_G]):
+    def tenkan_cross():
+        tk, kj = v.ich["tenkan"], v.ich["kijun"]
+        if tk.isna().iloc[-1] or kj.isna().iloc[-1]:
+            return False
+        tenkan_above = tk.iloc[-1] > kj.iloc[-1]
+        tenkan_xup_now = (tk.iloc[-1] > kj.iloc[-1]) and (tk.iloc[-2] <= kj.iloc[-2])
+        tenkan_xup_prev = (tk.iloc[-2] > kj.iloc[-2]) and (tk.iloc[-3] <= kj.iloc[-3]) if len(df) >= 3 else False
+        return tenkan_above and (tenkan_xup_now or (lookback_cross_bars >= 1 and tenkan_xup_prev))
+
+    def chikou_cross():
+        ck, tk = v.ich["chikou"], v.ich["tenkan"]
+        i0 = len(df) - int(displacement) - 1
+        if i0 < 2 or np.isnan(ck.iloc[i0]) or np.isnan(tk.iloc[i0]):
+            return False
+        above_now = ck.iloc[i0] > tk.iloc[i0]
+        xup_now = (ck.iloc[i0] > tk.iloc[i0]) and (ck.iloc[i0-1] <= tk.iloc[i0-1])
+        xup_prev = (ck.iloc[i0-1] > tk.iloc[i0-1]) and (ck.iloc[i0-2] <= tk.iloc[i0-2])
+        return above_now and (xup_now or (lookback_cross_bars >= 1 and xup_prev))
+
+    v = _Lazy(
+        ich=lambda: cached(cache, ticker, df, "ichimoku", (tenkan, kijun, senkou_b, displacement),
+                           lambda: ichimoku(df, tenkan, kijun, senkou_b, displacement)),
+        dx=lambda: cached(cache, ticker, df, "dmi_dx", (int(dx_period),), lambda: dmi_dx(df, period=int(dx_period)))[2],
+        ma5=lambda: _sma_close(df, int(ma_fast), cache, ticker).iloc[-1],
+        ma10=lambda: _sma_close(df, int(ma_mid), cache, ticker).iloc[-1],
+    )
+    close = df["Close"].iloc[-1]
+    conds = {
+        "tenkan_cross": tenkan_cross,
+        "chikou_cross": chikou_cross,
+        "dx_rising": lambda: (len(v.dx) >= 2) and (v.dx.iloc[-1] > v.dx.iloc[-2]),
+        "above_ma_fast": lambda: close > v.ma5,
+        "ma_fast_above_mid": lambda: v.ma5 > v.ma10,
+        "kijun_rising": lambda: v.ich["kijun"].iloc[-1] > v.ich["kijun"].iloc[-2],
+        "above_kijun": lambda: close > v.ich["kijun"].iloc[-1],
+    }
+    if _passes("ichimoku_tenkan_golden_combo", conds, order):
         out["trigger"] = True
         out["detail"] = "전환선>기준선 골크(1봉내) 지속, 후행스팬>전환선 골크(1봉내) 지속, DX↑, 종>MA5>MA10, 기준선↑ & 종>기준선"
     return out
@@ -117,35 +161,45 @@ def signal_major_uptrend_pullback_bounce(
     min_close=1000, max_close=99_999_999,
     min_daily_volume=100_000, max_daily_volume=999_999_999,
     weekly_lookback=135, nhigh_weeks=299, week_ending="FRI",
-    market_cap_fetcher=None, ticker=None
+    market_cap_fetcher=None, ticker=None, cache=None, order=None
 ):
     out = {"name": "대세상승 후 하락구간 반등", "trigger": False, "detail": ""}
 
-    mc = market_cap_fetcher(ticker) if market_cap_fetcher and ticker else None
-    if mc is None or mc < float(min_market_cap_krw): return out
-
+    # 주봉 박스 안 위치(0=저점, 1=고점): (금주, 전주)
+    def position():
+        w = v.weekly
+        lo_ll = w["Low"].rolling(int(weekly_lookback)).min()
+        hi_ll = w["High"].rolling(int(weekly_lookback)).max()
+        rng = (hi_ll - lo_ll).replace(0, np.nan)
+        pos0 = (w["Close"].iloc[-1] - lo_ll.iloc[-1]) / rng.iloc[-1]
+        pos1 = (w["Close"].iloc[-2] - lo_ll.iloc[-2]) / rng.iloc[-2]
+        return pos0, pos1
+
+    def new_high():
+        w = v.weekly
+        if len(w) < max(int(weekly_lookback), int(nhigh_weeks)) + 5:
+            return False
+        hi_299 = w["High"].rolling(int(nhigh_weeks), min_periods=int(nhigh_weeks)).max().iloc[-1]
+        return w["High"].iloc[-1] >= hi_299 - 1e-8
+
+    v = _Lazy(
+        mc=lambda: market_cap_fetcher(ticker) if market_cap_fetcher and ticker else None,
+        weekly=lambda: cached(cache, ticker, df, "weekly", (str(week_ending),), lambda: to_weekly(df, week_ending=str(week_ending))),
+        position=position,
+    )
     close = df["Close"].iloc[-1]; vol = df["Volume"].iloc[-1]
-    if not (float(min_close) <= close <= float(max_close)): return out
-    if not (int(min_daily_volume) <= vol <= int(max_daily_volume)): return out
-    if not (df["Close"].iloc[-1] > df["Open"].iloc[-1]): return out
-
-    w = to_weekly(df, week_ending=str(week_ending))
-    if len(w) < max(int(weekly_lookback), int(nhigh_weeks)) + 5: return out
-    hi_299 = w["High"].rolling(int(nhigh_weeks), min_periods=int(nhigh_weeks)).max().iloc[-1]
-    if not (w["High"].iloc[-1] >= hi_299 - 1e-8): return out
-
-    lo_ll = w["Low"].rolling(int(weekly_lookback)).min()
-    hi_ll = w["High"].rolling(int(weekly_lookback)).max()
-    rng = (hi_ll - lo_ll).replace(0, np.nan)
-    pos0 = (w["Close"].iloc[-1] - lo_ll.iloc[-1]) / rng.iloc[-1]
-    pos1 = (w["Close"].iloc[-2] - lo_ll.iloc[-2]) / rng.iloc[-2]
-    cond_F = pos0 <= 0.25
-    cond_I = pos1 <= 0.25
-    cond_J = pos0 >= 0.25
-
-    if (cond_F or cond_I) and cond_J:
+    conds = {
+        "price": lambda: float(min_close) <= close <= float(max_close),
+        "volume": lambda: int(min_daily_volume) <= vol <= int(max_daily_volume),
+        "bullish": lambda: df["Close"].iloc[-1] > df["Open"].iloc[-1],
+        "market_cap": lambda: v.mc is not None and v.mc >= float(min_market_cap_krw),
+        "weekly_high": new_high,
+        # (전주≤25% 또는 금주≤25%) 그리고 금주≥25%
+        "rebound": lambda: (v.position[0] <= 0.25 or v.position[1] <= 0.25) and v.position[0] >= 0.25,
+    }
+    if _passes("major_uptrend_pullback_bounce", conds, order):
         out["trigger"] = True
-        out["detail"] = (f"주봉 299 신고가 + (전주≤25% 또는 금주≤25%) → 금주≥25% 반등, 양봉. 시총 {mc:,.0f} KRW")
+        out["detail"] = (f"주봉 299 신고가 + (전주≤25% 또는 금주≤25%) → 금주≥25% 반등, 양봉. 시총 {v.mc:,.0f} KRW")
     return out
 
 # 4) 폭락후 이평선반등
@@ -155,105 +209,327 @@ def signal_crash_ma_rebound(
     max_open_to_low_drawdown=-0.03,
     min_low_to_close_rebound=0.02,
     near_ma_tolerance=0.005,
-    ma_set=(5,20,60)
+    ma_set=(5,20,60),
+    cache=None, ticker=None, order=None
 ):
     out = {"name": "폭락후 이평선반등", "trigger": False, "detail": ""}
 
     if len(df) < max(ma_set) + 5: return out
 
     close = df["Close"]; open_ = df["Open"]; low = df["Low"]
-    cond_A = (close.iloc[-1] / close.iloc[-2] - 1.0) >= float(min_dod_close_change)
-    cond_B = ((low.iloc[-1] / open_.iloc[-1]) - 1.0) <= float(max_open_to_low_drawdown)
-    cond_C = ((close.iloc[-1] / low.iloc[-1]) - 1.0) >= float(min_low_to_close_rebound)
-
     tol = float(near_ma_tolerance)
-    ma_vals = {p: close.rolling(int(p)).mean().iloc[-1] for p in ma_set}
-    near_any = any(abs(close.iloc[-1] - ma_vals[p]) / ma_vals[p] <= tol for p in ma_set if not np.isnan(ma_vals[p]))
 
-    if cond_A and cond_B and cond_C and near_any:
+    def near_ma():
+        ma_vals = {p: _sma_close(df, int(p), cache, ticker).iloc[-1] for p in ma_set}
+        return any(abs(close.iloc[-1] - ma_vals[p]) / ma_vals[p] <= tol for p in ma_set if not np.isnan(ma_vals[p]))
+
+    conds = {
+        "gain": lambda: (close.iloc[-1] / close.iloc[-2] - 1.0) >= float(min_dod_close_change),
+        "drawdown": lambda: ((low.iloc[-1] / open_.iloc[-1]) - 1.0) <= float(max_open_to_low_drawdown),
+        "rebound": lambda: ((close.iloc[-1] / low.iloc[-1]) - 1.0) >= float(min_low_to_close_rebound),
+        "near_ma": near_ma,
+    }
+    if _passes("crash_ma_rebound", conds, order):
         out["trigger"] = True
         out["detail"] = (f"종가 +{(close.iloc[-1]/close.iloc[-2]-1)*100:.2f}% | 장중 -{(1 - low.iloc[-1]/open_.iloc[-1])*100:.2f}% → "
                          f"+{(close.iloc[-1]/low.iloc[-1]-1)*100:.2f}% | MA 근접±{tol*100:.1f}% ({', '.join(map(str,ma_set))})")
     return out
 
 # 0) 점검용 간단 신호(원하면 켜서 테스트)
-def signal_sanity_ma5_gt_ma10(df):
+def signal_sanity_ma5_gt_ma10(df, cache=None, ticker=None, order=None):
     out = {"name": "SANITY MA5>MA10", "trigger": False, "detail": ""}
     if len(df) < 10: return out
-    ma5 = df["Close"].rolling(5).mean().iloc[-1]
-    ma10 = df["Close"].rolling(10).mean().iloc[-1]
-    if not np.isnan(ma5) and not np.isnan(ma10) and ma5 > ma10:
+    ma5 = _sma_close(df, 5, cache, ticker).iloc[-1]
+    ma10 = _sma_close(df, 10, cache, ticker).iloc[-1]
+    conds = {"ma5_gt_ma10": lambda: not np.isnan(ma5) and not np.isnan(ma10) and ma5 > ma10}
+    if _passes("sanity_ma5_gt_ma10", conds, order):
         out["trigger"] = True
         out["detail"] = "파이프라인 점검용"
     return out
 
-def run_signals(df, cfg, ticker=None, market_cap_fetcher=None):
-    findings = []
-    s_cfg = cfg.get("signals", {})
-
-    if s_cfg.get("cloud_pullback_rebreak_full", {}).get("enabled"):
-        c = s_cfg["cloud_pullback_rebreak_full"]
-        res = signal_cloud_pullback_rebreak_full(
-            df,
-            tenkan=int(c.get("tenkan",9)), kijun=int(c.get("kijun",26)),
-            senkou_b=int(c.get("senkou_b",52)), displacement=int(c.get("displacement",26)),
-            retrace=str(c.get("retrace","into")).lower(),
-            min_gap_bars=int(c.get("min_gap_bars",3)),
-            min_retrace_bars=int(c.get("min_retrace_bars",1)),
-            require_open_cross=bool(c.get("require_open_cross",True)),
-            resistance_mode=str(c.get("resistance_mode","swing_high")).lower(),
-            use_open_for_now=bool(c.get("use_open_for_now",True)),
-            bb_window=int(c.get("bb_window",55)),
-            bb_k=float(c.get("bb_k",2.0)),
-            retrace_vol_mult=float(c.get("retrace_vol_mult",2.0))
-        )
-        if res["trigger"]: findings.append(res)
-
-    if s_cfg.get("ichimoku_tenkan_golden_combo", {}).get("enabled"):
-        c = s_cfg["ichimoku_tenkan_golden_combo"]
-        res = signal_ichimoku_tenkan_golden_combo(
-            df,
-            tenkan=int(c.get("tenkan",9)), kijun=int(c.get("kijun",26)),
-            senkou_b=int(c.get("senkou_b",52)), displacement=int(c.get("displacement",26)),
-            lookback_cross_bars=int(c.get("lookback_cross_bars",1)),
-            dx_period=int(c.get("dx_period",14)),
-            ma_fast=int(c.get("ma_fast",5)),
-            ma_mid=int(c.get("ma_mid",10))
-        )
-        if res["trigger"]: findings.append(res)
+SIGNAL_ORDER = [
+    "cloud_pullback_rebreak_full",
+    "ichimoku_tenkan_golden_combo",
+    "major_uptrend_pullback_bounce",
+    "crash_ma_rebound",
+    "sanity_ma5_gt_ma10",
+]
+
+def _params_cloud_pullback_rebreak_full(c):
+    return dict(
+        tenkan=int(c.get("tenkan",9)), kijun=int(c.get("kijun",26)),
+        senkou_b=int(c.get("senkou_b",52)), displacement=int(c.get("displacement",26)),
+        retrace=str(c.get("retrace","into")).lower(),
+        min_gap_bars=int(c.get("min_gap_bars",3)),
+        min_retrace_bars=int(c.get("min_retrace_bars",1)),
+        require_open_cross=bool(c.get("require_open_cross",True)),
+        resistance_mode=str(c.get("resistance_mode","swing_high")).lower(),
+        use_open_for_now=bool(c.get("use_open_for_now",True)),
+        bb_window=int(c.get("bb_window",55)),
+        bb_k=float(c.get("bb_k",2.0)),
+        retrace_vol_mult=float(c.get("retrace_vol_mult",2.0))
+    )
+
+def _params_ichimoku_tenkan_golden_combo(c):
+    return dict(
+        tenkan=int(c.get("tenkan",9)), kijun=int(c.get("kijun",26)),
+        senkou_b=int(c.get("senkou_b",52)), displacement=int(c.get("displacement",26)),
+        lookback_cross_bars=int(c.get("lookback_cross_bars",1)),
+        dx_period=int(c.get("dx_period",14)),
+        ma_fast=int(c.get("ma_fast",5)),
+        ma_mid=int(c.get("ma_mid",10))
+    )
+
+def _params_major_uptrend_pullback_bounce(c):
+    return dict(
+        min_market_cap_krw=float(c.get("min_market_cap_krw", 100_000_000_000)),
+        min_close=float(c.get("min_close",1000)),
+        max_close=float(c.get("max_close",99_999_999)),
+        min_daily_volume=int(c.get("min_daily_volume",100_000)),
+        max_daily_volume=int(c.get("max_daily_volume",999_999_999)),
+        weekly_lookback=int(c.get("weekly_lookback",135)),
+        nhigh_weeks=int(c.get("nhigh_weeks",299)),
+        week_ending=str(c.get("week_ending","FRI")),
+    )
+
+def _params_crash_ma_rebound(c):
+    return dict(
+        min_dod_close_change=float(c.get("min_dod_close_change",0.01)),
+        max_open_to_low_drawdown=float(c.get("max_open_to_low_drawdown",-0.03)),
+        min_low_to_close_rebound=float(c.get("min_low_to_close_rebound",0.02)),
+        near_ma_tolerance=float(c.get("near_ma_tolerance",0.005)),
+        ma_set=tuple(c.get("ma_set",[5,20,60])),
+    )
+
+def _params_sanity_ma5_gt_ma10(c):
+    return {}
+
+SIGNALS = {
+    "cloud_pullback_rebreak_full": (signal_cloud_pullback_rebreak_full, _params_cloud_pullback_rebreak_full),
+    "ichimoku_tenkan_golden_combo": (signal_ichimoku_tenkan_golden_combo, _params_ichimoku_tenkan_golden_combo),
+    "major_uptrend_pullback_bounce": (signal_major_uptrend_pullback_bounce, _params_major_uptrend_pullback_bounce),
+    "crash_ma_rebound": (signal_crash_ma_rebound, _params_crash_ma_rebound),
+    "sanity_ma5_gt_ma10": (signal_sanity_ma5_gt_ma10, _params_sanity_ma5_gt_ma10),
+}
+
+SIGNAL_NAMES = {
+    "cloud_pullback_rebreak_full": "구름돌파-조정-재돌파(저항+BB55+물량)",
+    "ichimoku_tenkan_golden_combo": "전화선 골크 콤보",
+    "major_uptrend_pullback_bounce": "대세상승 후 하락구간 반등",
+    "crash_ma_rebound": "폭락후 이평선반등",
+    "sanity_ma5_gt_ma10": "SANITY MA5>MA10",
+}
+
+# 신호별 필요 히스토리 선언: 파라미터 → (봉 수, 주기 "1d"|"1wk").
+# 스캐너는 이 값으로 다운로드 기간을 정하고 신호에는 이 구간의 꼬리 view 만 넘긴다.
+# rolling 지표는 창이 찬 뒤 값이 전체 히스토리와 같고, ewm(DX)은 기간×20 봉을 워밍업으로 둔다
+# (×10 이면 초기값의 잔여 영향으로 경계 근처 판정이 드물게 뒤집힌다).
+# signals.<키>.lookback_bars 로 덮어쓸 수 있다.
+LOOKBACK = {
+    # 1차 돌파 이벤트 탐색 구간 약 1년. 그보다 오래된 돌파는 보지 않는다(전체 히스토리 탐색에서 의도적으로 바꾼 동작)
+    "cloud_pullback_rebreak_full": lambda p: (max(260, max(p["senkou_b"], p["kijun"]) + 80, p["bb_window"] + 2), "1d"),
+    "ichimoku_tenkan_golden_combo": lambda p: (max(p["kijun"] + 2, p["displacement"] + p["tenkan"] + 2,
+                                                   p["ma_mid"], 20 * p["dx_period"]) + 1, "1d"),
+    "major_uptrend_pullback_bounce": lambda p: (max(p["weekly_lookback"], p["nhigh_weeks"]) + 5, "1wk"),
+    "crash_ma_rebound": lambda p: (max(p["ma_set"]) + 5, "1d"),
+    "sanity_ma5_gt_ma10": lambda p: (10, "1d"),
+}
+
+# 신호별로 쓰는 지표(IndicatorCache 키와 같은 (이름, 파라미터)). 증분 상태(incremental)가 이 목록을 유지한다
+INDICATORS = {
+    "cloud_pullback_rebreak_full": lambda p: [("ichimoku", (p["tenkan"], p["kijun"], p["senkou_b"], p["displacement"])),
+                                              ("bbands", (int(p["bb_window"]), float(p["bb_k"])))],
+    "ichimoku_tenkan_golden_combo": lambda p: [("ichimoku", (p["tenkan"], p["kijun"], p["senkou_b"], p["displacement"])),
+                                               ("dmi_dx", (int(p["dx_period"]),)),
+                                               ("sma", ("Close", int(p["ma_fast"]))), ("sma", ("Close", int(p["ma_mid"])))],
+    "major_uptrend_pullback_bounce": lambda p: [("weekly", (str(p["week_ending"]),))],
+    "crash_ma_rebound": lambda p: [("sma", ("Close", int(w))) for w in p["ma_set"]],
+    "sanity_ma5_gt_ma10": lambda p: [("sma", ("Close", 5)), ("sma", ("Close", 10))],
+}
+
+# 신호별 조건 선언: 이름 → (예상 통과율, 쓰는 자원, 먼저 통과해야 하는 조건). 신호 함수(종목/패널)가 같은 이름을 쓴다.
+# 조건은 (아직 계산하지 않은 자원 비용 + 1) / (1 - 통과율) 이 작은 것, 즉 싸고 잘 거르는 것부터 평가한다.
+# 통과율은 앞선 조건을 통과한 종목 중의 비율이다. 실제 실행의 값(stats["conditions"])을
+# signals.<키>.pass_rates: {조건: 통과율} 로 넣으면 그 값으로 순서를 다시 정한다.
+CONDITIONS = {
+    "cloud_pullback_rebreak_full": {
+        "rising": (0.45, (), ()),
+        "bbands": (0.08, ("bbands",), ()),
+        "breakout": (0.02, ("ichimoku",), ()),
+        "pullback": (0.5, ("pullback",), ("breakout",)),
+        "resistance": (0.3, (), ("pullback",)),
+        "volume": (0.3, ("retrace_volume",), ("pullback",)),
+    },
+    "ichimoku_tenkan_golden_combo": {
+        "tenkan_cross": (0.08, ("ichimoku",), ()),
+        "chikou_cross": (0.08, ("ichimoku",), ()),
+        "dx_rising": (0.5, ("dmi_dx",), ()),
+        "above_ma_fast": (0.5, ("ma_fast",), ()),
+        "ma_fast_above_mid": (0.5, ("ma_fast", "ma_mid"), ()),
+        "kijun_rising": (0.3, ("ichimoku",), ()),
+        "above_kijun": (0.5, ("ichimoku",), ()),
+    },
+    "major_uptrend_pullback_bounce": {
+        "price": (0.9, (), ()),
+        "volume": (0.5, (), ()),
+        "bullish": (0.45, (), ()),
+        "market_cap": (0.3, ("market_cap",), ()),
+        "weekly_high": (0.02, ("weekly",), ()),
+        "rebound": (0.1, ("weekly",), ("weekly_high",)),
+    },
+    "crash_ma_rebound": {
+        "gain": (0.3, (), ()),
+        "drawdown": (0.1, (), ()),
+        "rebound": (0.3, (), ()),
+        "near_ma": (0.3, ("ma_set",), ()),
+    },
+    "sanity_ma5_gt_ma10": {
+        "ma5_gt_ma10": (0.5, (), ()),
+    },
+}
+
+# 자원의 상대 비용: 마지막 봉 비교 한 번 = 1, 꼬리 구간 rolling 한 번 ≈ 10.
+# market_cap 은 대개 일괄 적재분 조회지만 없으면 야후 호출
+COND_COSTS = {
+    "ichimoku": 60, "bbands": 20, "pullback": 15, "retrace_volume": 2,
+    "dmi_dx": 40, "ma_fast": 10, "ma_mid": 10, "ma_set": 30,
+    "market_cap": 30, "weekly": 50,
+}
+
+def condition_order(key, rates=None):
+    conds = CONDITIONS[key]
+    rates = dict(rates or {})
+    unknown = set(rates) - set(conds)
+    if unknown:
+        raise ValueError(f"signals.{key}.pass_rates: 알 수 없는 조건 {sorted(unknown)} (가능: {list(conds)})")
+    order, have = [], set()
+    while len(order) < len(conds):
+        ready = [n for n in conds if n not in order and all(d in order for d in conds[n][2])]
+        def rank(n):
+            rate = min(max(float(rates.get(n, conds[n][0])), 0.0), 0.999)
+            return (1 + sum(COND_COSTS[r] for r in conds[n][1] if r not in have)) / (1 - rate)
+        name = min(ready, key=rank)
+        order.append(name)
+        have.update(conds[name][1])
+    return tuple(order)
+
+CONDITION_ORDER = {key: condition_order(key) for key in CONDITIONS}
+
+# METRICS 카운터 → {신호: {조건: {evaluated, passed, rate}}} (조건은 평가 순서)
+def condition_stats(counters=None):
+    if counters is None:
+        with METRICS.lock:
+            counters = dict(METRICS.counters)
+    out = {}
+    for key, order in CONDITION_ORDER.items():
+        names = sorted(CONDITIONS[key], key=lambda n: (-counters.get(f"cond.{key}.{n}", 0), order.index(n)))
+        rows = {}
+        for n in names:
+            seen = int(counters.get(f"cond.{key}.{n}", 0))
+            if seen:
+                passed = int(counters.get(f"cond.{key}.{n}.pass", 0))
+                rows[n] = {"evaluated": seen, "passed": passed, "rate": round(passed / seen, 4)}
+        if rows:
+            out[key] = rows
+    return out
 
-    if s_cfg.get("major_uptrend_pullback_bounce", {}).get("enabled"):
-        c = s_cfg["major_uptrend_pullback_bounce"]
-        res = signal_major_uptrend_pullback_bounce(
-            df,
-            min_market_cap_krw=float(c.get("min_market_cap_krw", 100_000_000_000)),
-            min_close=float(c.get("min_close",1000)),
-            max_close=float(c.get("max_close",99_999_999)),
-            min_daily_volume=int(c.get("min_daily_volume",100_000)),
-            max_daily_volume=int(c.get("max_daily_volume",999_999_999)),
-            weekly_lookback=int(c.get("weekly_lookback",135)),
-            nhigh_weeks=int(c.get("nhigh_weeks",299)),
-            week_ending=str(c.get("week_ending","FRI")),
-            market_cap_fetcher=market_cap_fetcher,
-            ticker=ticker
-        )
-        if res["trigger"]: findings.append(res)
+# 일봉 기준 (최소 봉 수, 넘길 꼬리 봉 수). 주봉은 주당 4봉 이상(휴장 감안)을 최소로,
+# 잘린 첫 주를 감안해 한 주 더 넘긴다
+def signal_window(key, kw, override=None):
+    bars, tf = LOOKBACK[key](kw)
+    if override:
+        bars = int(override)
+    if tf == "1wk":
+        return bars * 4, (bars + 1) * 5
+    return bars, bars
+
+def signal_windows(cfg, params=None):
+    s_cfg = cfg.get("signals", {})
+    if params is None:
+        params = enabled_signal_params(cfg)
+    return {key: signal_window(key, kw, (s_cfg.get(key) or {}).get("lookback_bars")) for key, kw in params}
+
+# 신호 하나가 요구하는 히스토리(달력일). 연 ~245 거래일 + 휴장 여유 / 주봉은 잘린 첫 주 포함
+def signal_days(key, kw, override=None):
+    bars, tf = LOOKBACK[key](kw)
+    bars = int(override or bars)
+    return (bars + 2) * 7 if tf == "1wk" else int(bars * 365 / 240) + 14
+
+# 활성 신호가 요구하는 최대 히스토리(달력일). scan.lookback_days 가 숫자면 그 값을 그대로 쓴다.
+# extra_bars: 차트 등 신호 외에 필요한 일봉 수
+def history_days(cfg, extra_bars=0):
+    lb = (cfg.get("scan") or {}).get("lookback_days", "auto")
+    if str(lb).lower() != "auto":
+        return int(lb)
+    s_cfg = cfg.get("signals", {})
+    days = [int(extra_bars * 365 / 240) + 14]
+    for key, kw in enabled_signal_params(cfg):
+        days.append(signal_days(key, kw, (s_cfg.get(key) or {}).get("lookback_bars")))
+    for st in compile_strategies(cfg):
+        days.append(int(st.window * 365 / 240) + 14)
+    return max(days)
+
+# 활성화된 신호와 파라미터를 [(키, kwargs)]로 정리(순서 고정)
+def enabled_signal_params(cfg):
+    s_cfg = cfg.get("signals", {})
+    out = []
+    for key in SIGNAL_ORDER:
+        c = s_cfg.get(key, {})
+        if c.get("enabled"):
+            out.append((key, SIGNALS[key][1](c)))
+    return out
 
-    if s_cfg.get("crash_ma_rebound", {}).get("enabled"):
-        c = s_cfg["crash_ma_rebound"]
-        res = signal_crash_ma_rebound(
-            df,
-            min_dod_close_change=float(c.get("min_dod_close_change",0.01)),
-            max_open_to_low_drawdown=float(c.get("max_open_to_low_drawdown",-0.03)),
-            min_low_to_close_rebound=float(c.get("min_low_to_close_rebound",0.02)),
-            near_ma_tolerance=float(c.get("near_ma_tolerance",0.005)),
-            ma_set=tuple(c.get("ma_set",[5,20,60])),
-        )
+# 설정을 시작 시 한 번 해석한 실행 계획. 종목마다 파라미터 파싱/창 계산을 반복하지 않는다.
+#   steps: [(키, 함수, kwargs, 최소 봉 수, 꼬리 봉 수)]  strategies: 선언형 전략(dsl)
+#   orders: 신호별 조건 평가 순서(condition_order)
+#   nodes: 증분 상태를 넣을 (지표, 파라미터, 최소 봉 수, 꼬리 봉 수) — 신호 간 중복 제거
+class Plan:
+    def __init__(self, cfg, params=None):
+        self.params = enabled_signal_params(cfg) if params is None else params
+        self.windows = signal_windows(cfg, self.params)
+        self.steps = [(key, SIGNALS[key][0], kw) + self.windows[key] for key, kw in self.params]
+        s_cfg = cfg.get("signals", {})
+        self.orders = {key: condition_order(key, (s_cfg.get(key) or {}).get("pass_rates")) for key, _ in self.params}
+        self.strategies = compile_strategies(cfg)
+        self.dsl_window = max([s.window for s in self.strategies] + [0])
+        seen = set()
+        self.nodes = []
+        for key, kw in self.params:
+            for node in INDICATORS[key](kw):
+                if node + self.windows[key] not in seen:
+                    seen.add(node + self.windows[key])
+                    self.nodes.append(node + self.windows[key])
+        self.indicators = list(dict.fromkeys(n[:2] for n in self.nodes))
+
+    # 신호/전략이 보는 최대 꼬리 봉 수
+    @property
+    def max_window(self):
+        return max([w for _, w in self.windows.values()] + [self.dsl_window])
+
+def compile_plan(cfg, params=None):
+    return Plan(cfg, params)
+
+# cache(IndicatorCache)를 넘기면 종목 내 신호 간 지표를 공유(차트에서도 재사용)
+# plan: compile_plan(cfg) 를 미리 넘기면 종목마다 설정을 다시 해석하지 않음(params 는 그 일부만 고정)
+# 각 신호는 LOOKBACK 구간의 꼬리 view 만 받고, 히스토리가 모자라면 그 신호만 건너뛴다(trim=False 면 전체)
+def run_signals(df, cfg, ticker=None, market_cap_fetcher=None, cache=None, params=None, trim=True, plan=None):
+    findings = []
+    if plan is None:
+        plan = compile_plan(cfg, params)
+    for key, fn, kw, need, window in plan.steps:
+        if len(df) < need:
+            METRICS.count(f"skip.{key}")
+            continue
+        view = df.iloc[-window:] if trim and len(df) > window else df
+        t0 = time.monotonic()
+        if key == "major_uptrend_pullback_bounce":
+            res = fn(view, market_cap_fetcher=market_cap_fetcher, ticker=ticker, cache=cache, order=plan.orders[key], **kw)
+        else:
+            res = fn(view, cache=cache, ticker=ticker, order=plan.orders[key], **kw)
+        METRICS.add(f"signal.{key}", time.monotonic() - t0)
         if res["trigger"]: findings.append(res)
-
-    if s_cfg.get("sanity_ma5_gt_ma10", {}).get("enabled"):
-        s = signal_sanity_ma5_gt_ma10(df)
-        if s["trigger"]:
-            findings.append(s)
-
+    if plan.strategies:
+        t0 = time.monotonic()
+        findings += frame_findings(df, plan.strategies, plan.dsl_window, trim=trim)
+        METRICS.add("signal.strategies", time.monotonic() - t0)
     return findings
@@ -0,0 +1,137 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# 종목별 일봉 저장소: <root>/<interval>/<ticker>.npy (구조화 배열, mmap 로드)
+COLS = ["Open","High","Low","Close","Volume"]
+DTYPE = np.dtype([("date", "<i8")] + [(c, "<f8") for c in COLS])
+
+# 증분 수집 시 마지막 저장일 이전 며칠을 다시 받아 수정주가(분할/병합) 여부를 확인
+OVERLAP_DAYS = int(os.getenv("STORE_OVERLAP_DAYS", "7"))
+REVISE_TOL = 1e-6
+
+def naive_index(idx):
+    idx = pd.DatetimeIndex(idx)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    return idx.as_unit("ns")
+
+class BarStore:
+    def __init__(self, root, interval="1d"):
+        self.dir = os.path.join(root, interval)
+        os.makedirs(self.dir, exist_ok=True)
+        # 종목별로 어느 시작일부터 받아둔 데이터인지 기록(신규상장 종목의 전체 재수집 방지)
+        self._meta_path = os.path.join(self.dir, "_meta.json")
+        self.meta = {}
+        if os.path.exists(self._meta_path):
+            try:
+                with open(self._meta_path, "r", encoding="utf-8") as f:
+                    self.meta = json.load(f) or {}
+            except Exception:
+                self.meta = {}
+
+    def covers(self, ticker, start):
+        frm = self.meta.get(ticker)
+        return frm is not None and pd.Timestamp(frm) <= pd.Timestamp(start)
+
+    def flush(self):
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._meta_path)
+
+    def _path(self, ticker):
+        return os.path.join(self.dir, f"{ticker}.npy")
+
+    def load(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        try:
+            arr = np.load(path, mmap_mode="r")
+        except Exception:
+            return pd.DataFrame()
+        if len(arr) == 0:
+            return pd.DataFrame()
+        idx = pd.DatetimeIndex(np.asarray(arr["date"]).astype("datetime64[ns]"))
+        return pd.DataFrame({c: np.asarray(arr[c]) for c in COLS}, index=idx)
+
+    def save(self, ticker, df, fetched_from=None):
+        if df is None or df.empty:
+            return
+        if fetched_from is not None:
+            self.meta[ticker] = pd.Timestamp(fetched_from).isoformat()
+        arr = np.empty(len(df), dtype=DTYPE)
+        arr["date"] = naive_index(df.index).asi8
+        for c in COLS:
+            arr[c] = np.asarray(df[c], dtype="float64")
+        tmp = self._path(ticker) + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, self._path(ticker))
+
+    # new로 old를 갱신. 겹치는 과거 봉의 가격이 달라졌으면 revised=True (전체 재수집 필요)
+    def merge(self, old, new):
+        if new is None or new.empty:
+            return old, False
+        new = new.copy()
+        new.index = naive_index(new.index)
+        if old is None or old.empty:
+            return new, False
+        # 마지막 저장 봉은 장중 값일 수 있으므로 비교에서 제외
+        common = old.index[:-1].intersection(new.index)
+        if len(common):
+            a = old.loc[common, ["Open","High","Low","Close"]].to_numpy()
+            b = new.loc[common, ["Open","High","Low","Close"]].to_numpy()
+            if not np.allclose(a, b, rtol=REVISE_TOL, atol=0.0, equal_nan=True):
+                return new, True
+        merged = pd.concat([old.loc[old.index < new.index[0]], new])
+        merged = merged[~merged.index.duplicated(keep="last")]
+        return merged, False
+
+def since(df, start):
+    if df is None or df.empty:
+        return df
+    return df.loc[df.index >= pd.Timestamp(start)]
+
+# 샤드들이 같은 저장본에서 출발해 각자 갱신한 파일(parts: data/ 와 같은 배치의 디렉터리)을 root 에 합친다.
+# 종목 파일은 그대로 덮어쓰고(종목은 한 샤드에만 배정), 모든 샤드가 쓰는 _meta.json 은 root 의 기존 값과
+# 달라진 항목만 모은다. python -m app.store merge <root> <part>...
+def merge_parts(root, parts):
+    import shutil
+    metas = {}
+    for part in parts:
+        for d, _, files in os.walk(part):
+            rel = os.path.relpath(d, part)
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                if name == "_meta.json":
+                    metas.setdefault(rel, []).append(os.path.join(d, name))
+                    continue
+                os.makedirs(os.path.join(root, rel), exist_ok=True)
+                shutil.copy2(os.path.join(d, name), os.path.join(root, rel, name))
+    for rel, paths in metas.items():
+        path = os.path.join(root, rel, "_meta.json")
+        base = _read_json(path)
+        merged = dict(base)
+        for p in paths:
+            merged.update((k, v) for k, v in _read_json(p).items() if base.get(k) != v)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(merged, f)
+        os.replace(path + ".tmp", path)
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3 or sys.argv[1] != "merge":
+        sys.exit("usage: python -m app.store merge <root> <part>...")
+    merge_parts(sys.argv[2], sys.argv[3:])
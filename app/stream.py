@@ -0,0 +1,301 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+
+from .signals import run_signals, compile_plan, history_days
+from .indicators import CACHE
+from .incremental import state_spec, IndicatorState, seed_cache
+from .metrics import METRICS
+from .store import naive_index
+
+# 상주 스트리밍 스캔: 바 피드에서 마감된 봉이 들어올 때마다 그 종목의 상태만 갱신하고
+# run_signals 를 다시 돌린다. 피드 → (제한 크기 큐, 가득 차면 피드 대기) → 평가 루프.
+#   python -m app.stream                                   # config stream 섹션(야후 폴링)
+#   python -m app.stream --replay bars.csv --start 2025-10-01 --dry-run
+#   python -m app.stream record bars.csv --start 2025-09-01  # 저장소(data/bars)로 재생 파일 생성
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+INTERVALS = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}
+
+# ---- 바 피드: history() 로 시작 히스토리 {ticker: df}, 반복하면 (ticker, ts, o,h,l,c,v) ----
+
+# 재생 파일(CSV: ticker,date,Open,High,Low,Close,Volume). start 이전 봉은 히스토리로, 이후는 이벤트로.
+# speed=0 이면 대기 없이(처리량/지연 측정), >0 이면 봉 시각 간격/speed 만큼 대기
+class ReplayFeed:
+    def __init__(self, path, start=None, speed=0.0):
+        df = pd.read_csv(path, dtype={"ticker": str})
+        df["date"] = naive_index(pd.to_datetime(df["date"]))
+        self.df = df.sort_values(["date", "ticker"], kind="stable").reset_index(drop=True)
+        self.start = pd.Timestamp(start) if start is not None else self.df["date"].iloc[0]
+        self.speed = float(speed)
+
+    def history(self):
+        hist = self.df[self.df["date"] < self.start]
+        return {t: g.set_index("date")[FIELDS].rename_axis(None) for t, g in hist.groupby("ticker", sort=False)}
+
+    def __iter__(self):
+        ev = self.df[self.df["date"] >= self.start]
+        prev = None
+        for t, ts, *row in ev[["ticker", "date"] + FIELDS].itertuples(index=False, name=None):
+            if self.speed > 0 and prev is not None and ts > prev:
+                time.sleep((ts - prev).total_seconds() / self.speed)
+            prev = ts
+            yield (t, ts, *row)
+
+# 재생 파일 쓰기: {ticker: df} → CSV(날짜 순)
+def write_replay(frames, path, start=None):
+    parts = []
+    for t, df in frames.items():
+        if df is None or df.empty:
+            continue
+        if start is not None:
+            df = df.loc[df.index >= pd.Timestamp(start)]
+        part = df[FIELDS].dropna()
+        part.insert(0, "date", naive_index(part.index))
+        part.insert(0, "ticker", t)
+        parts.append(part)
+    out = pd.concat(parts, ignore_index=True).sort_values(["date", "ticker"], kind="stable")
+    out.to_csv(path, index=False)
+    return len(out)
+
+# 야후 폴링 피드: poll_seconds 마다 청크별로 최근 봉을 받아 새로 마감된 봉만 내보낸다
+class PollingFeed:
+    def __init__(self, tickers, cfg, poll_seconds=60):
+        self.tickers = list(tickers)
+        self.cfg = cfg
+        self.interval = str((cfg.get("scan") or {}).get("interval", "1d"))
+        self.poll = float(poll_seconds)
+        self.last = {}
+
+    def _closed(self, ts, now):
+        if self.interval in INTERVALS:
+            return ts + timedelta(minutes=INTERVALS[self.interval]) <= now
+        # 일봉: KRX 정규장 마감(15:30) + 여유 10분 이후 확정
+        return ts.normalize() + timedelta(hours=15, minutes=40) <= now
+
+    def history(self):
+        from .scan import fetch_frames, open_store, CHUNK_SIZE
+        from .bars import as_frame
+        start = datetime.utcnow() - timedelta(days=history_days(self.cfg))
+        store = open_store(self.cfg)
+        out = {}
+        for i in range(0, len(self.tickers), CHUNK_SIZE):
+            batch = self.tickers[i:i+CHUNK_SIZE]
+            out.update({t: as_frame(b) for t, b in fetch_frames(batch, start, interval=self.interval, store=store).items()})
+        now = datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None)
+        for t, df in out.items():
+            if df is not None and not df.empty:
+                df.index = naive_index(df.index)
+                # 아직 마감되지 않은 마지막 봉은 히스토리에서 빼고 피드로 받는다
+                if not self._closed(df.index[-1], now):
+                    out[t] = df = df.iloc[:-1]
+                if len(df):
+                    self.last[t] = df.index[-1]
+        return out
+
+    def __iter__(self):
+        from .scan import fetch_chunk, extract_single_ticker_df, CHUNK_SIZE
+        days = 5 if self.interval in INTERVALS else 14
+        while True:
+            t0 = time.monotonic()
+            start = datetime.utcnow() - timedelta(days=days)
+            for i in range(0, len(self.tickers), CHUNK_SIZE):
+                batch = self.tickers[i:i+CHUNK_SIZE]
+                data = fetch_chunk(batch, start=start, interval=self.interval)
+                now = datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None)
+                for t in batch:
+                    df = extract_single_ticker_df(data, t) if not data.empty else data
+                    if df is None or df.empty:
+                        continue
+                    df.index = naive_index(df.index)
+                    last = self.last.get(t)
+                    for ts, row in zip(df.index, df[FIELDS].to_numpy(dtype=np.float64)):
+                        if (last is None or ts > last) and self._closed(ts, now):
+                            self.last[t] = ts
+                            yield (t, ts, *row)
+            time.sleep(max(0.0, self.poll - (time.monotonic() - t0)))
+
+# ---- 평가 ----
+
+class StreamScanner:
+    def __init__(self, cfg, history, market_cap_fetcher=None, on_match=None, queue_size=1000, coalesce=False):
+        self.cfg = cfg
+        self.plan = compile_plan(cfg)
+        self.spec = state_spec(cfg)
+        # 신호가 보는 최대 구간만 메모리에 유지
+        self.keep = max(self.plan.max_window, 260) + 5
+        self.market_cap_fetcher = market_cap_fetcher
+        self.on_match = on_match
+        self.coalesce = bool(coalesce)
+        self.q = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.frames = {}
+        self.states = {}
+        for t, df in history.items():
+            df = df[FIELDS].dropna() if df is not None else None
+            if df is not None and not df.empty:
+                self.frames[t] = df.iloc[-self.keep:]
+                self.states[t] = IndicatorState.from_frame(df, *self.spec)
+        self.stats = {"bars": 0, "evaluated": 0, "matched": 0, "errors": 0, "per_signal": {}}
+
+    # 피드 스레드: 큐가 가득 차면 평가가 따라올 때까지 대기(backpressure)
+    def put(self, bar):
+        t0 = time.monotonic()
+        self.q.put((bar, t0))
+        waited = time.monotonic() - t0
+        if waited > 0.001:
+            METRICS.add("stream.backpressure", waited)
+
+    def _apply(self, t, ts, row):
+        df = self.frames.get(t)
+        bar = pd.DataFrame([row], columns=FIELDS, index=pd.DatetimeIndex([ts]))
+        if df is None or df.empty:
+            self.frames[t] = bar
+            self.states[t] = IndicatorState.from_frame(None, *self.spec)
+            self.states[t].update(ts, *row)
+            return
+        if ts <= df.index[-1]:
+            # 이미 받은 봉의 수정: 구간을 고치고 상태를 다시 채운다
+            df = pd.concat([df.loc[df.index < ts], bar, df.loc[df.index > ts]])
+            self.frames[t] = df
+            self.states[t] = IndicatorState.from_frame(df, *self.spec)
+            METRICS.count("stream.revised")
+            return
+        self.frames[t] = pd.concat([df.iloc[-(self.keep - 1):], bar])
+        self.states[t].update(ts, *row)
+
+    def _evaluate(self, t, recv):
+        df = self.frames[t]
+        findings = None
+        try:
+            seed_cache(CACHE, t, self.states[t], df, self.cfg, plan=self.plan)
+            findings = run_signals(df, self.cfg, ticker=t, market_cap_fetcher=self.market_cap_fetcher,
+                                   cache=CACHE, plan=self.plan)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[{t}] signal error: {e}")
+        self.stats["evaluated"] += 1
+        METRICS.add("stream.latency", time.monotonic() - recv)
+        if findings:
+            self.stats["matched"] += 1
+            for f in findings:
+                self.stats["per_signal"][f["name"]] = self.stats["per_signal"].get(f["name"], 0) + 1
+            if self.on_match is not None:
+                self.on_match(t, df, findings)
+        CACHE.evict(t)
+
+    def run(self, feed):
+        done = object()
+
+        def producer():
+            try:
+                for bar in feed:
+                    self.put(bar)
+            except Exception as e:
+                print(f"[stream] feed error: {e}")
+            finally:
+                self.q.put((done, time.monotonic()))
+
+        th = threading.Thread(target=producer, name="stream-feed", daemon=True)
+        th.start()
+        finished = False
+        while not finished:
+            items = [self.q.get()]
+            if self.coalesce:
+                # 밀린 봉은 모두 반영하고 종목당 한 번(마지막 봉)만 평가
+                while True:
+                    try:
+                        items.append(self.q.get_nowait())
+                    except queue.Empty:
+                        break
+            touched = {}
+            for bar, recv in items:
+                if bar is done:
+                    finished = True
+                    continue
+                t, ts, *row = bar
+                self._apply(t, pd.Timestamp(ts), [float(x) for x in row])
+                self.stats["bars"] += 1
+                if self.coalesce:
+                    touched.setdefault(t, recv)
+                else:
+                    self._evaluate(t, recv)
+            for t, recv in touched.items():
+                self._evaluate(t, recv)
+        th.join(timeout=1.0)
+        return self.stats
+
+def _print_match(ticker, df, findings):
+    print(f"[match] {df.index[-1]} {ticker}: {', '.join(f['name'] for f in findings)}")
+
+def main(argv=None):
+    from .main import load_config
+    from .scan import open_market_caps, open_store, telegram_credentials, StreamingNotifier
+    from .marketcap import MarketCapProvider
+
+    ap = argparse.ArgumentParser(prog="python -m app.stream")
+    ap.add_argument("cmd", nargs="?", default="run", choices=["run", "record"])
+    ap.add_argument("path", nargs="?", help="record: 출력 CSV")
+    ap.add_argument("--replay", help="재생 파일(CSV). 없으면 config stream.feed")
+    ap.add_argument("--start", help="이 시각 이후 봉을 이벤트로 재생(이전은 히스토리)")
+    ap.add_argument("--speed", type=float, default=None)
+    ap.add_argument("--dry-run", action="store_true", help="텔레그램 대신 표준출력")
+    args = ap.parse_args(argv)
+
+    cfg = load_config(os.environ.get("APP_CONFIG", "config.yaml"))
+    st_cfg = cfg.get("stream") or {}
+
+    if args.cmd == "record":
+        store = open_store(cfg)
+        if store is None or not args.path:
+            sys.exit("record: scan.store_dir 와 출력 경로가 필요합니다")
+        frames = {f[:-4]: store.load(f[:-4]) for f in sorted(os.listdir(store.dir)) if f.endswith(".npy")}
+        print(f"[record] {write_replay(frames, args.path, start=args.start)} bars → {args.path}")
+        return
+
+    replay = args.replay or (st_cfg.get("replay_path") if str(st_cfg.get("feed", "yahoo")) == "replay" else None)
+    speed = float(args.speed if args.speed is not None else st_cfg.get("speed", 0))
+    if replay:
+        feed = ReplayFeed(replay, start=args.start or st_cfg.get("replay_start") or None, speed=speed)
+        # 재생은 네트워크 없이: 당일 캐시에 있는 시가총액만 사용
+        scan_cfg = cfg.get("scan") or {}
+        mcap = MarketCapProvider(cache_dir=scan_cfg.get("cache_dir") or None, loader=lambda: {})
+    else:
+        from .universe import load_universe
+        feed = PollingFeed(load_universe(cfg), cfg, poll_seconds=float(st_cfg.get("poll_seconds", 60)))
+        mcap = open_market_caps(cfg)
+
+    notifier = delivery = None
+    if args.dry_run:
+        on_match = _print_match
+    else:
+        from .telegram_client import TelegramDelivery
+        tele_cfg = cfg["telegram"]
+        token, chat_id = telegram_credentials(cfg)
+        delivery = TelegramDelivery(token, chat_id, min_interval=float(tele_cfg.get("min_interval", 1.0)),
+                                    group_size=int(tele_cfg.get("media_group_size", 10)))
+        notifier = StreamingNotifier(cfg, delivery)
+        notifier.max_alerts = int(st_cfg.get("max_alerts", 10_000))
+        on_match = notifier
+
+    scanner = StreamScanner(cfg, feed.history(), market_cap_fetcher=mcap, on_match=on_match,
+                            queue_size=int(st_cfg.get("queue_size", 1000)), coalesce=bool(st_cfg.get("coalesce", True)))
+    print(f"[stream] {len(scanner.frames)} tickers warm, feed={'replay' if replay else 'yahoo'}")
+    try:
+        stats = scanner.run(feed)
+    except KeyboardInterrupt:
+        stats = scanner.stats
+    if notifier is not None:
+        notifier.finish(stats)
+    lat = METRICS.summary()["timers"].get("stream.latency", {})
+    print(f"[stream] bars {stats['bars']} evaluated {stats['evaluated']} matched {stats['matched']} "
+          f"latency p50 {lat.get('p50_ms')}ms p95 {lat.get('p95_ms')}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import itertools
+import numpy as np
+
+from .indicators import ichimoku_lines, dmi_dx, sma, IndicatorCache
+from .timeframes import cached_many
+from .signals import SIGNALS, SIGNAL_NAMES, SIGNAL_ORDER, signal_window, signal_days
+from .panel import Panel, _last
+from .metrics import METRICS
+
+# 파라미터 그리드 스윕(config.yaml sweep: 섹션, python -m app.sweep [출력.json]).
+#   sweep:
+#     crash_ma_rebound:
+#       min_dod_close_change: [0.01, 0.02, 0.03]
+#       ma_set: [[5, 20, 60], [5, 20]]      # 목록형 파라미터는 목록의 목록
+# 나머지 파라미터는 signals.<키> 설정값. 모든 조합을 유니버스 패널(마지막 봉)에서 한 번에 판정한다.
+# 지표 창을 정하는 파라미터(tenkan, bb_window, ma_set 등)가 같은 조합끼리 묶어 지표를 한 번만 계산하고
+# (같은 지표는 묶음 간에도 공유), 임계값 파라미터(THRESHOLDS)는 (조합 × 종목) 배열의 조합 축으로 브로드캐스트한다.
+# 조합별 결과는 그 파라미터로 run_signals_panel 을 돌린 것과 같다.
+
+THRESHOLDS = {
+    "cloud_pullback_rebreak_full": ("bb_k", "retrace_vol_mult"),
+    "ichimoku_tenkan_golden_combo": ("lookback_cross_bars",),
+    "major_uptrend_pullback_bounce": ("min_market_cap_krw", "min_close", "max_close", "min_daily_volume", "max_daily_volume"),
+    "crash_ma_rebound": ("min_dod_close_change", "max_open_to_low_drawdown", "min_low_to_close_rebound", "near_ma_tolerance"),
+    "sanity_ma5_gt_ma10": (),
+}
+LIST_PARAMS = {"ma_set"}
+
+# 묶음 간 지표 공유: (지표, 파라미터, 꼬리 길이) → 값
+class Memo(dict):
+    def __call__(self, key, compute):
+        if key not in self:
+            self[key] = compute()
+        return self[key]
+
+def _ich(Q, kw, memo):
+    p = (kw["tenkan"], kw["kijun"], kw["senkou_b"], kw["displacement"])
+    return memo(("ichimoku", p, Q.n), lambda: ichimoku_lines(Q["High"], Q["Low"], Q["Close"], *p))
+
+def _sma_last(Q, w, memo):
+    return memo(("sma", int(w), Q.n), lambda: _last(sma(Q["Close"], int(w))))
+
+# 각 커널: (꼬리 패널 Q, 창 파라미터 kw, 임계값 {이름: (조합, 1) 배열}, memo, ...) → (조합 × 종목) bool
+
+def sweep_cloud_pullback_rebreak_full(Q, kw, th, memo, **_):
+    k, mult = th["bb_k"], th["retrace_vol_mult"]
+    out = np.zeros((len(k), len(Q.tickers)), dtype=bool)
+    need = max(kw["senkou_b"], kw["kijun"]) + 80
+    ich = _ich(Q, kw, memo)
+    cloud_top = np.maximum(ich["span_a_now"], ich["span_b_now"])
+    cloud_bot = np.minimum(ich["span_a_now"], ich["span_b_now"])
+    prev_top = cloud_top.shift(1)
+    cross = Q["Open"] if kw["require_open_cross"] else Q["Close"]
+    breakout_up = (cross > cloud_top) & (Q["Close"].shift(1) <= prev_top)
+    retrace_mask = (Q["Close"] < cloud_bot) if kw["retrace"] == "below" else (Q["Close"] <= cloud_top)
+    cand = np.where((Q.lengths >= need) & _last(breakout_up).astype(bool))[0]
+    if len(cand) == 0:
+        return out
+    w = int(kw["bb_window"])
+    mid = memo(("bb_mid", w, Q.n), lambda: Q["Close"].rolling(w, min_periods=w).mean())
+    sd = memo(("bb_std", w, Q.n), lambda: Q["Close"].rolling(w, min_periods=w).std(ddof=0))
+    price = Q["Open"] if kw["use_open_for_now"] else Q["Close"]
+    for j in cand:
+        events = np.where(Q.column(breakout_up, j))[0]
+        if len(events) < 2:
+            continue
+        rm = Q.column(retrace_mask, j)
+        high = Q.column(Q["High"], j)
+        e2 = events[-1]
+        retrace_start = None
+        for e1 in reversed(events[:-1]):
+            if e2 - e1 <= max(1, int(kw["min_gap_bars"])): continue
+            seg = rm[e1+1:e2]
+            if seg.sum() >= int(kw["min_retrace_bars"]):
+                retrace_start = e1 + 1 + np.where(seg)[0][0]
+                resist = float(high[e1]) if kw["resistance_mode"] == "bar_high" else float(np.nanmax(high[e1:retrace_start]))
+                break
+        if retrace_start is None: continue
+        px = Q.column(price, j)
+        now_price, prev_price = float(px[-1]), float(px[-2])
+        if not (now_price > resist and prev_price <= resist):
+            continue
+        up1 = mid.iat[-1, j] + k * sd.iat[-1, j]
+        up2 = mid.iat[-2, j] + k * sd.iat[-2, j]
+        cond_bb = (now_price > up1) & (prev_price <= np.where(np.isnan(up2), np.inf, up2))
+        vol = Q.column(Q["Volume"], j)
+        retrace_avg = float(np.mean(vol[retrace_start:e2])) if (e2 - retrace_start) >= 1 else 0.0
+        cond_vol = (retrace_avg > 0) & (float(vol[-1]) >= mult * retrace_avg)
+        out[:, j] = (cond_bb & cond_vol)[:, 0]
+    return out
+
+def sweep_ichimoku_tenkan_golden_combo(Q, kw, th, memo, **_):
+    lcb = th["lookback_cross_bars"] >= 1
+    ich = _ich(Q, kw, memo)
+    tk, kj, ck = ich["tenkan"], ich["kijun"], ich["chikou"]
+    t1, t2, t3 = _last(tk, 1), _last(tk, 2), _last(tk, 3)
+    k1, k2, k3 = _last(kj, 1), _last(kj, 2), _last(kj, 3)
+    cond_A = (t1 > k1) & ((t1 > k1) & (t2 <= k2) | (lcb & (t2 > k2) & (t3 <= k3)))
+
+    d = int(kw["displacement"])
+    r0 = Q.n - d - 1
+    cond_B = np.zeros((len(lcb), len(Q.tickers)), dtype=bool)
+    if r0 >= 2:
+        c0, c1, c2 = ck.iloc[r0].to_numpy(), ck.iloc[r0-1].to_numpy(), ck.iloc[r0-2].to_numpy()
+        n0, n1, n2 = tk.iloc[r0].to_numpy(), tk.iloc[r0-1].to_numpy(), tk.iloc[r0-2].to_numpy()
+        cond_B = (Q.lengths - d - 1 >= 2) & (c0 > n0) & ((c0 > n0) & (c1 <= n1) | (lcb & (c1 > n1) & (c2 <= n2)))
+
+    p = int(kw["dx_period"])
+    dx = memo(("dmi_dx", p, Q.n), lambda: dmi_dx(Q, period=p)[2])
+    close = _last(Q["Close"])
+    ma5, ma10 = _sma_last(Q, kw["ma_fast"], memo), _sma_last(Q, kw["ma_mid"], memo)
+    rest = ((Q.lengths >= 2) & (_last(dx, 1) > _last(dx, 2)) & (close > ma5) & (ma5 > ma10)
+            & (k1 > k2) & (close > k1))
+    return cond_A & cond_B & rest
+
+def sweep_major_uptrend_pullback_bounce(Q, kw, th, memo, market_cap_fetcher=None, cache=None, **_):
+    close = _last(Q["Close"]); vol = _last(Q["Volume"]); open_ = _last(Q["Open"])
+    cheap = ((th["min_close"] <= close) & (close <= th["max_close"])
+             & (th["min_daily_volume"] <= vol) & (vol <= th["max_daily_volume"]) & (close > open_))
+    # 시가총액은 어느 조합에서든 후보인 종목만 조회(조회 결과는 memo 로 묶음 간 공유)
+    caps = memo.setdefault("caps", {})
+    mc = np.full(len(Q.tickers), np.nan)
+    for j in np.where(cheap.any(axis=0))[0]:
+        t = Q.tickers[j]
+        if t not in caps:
+            caps[t] = market_cap_fetcher(t) if market_cap_fetcher else None
+        if caps[t] is not None:
+            mc[j] = caps[t]
+    hit = cheap & (mc >= th["min_market_cap_krw"])
+    cand = np.where(hit.any(axis=0))[0]
+    L, H = int(kw["weekly_lookback"]), int(kw["nhigh_weeks"])
+    weekly = cached_many(cache, {Q.tickers[j]: Q.frames[Q.tickers[j]] for j in cand}, "weekly", (str(kw["week_ending"]),))
+    ok = np.zeros(len(Q.tickers), dtype=bool)
+    for j in cand:
+        w = weekly[Q.tickers[j]]
+        if len(w) < max(L, H) + 5: continue
+        if not (w["High"].iloc[-1] >= w["High"].rolling(H, min_periods=H).max().iloc[-1] - 1e-8): continue
+        lo_ll = w["Low"].rolling(L).min()
+        hi_ll = w["High"].rolling(L).max()
+        rng = (hi_ll - lo_ll).replace(0, np.nan)
+        pos0 = (w["Close"].iloc[-1] - lo_ll.iloc[-1]) / rng.iloc[-1]
+        pos1 = (w["Close"].iloc[-2] - lo_ll.iloc[-2]) / rng.iloc[-2]
+        ok[j] = (pos0 <= 0.25 or pos1 <= 0.25) and pos0 >= 0.25
+    return hit & ok
+
+def sweep_crash_ma_rebound(Q, kw, th, memo, **_):
+    c1, c2 = _last(Q["Close"], 1), _last(Q["Close"], 2)
+    o1, l1 = _last(Q["Open"]), _last(Q["Low"])
+    # MA 근접: 가장 가까운 MA 까지의 거리(없으면 inf) ≤ tol 이면 어느 MA 든 근접
+    dist = np.full(len(Q.tickers), np.inf)
+    for p in kw["ma_set"]:
+        ma = _sma_last(Q, p, memo)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dist = np.fmin(dist, np.where(np.isnan(ma), np.inf, np.abs(c1 - ma) / ma))
+    return ((Q.lengths >= max(kw["ma_set"]) + 5)
+            & ((c1 / c2 - 1.0) >= th["min_dod_close_change"])
+            & (((l1 / o1) - 1.0) <= th["max_open_to_low_drawdown"])
+            & (((c1 / l1) - 1.0) >= th["min_low_to_close_rebound"])
+            & (dist <= th["near_ma_tolerance"]))
+
+def sweep_sanity_ma5_gt_ma10(Q, kw, th, memo, **_):
+    return ((Q.lengths >= 10) & (_sma_last(Q, 5, memo) > _sma_last(Q, 10, memo)))[None, :]
+
+SWEEPS = {
+    "cloud_pullback_rebreak_full": sweep_cloud_pullback_rebreak_full,
+    "ichimoku_tenkan_golden_combo": sweep_ichimoku_tenkan_golden_combo,
+    "major_uptrend_pullback_bounce": sweep_major_uptrend_pullback_bounce,
+    "crash_ma_rebound": sweep_crash_ma_rebound,
+    "sanity_ma5_gt_ma10": sweep_sanity_ma5_gt_ma10,
+}
+
+# {파라미터: 값 또는 값 목록} → [조합 dict]
+def expand(grid):
+    keys, options = [], []
+    for k, v in (grid or {}).items():
+        if not isinstance(v, (list, tuple)) or (k in LIST_PARAMS and v and not isinstance(v[0], (list, tuple))):
+            v = [v]
+        keys.append(k)
+        options.append(list(v))
+    return [dict(zip(keys, combo)) for combo in itertools.product(*options)]
+
+# 신호 하나의 조합들: 창 파라미터가 같은 것끼리 묶음(같은 꼬리 구간/지표)
+class Job:
+    def __init__(self, key, grid, base):
+        if key not in SWEEPS:
+            raise ValueError(f"sweep.{key}: 알 수 없는 신호")
+        self.key = key
+        self.combos = expand(grid)
+        self.kws = [SIGNALS[key][1]({**base, **c}) for c in self.combos]
+        override = base.get("lookback_bars")
+        self.groups = {}
+        for i, kw in enumerate(self.kws):
+            shape = tuple((k, v) for k, v in kw.items() if k not in THRESHOLDS[key])
+            self.groups.setdefault(shape, []).append(i)
+        self.windows = {shape: signal_window(key, self.kws[idx[0]], override) for shape, idx in self.groups.items()}
+        self.days = max(signal_days(key, kw, override) for kw in self.kws)
+        self.hits = [[] for _ in self.combos]
+
+def compile_sweep(cfg):
+    s_cfg = cfg.get("signals", {})
+    grids = cfg.get("sweep") or {}
+    return [Job(key, grids[key], dict(s_cfg.get(key) or {})) for key in SIGNAL_ORDER if key in grids] + \
+           [Job(key, grids[key], {}) for key in grids if key not in SIGNAL_ORDER]
+
+# frames {ticker: df} 한 묶음을 모든 조합으로 판정해 jobs 의 hits 에 누적
+def evaluate(jobs, frames, market_cap_fetcher=None):
+    P = frames if isinstance(frames, Panel) else Panel(frames)
+    if not P.tickers:
+        return
+    memo, tails, cache = Memo(), {}, IndicatorCache()
+    for job in jobs:
+        with METRICS.timer(f"sweep.{job.key}"):
+            for shape, idx in job.groups.items():
+                need, window = job.windows[shape]
+                if window not in tails:
+                    tails[window] = P.tail(window)
+                th = {name: np.array([job.kws[i][name] for i in idx], dtype=np.float64)[:, None] for name in THRESHOLDS[job.key]}
+                got = SWEEPS[job.key](tails[window], job.kws[idx[0]], th, memo,
+                                      market_cap_fetcher=market_cap_fetcher, cache=cache)
+                got = np.broadcast_to(got, (len(idx), len(P.tickers))) & (P.lengths >= need)
+                for r, i in enumerate(idx):
+                    job.hits[i] += [P.tickers[j] for j in np.flatnonzero(got[r])]
+
+# 조합별 트리거 표 [{signal, name, params(그리드 값), triggers, tickers}]
+def table(jobs):
+    rows = []
+    for job in jobs:
+        for combo, hits in zip(job.combos, job.hits):
+            rows.append({"signal": job.key, "name": SIGNAL_NAMES[job.key], "params": combo,
+                         "triggers": len(hits), "tickers": sorted(hits)})
+    return rows
+
+def format_table(rows, show=5):
+    lines = []
+    for r in rows:
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items()) or "-"
+        more = f" …+{r['triggers'] - show}" if r["triggers"] > show else ""
+        lines.append(f"{r['signal']:<32} {params:<60} {r['triggers']:>5}  {', '.join(r['tickers'][:show])}{more}")
+    return "\n".join(lines)
+
+# python -m app.sweep [출력.json]  — 현재 유니버스로 sweep: 그리드의 모든 조합을 한 번에(SWEEP_LIMIT 로 종목 수 제한)
+def main():
+    from datetime import datetime, timedelta
+    from .main import load_config
+    from .universe import load_universe_and_names
+    from .scan import fetch_frames, open_market_caps, CHUNK_SIZE
+    from .bars import as_frame
+
+    cfg = load_config(os.environ.get("APP_CONFIG", "config.yaml"))
+    jobs = compile_sweep(cfg)
+    if not jobs:
+        sys.exit("[sweep] config.yaml 에 sweep: 그리드가 없습니다")
+    tickers, _ = load_universe_and_names(cfg)
+    limit = int(os.getenv("SWEEP_LIMIT", "0"))
+    if limit > 0:
+        tickers = tickers[:limit]
+    start = datetime.utcnow() - timedelta(days=max(job.days for job in jobs))
+    market_caps = open_market_caps(cfg)
+    interval = str(cfg["scan"].get("interval", "1d"))
+    print(f"[sweep] {len(tickers)}종목 × {sum(len(job.combos) for job in jobs)}조합 "
+          f"({sum(len(job.groups) for job in jobs)}개 지표 묶음)")
+    # 스윕 구간은 스캔보다 짧을 수 있으므로 저장소(BarStore)를 거치지 않는다(잘린 히스토리가 저장되지 않도록)
+    for i in range(0, len(tickers), CHUNK_SIZE):
+        frames = fetch_frames(tickers[i:i+CHUNK_SIZE], start, interval=interval)
+        evaluate(jobs, {t: as_frame(b) for t, b in frames.items()}, market_cap_fetcher=market_caps)
+    rows = table(jobs)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    print(format_table(rows))
+    print(f"[sweep] {METRICS.compact()}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,193 @@
-import requests
+import os
+import json
+import time
+import queue
+import threading
 
+from .metrics import METRICS
+
+# requests 는 실제로 보낼 때 불러온다(스캔/샤드 실행 시작 비용 절감)
 def send_telegram_message(token, chat_id, text, parse_mode="HTML", disable_web_page_preview=True):
+    import requests
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     payload = {"chat_id": chat_id, "text": text, "parse_mode": parse_mode, "disable_web_page_preview": disable_web_page_preview}
-    r = requests.post(url, json=payload, timeout=60)
+    with METRICS.timer("net.telegram.sendMessage"):
+        r = requests.post(url, json=payload, timeout=60)
     r.raise_for_status()
     return r.json()
 
 def send_telegram_photo(token, chat_id, image_bytes, caption=None):
+    import requests
     url = f"https://api.telegram.org/bot{token}/sendPhoto"
-    files = {"photo": ("chart.png", image_bytes)}
+    files = {"photo": (getattr(image_bytes, "name", None) or "chart.png", image_bytes)}
     data = {"chat_id": chat_id}
     if caption:
         data["caption"] = caption
         data["parse_mode"] = "HTML"
-    r = requests.post(url, data=data, files=files, timeout=120)
+    with METRICS.timer("net.telegram.sendPhoto"):
+        r = requests.post(url, data=data, files=files, timeout=120)
     r.raise_for_status()
     return r.json()
+
+# ---- 전송 큐: 커넥션 재사용, sendMediaGroup 묶음, 429 retry_after 준수, 백그라운드 전송 ----
+
+API_BASE = "https://api.telegram.org"
+
+class TelegramDelivery:
+    def __init__(self, token, chat_id, base_url=None, min_interval=1.0, group_size=10, linger=2.0, max_tries=5):
+        # TELEGRAM_API_BASE 는 만들 때 읽는다(로컬 대역 서버로 시험할 때 import 순서와 무관)
+        base = base_url or os.getenv("TELEGRAM_API_BASE") or API_BASE
+        self.url = f"{base.rstrip('/')}/bot{token}"
+        self.chat_id = chat_id
+        self.min_interval = float(min_interval)
+        self.group_size = max(1, min(10, int(group_size)))
+        self.linger = float(linger)
+        self.max_tries = int(max_tries)
+        import requests
+        self.session = requests.Session()
+        self._errors = requests.RequestException
+        self.q = queue.Queue()
+        self.last_sent = 0.0
+        # messages/photos: 전송이 확인된 건수, failed_messages/failed_photos: 끝내 못 보낸 건수, failed: 실패한 요청 수
+        self.stats = {"requests": 0, "messages": 0, "photos": 0, "failed_messages": 0, "failed_photos": 0,
+                      "retries": 0, "failed": 0, "throttled_s": 0.0}
+        self._done = object()
+        self.th = threading.Thread(target=self._run, name="tg-delivery", daemon=True)
+        self.th.start()
+
+    # on_sent(): 전송이 확인된 뒤 전송 스레드에서 호출(예: 알림 원장 기록). 실패한 항목은 부르지 않는다
+    def send_message(self, text, on_sent=None):
+        self.q.put(("msg", text, on_sent))
+
+    def send_photo(self, image_bytes, caption=None, on_sent=None):
+        self.q.put(("photo", image_bytes, caption, on_sent))
+
+    # 남은 전송을 마치고 스레드 종료. 전송 통계 반환
+    def close(self):
+        self.q.put(self._done)
+        self.th.join()
+        self.session.close()
+        if self.stats["failed_messages"] or self.stats["failed_photos"]:
+            print(f"[telegram] 전송 실패: 메시지 {self.stats['failed_messages']}건, 사진 {self.stats['failed_photos']}건")
+        return self.stats
+
+    def _run(self):
+        pending = []
+        while True:
+            try:
+                item = self.q.get(timeout=self.linger if pending else None)
+            except queue.Empty:
+                # 한동안 새 사진이 없으면 모아둔 것부터 전송
+                self._flush(pending); pending = []
+                continue
+            if item is self._done:
+                self._flush(pending)
+                return
+            if item[0] == "photo":
+                pending.append(item)
+                if len(pending) >= self.group_size:
+                    self._flush(pending); pending = []
+            else:
+                # 순서 유지: 메시지 앞의 사진부터 전송
+                self._flush(pending); pending = []
+                self._send_text(item[1], item[2])
+
+    def _send_text(self, text, on_sent=None):
+        self._deliver("messages", [on_sent], lambda: self._post(
+            "sendMessage", data={"chat_id": self.chat_id, "text": text, "parse_mode": "HTML",
+                                 "disable_web_page_preview": "true"}))
+
+    def _flush(self, photos):
+        if photos:
+            self._deliver("photos", [p[3] for p in photos], lambda: self._post_photos(photos))
+
+    def _post_photos(self, photos):
+        if len(photos) == 1:
+            _, img, cap, _ = photos[0]
+            data = {"chat_id": self.chat_id}
+            if cap:
+                data["caption"] = cap; data["parse_mode"] = "HTML"
+            return self._post("sendPhoto", data=data, files={"photo": self._file(img)})
+        media, files = [], {}
+        for i, (_, img, cap, _) in enumerate(photos):
+            m = {"type": "photo", "media": f"attach://p{i}"}
+            if cap:
+                m["caption"] = cap; m["parse_mode"] = "HTML"
+            media.append(m)
+            files[f"p{i}"] = self._file(img)
+        return self._post("sendMediaGroup", data={"chat_id": self.chat_id, "media": json.dumps(media, ensure_ascii=False)}, files=files)
+
+    # 전송 하나(메시지 또는 사진 묶음)를 보내고 결과대로 센 뒤 보낸 항목의 on_sent 를 부른다.
+    # 예외로 끝나도 스레드는 살아서 대기열을 계속 비운다(close 가 멈추지 않도록). 보냈으면 True
+    def _deliver(self, kind, callbacks, post):
+        try:
+            ok = post() is not None
+        except Exception as e:
+            print(f"[telegram] {kind} error: {e}")
+            self.stats["failed"] += 1
+            ok = False
+        self.stats[kind if ok else f"failed_{kind}"] += len(callbacks)
+        if ok:
+            for cb in callbacks:
+                if cb is None:
+                    continue
+                try:
+                    cb()
+                except Exception as e:
+                    print(f"[telegram] on_sent error: {e}")
+        return ok
+
+    @staticmethod
+    def _file(img):
+        if hasattr(img, "seek"):
+            img.seek(0)
+        return (getattr(img, "name", None) or "chart.png", img)
+
+    # 채팅별 최소 간격 + 429(retry_after)/5xx 재시도. 실패해도 실행은 계속
+    def _post(self, method, data=None, files=None):
+        for attempt in range(self.max_tries):
+            gap = self.last_sent + self.min_interval - time.monotonic()
+            if gap > 0:
+                time.sleep(gap)
+            if files:
+                for f in files.values():
+                    if hasattr(f[1], "seek"):
+                        f[1].seek(0)
+            t0 = time.monotonic()
+            try:
+                r = self.session.post(f"{self.url}/{method}", data=data, files=files, timeout=120)
+            except self._errors as e:
+                print(f"[telegram] {method} error: {e}")
+                self.stats["retries"] += 1
+                time.sleep(min(30, 2 ** attempt))
+                continue
+            finally:
+                self.last_sent = time.monotonic()
+                self.stats["requests"] += 1
+                METRICS.add(f"net.telegram.{method}", self.last_sent - t0)
+            if r.status_code == 429:
+                try:
+                    wait = float(r.json().get("parameters", {}).get("retry_after", 1))
+                except (ValueError, AttributeError, TypeError):
+                    wait = 1.0
+                self.stats["retries"] += 1
+                self.stats["throttled_s"] += wait
+                METRICS.count("telegram.429")
+                time.sleep(wait)
+                continue
+            if r.status_code >= 500:
+                self.stats["retries"] += 1
+                time.sleep(min(30, 2 ** attempt))
+                continue
+            if not r.ok:
+                print(f"[telegram] {method} failed {r.status_code}: {r.text[:200]}")
+                self.stats["failed"] += 1
+                return None
+            try:
+                return r.json()
+            except ValueError:
+                print(f"[telegram] {method} bad response: {r.text[:200]}")
+                self.stats["failed"] += 1
+                return None
+        self.stats["failed"] += 1
+        return None
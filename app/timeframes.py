@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from .metrics import METRICS
+
+# 일봉 → 주봉(W-<요일>)/월봉(M) 집계. 봉마다 "주기 마지막 날"(epoch 일)을 계산해
+# 경계에서 reduceat 한 번으로 시/고/저/종/거래량을 만든다(필드별 resample 5회 대신).
+# 여러 종목은 배열을 이어 붙여 (종목, 주기) 경계로 한 번에 집계한다.
+# 결과는 resample(rule).agg(...).dropna() 와 같은 행/라벨(주기 마지막 날 00:00)이다.
+FIELDS = ["Open","High","Low","Close","Volume"]
+DAY = 86_400 * 10**9
+WEEKDAYS = {"MON": 0, "TUE": 1, "WED": 2, "THU": 3, "FRI": 4, "SAT": 5, "SUN": 6}
+
+# 지표 이름 → 파라미터로 규칙 만들기(IndicatorCache 키 ("weekly", ("FRI",)) 등)
+TIMEFRAMES = {
+    "weekly": lambda p: f"W-{str(p[0]).upper()}",
+    "monthly": lambda p: "M",
+}
+
+def _naive(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+def _days(index):
+    return _naive(index).as_unit("ns").asi8 // DAY
+
+# epoch 일 배열 → 그 봉이 속한 주기의 마지막 날(epoch 일). 1970-01-01 은 목요일
+def period_ends(days, rule):
+    days = np.asarray(days, dtype=np.int64)
+    if rule == "M":
+        month = days.astype("datetime64[D]").astype("datetime64[M]")
+        return (month + 1).astype("datetime64[D]").astype(np.int64) - 1
+    anchor = WEEKDAYS[rule.split("-", 1)[1].upper()]
+    return days + (anchor - (days + 3) % 7) % 7
+
+# 비교 기준(pandas). 필드별 첫/끝 유효값, 결측 제외 최대/최소/합 후 결측 행 제거
+def _resample_pandas(df, rule):
+    r = "ME" if rule == "M" else rule
+    w = {
+        "Open": df["Open"].resample(r).first(),
+        "High": df["High"].resample(r).max(),
+        "Low": df["Low"].resample(r).min(),
+        "Close": df["Close"].resample(r).last(),
+        "Volume": df["Volume"].resample(r).sum(),
+    }
+    return pd.DataFrame(w).dropna()
+
+def _arrays(df):
+    return [np.asarray(df[f], dtype=np.float64) for f in FIELDS]
+
+# 구간 [starts[i], stops[i]) 의 첫(끝) 유효값. 없으면 NaN
+def _valid_at(a, starts, stops, last=False):
+    ok = np.flatnonzero(~np.isnan(a))
+    out = np.full(len(starts), np.nan)
+    if not len(ok):
+        return out
+    if last:
+        pos = np.searchsorted(ok, stops) - 1
+        hit = pos >= 0
+        hit[hit] = ok[pos[hit]] >= starts[hit]
+    else:
+        pos = np.searchsorted(ok, starts)
+        hit = pos < len(ok)
+        hit[hit] = ok[pos[hit]] < stops[hit]
+    out[hit] = a[ok[pos[hit]]]
+    return out
+
+def _reduce(arrs, starts, n):
+    o, h, l, c, v = arrs
+    stops = np.r_[starts[1:], n]
+    if not any(np.isnan(a).any() for a in arrs):
+        return np.column_stack([o[starts], np.maximum.reduceat(h, starts), np.minimum.reduceat(l, starts),
+                                c[stops - 1], np.add.reduceat(v, starts)])
+    return np.column_stack([_valid_at(o, starts, stops), np.fmax.reduceat(h, starts), np.fmin.reduceat(l, starts),
+                            _valid_at(c, starts, stops, last=True), np.add.reduceat(np.nan_to_num(v), starts)])
+
+def _frame(rows, ends, like):
+    keep = ~np.isnan(rows).any(axis=1)
+    if not keep.all():
+        rows, ends = rows[keep], np.asarray(ends)[keep]
+    idx = pd.DatetimeIndex((np.asarray(ends, dtype=np.int64) * DAY).astype("datetime64[ns]"))
+    idx = idx.as_unit(like.unit)
+    if like.tz is not None:
+        idx = idx.tz_localize(like.tz)
+    return pd.DataFrame(rows, columns=FIELDS, index=idx)
+
+def resample(df, rule):
+    if df is None or not len(df):
+        return pd.DataFrame(columns=FIELDS, dtype=np.float64)
+    ends = period_ends(_days(df.index), rule)
+    starts = np.flatnonzero(np.r_[True, ends[1:] != ends[:-1]])
+    return _frame(_reduce(_arrays(df), starts, len(ends)), ends[starts], pd.DatetimeIndex(df.index))
+
+# {ticker: df} → {ticker: 집계 df}. 종목들의 배열을 이어 붙여 한 번의 reduceat 으로
+def resample_many(frames, rule):
+    ok = [(t, df) for t, df in frames.items() if df is not None and len(df)]
+    if not ok:
+        return {}
+    lens = np.array([len(df) for _, df in ok], dtype=np.int64)
+    arrs = [np.concatenate(parts) for parts in zip(*(_arrays(df) for _, df in ok))]
+    ends = period_ends(np.concatenate([_days(df.index) for _, df in ok]), rule)
+    tid = np.repeat(np.arange(len(ok)), lens)
+    starts = np.flatnonzero(np.r_[True, (ends[1:] != ends[:-1]) | (tid[1:] != tid[:-1])])
+    rows = _reduce(arrs, starts, len(ends))
+    bounds = np.searchsorted(tid[starts], np.arange(len(ok) + 1))
+    out = {}
+    for j, (t, df) in enumerate(ok):
+        s = slice(bounds[j], bounds[j + 1])
+        out[t] = _frame(rows[s], ends[starts[s]], pd.DatetimeIndex(df.index))
+    return out
+
+# frames 의 종목들에 대해 cache 에 없는 주봉/월봉만 한 번에 집계해 넣고 {ticker: 집계 df} 반환.
+# 증분 상태가 이미 넣은 값은 그대로 쓴다. name/params 는 IndicatorCache 키(("weekly", ("FRI",)) 등)
+def cached_many(cache, frames, name, params):
+    out, miss = {}, {}
+    for t, df in frames.items():
+        if cache is not None and cache.has(t, df, name, params):
+            out[t] = cache.get(t, df, name, params, None)
+        else:
+            miss[t] = df
+    if miss:
+        with METRICS.timer(f"timeframe.{name}"):
+            got = resample_many(miss, TIMEFRAMES[name](params))
+        for t, w in got.items():
+            if cache is not None:
+                cache.put(t, miss[t], name, params, w)
+            out[t] = w
+    return out
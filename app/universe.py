@@ -1,60 +1,145 @@
-import FinanceDataReader as fdr
+import os
+import sys
+import json
+import time
+import shutil
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import numpy as np
 
-def _suffix_for_market(market):
-    m = str(market).upper()
-    if m.startswith("KOSPI"): return ".KS"
-    if m.startswith("KOSDAQ"): return ".KQ"
-    return None
+from .metrics import METRICS
+from . import providers
 
-def load_universe_and_names(cfg):
+# KRX 전체 상장 목록은 유니버스/시가총액에서 함께 쓰므로 프로세스당 1회만 조회
+@lru_cache(maxsize=None)
+def load_krx_listing():
+    with METRICS.timer("net.krx_listing"):
+        return providers.current().listing("KRX")
+
+# 상장 목록 스냅샷: 거래일(KST)마다 한 번 받아 열별 .npy 로 저장하고 모든 샤드가 mmap 으로 읽는다.
+#   <snapshot_dir>/krx/{Code,Name,Market,...}.npy + meta.json {"date", "created", "rows", "columns"}
+# 같은 날짜이고 universe.snapshot_ttl_hours 안이면 다시 받지 않는다. Actions 에서는 universe job 이 한 번 만들어 샤드에 나눠준다.
+SNAPSHOT_COLUMNS = ["Code", "Name", "Market", "Dept", "Marcap", "Stocks", "Close", "Amount"]
+TEXT_COLUMNS = {"Code", "Name", "Market", "Dept"}
+
+def _kst_today():
+    return datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d")
+
+def _uni_cfg(cfg):
     uni = (cfg or {}).get("universe") or {}
     if not isinstance(uni, dict):
         uni = {"source": "krx_all", "include_markets": ["KOSPI","KOSDAQ"], "exclude_markets": ["KONEX"]}
+    return uni
+
+def snapshot_path(cfg):
+    root = _uni_cfg(cfg).get("snapshot_dir")
+    return os.path.join(str(root), "krx") if root else None
+
+def write_snapshot(df, path):
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    cols = [c for c in SNAPSHOT_COLUMNS if c in df.columns]
+    for c in cols:
+        if c in TEXT_COLUMNS:
+            arr = df[c].fillna("").astype(str).to_numpy().astype(str)
+        else:
+            arr = df[c].to_numpy(dtype=np.float64, na_value=np.nan)
+        np.save(os.path.join(tmp, f"{c}.npy"), arr, allow_pickle=False)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"date": _kst_today(), "created": time.time(), "rows": int(len(df)), "columns": cols}, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+# {열: mmap 배열}. 없거나 날짜/TTL 이 지났으면 None
+def read_snapshot(path, ttl_hours=24):
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return None
+    if meta.get("date") != _kst_today() or time.time() - float(meta.get("created", 0)) > float(ttl_hours) * 3600:
+        return None
+    try:
+        return {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r", allow_pickle=False) for c in meta["columns"]}
+    except Exception:
+        return None
+
+# 상장 목록 열 배열(스냅샷 우선). snapshot_dir 가 없으면 프로세스 안에서만 재사용
+def krx_snapshot(cfg=None):
+    path = snapshot_path(cfg)
+    ttl = float(_uni_cfg(cfg).get("snapshot_ttl_hours", 24))
+    if path:
+        snap = read_snapshot(path, ttl)
+        if snap is not None:
+            return snap
+    df = load_krx_listing()
+    if df is None or df.empty:
+        raise RuntimeError("FDR에서 KRX 상장사 목록을 불러오지 못했습니다.")
+    if path:
+        write_snapshot(df, path)
+        snap = read_snapshot(path, ttl)
+        if snap is not None:
+            return snap
+    return {c: (df[c].fillna("").astype(str).to_numpy().astype(str) if c in TEXT_COLUMNS else df[c].to_numpy(dtype=np.float64, na_value=np.nan))
+            for c in SNAPSHOT_COLUMNS if c in df.columns}
+
+# 코드 → 시가총액(스냅샷 Marcap)
+def market_caps_from(snap):
+    if "Marcap" not in snap:
+        return {}
+    caps = np.asarray(snap["Marcap"], dtype=np.float64)
+    ok = ~np.isnan(caps)
+    return dict(zip(np.asarray(snap["Code"])[ok].tolist(), caps[ok].tolist()))
+
+def _suffixes(market):
+    m = np.char.upper(np.asarray(market, dtype=str))
+    return np.where(np.char.startswith(m, "KOSPI"), ".KS", np.where(np.char.startswith(m, "KOSDAQ"), ".KQ", ""))
+
+# 코드/시장/이름 배열 → (티커 목록, {코드/티커: 이름}). 접미사를 정할 수 없는 시장은 제외
+def _tickers_and_names(code, market, name):
+    code, name = np.asarray(code, dtype=str), np.asarray(name, dtype=str)
+    suffix = _suffixes(market)
+    ok = suffix != ""
+    code, name = code[ok], np.where(name[ok] == "", code[ok], name[ok])
+    tick = np.char.add(code, suffix[ok])
+    name_map = dict(zip(code.tolist(), name.tolist()))
+    name_map.update(zip(tick.tolist(), name.tolist()))
+    return tick.tolist(), name_map
+
+def load_universe_and_names(cfg):
+    uni = _uni_cfg(cfg)
     src = str(uni.get("source", "krx_all")).lower()
 
     tickers = []
     name_map = {}
 
-    def _add(code, market, name):
-        suffix = _suffix_for_market(market)
-        if not suffix:
-            return
-        t = f"{code}{suffix}"
-        tickers.append(t)
-        name_map[code] = name
-        name_map[t] = name
-
     if src == "krx_all":
-        include = set([m.upper() for m in uni.get("include_markets", ["KOSPI","KOSDAQ"])])
-        exclude = set([m.upper() for m in uni.get("exclude_markets", [])])
-        df = fdr.StockListing("KRX")
-        if df is None or df.empty:
-            raise RuntimeError("FDR에서 KRX 상장사 목록을 불러오지 못했습니다.")
-        for _, r in df.iterrows():
-            market = str(r.get("Market","")).upper()
-            if market in exclude or market not in include:
-                continue
-            code = str(r["Code"])
-            name = str(r.get("Name", code))
-            _add(code, market, name)
+        include = [m.upper() for m in uni.get("include_markets", ["KOSPI","KOSDAQ"])]
+        exclude = [m.upper() for m in uni.get("exclude_markets", [])]
+        snap = krx_snapshot(cfg)
+        market = np.char.upper(np.asarray(snap["Market"], dtype=str))
+        keep = np.isin(market, include) & ~np.isin(market, exclude)
+        tickers, name_map = _tickers_and_names(np.asarray(snap["Code"])[keep], market[keep], np.asarray(snap["Name"])[keep])
 
     elif src == "krx_index":
         idx = uni.get("krx_index", "KOSPI200")
-        df = fdr.StockListing(idx)
+        df = providers.current().listing(idx)
         if df is None or df.empty:
             raise RuntimeError(f"FDR에서 {idx} 구성 종목을 불러오지 못했습니다.")
-        for _, r in df.iterrows():
-            code = str(r["Code"])
-            market = str(r.get("Market","KOSPI"))
-            name = str(r.get("Name", code))
-            _add(code, market, name)
+        code = df["Code"].astype(str).to_numpy()
+        market = df["Market"].astype(str).to_numpy() if "Market" in df.columns else np.full(len(df), "KOSPI")
+        name = df["Name"].astype(str).to_numpy() if "Name" in df.columns else code
+        tickers, name_map = _tickers_and_names(code, market, name)
 
     elif src == "list":
-        base = fdr.StockListing("KRX")
-        base_map = {}
-        if base is not None and not base.empty:
-            for _, r in base.iterrows():
-                base_map[str(r["Code"])] = str(r.get("Name", r["Code"]))
+        try:
+            snap = krx_snapshot(cfg)
+            base_map = dict(zip(np.asarray(snap["Code"]).tolist(), np.asarray(snap["Name"]).tolist()))
+        except RuntimeError:
+            base_map = {}
         for t in list(uni.get("tickers", [])):
             t = str(t)
             tickers.append(t)
@@ -68,3 +153,50 @@ def load_universe_and_names(cfg):
 
 def load_universe(cfg):
     return load_universe_and_names(cfg)[0]
+
+# 종목명 fallback(야후) 결과를 오래 보관하는 파일 캐시 {ticker: [이름, 저장 시각]}
+class NameCache:
+    def __init__(self, path, ttl_days=30):
+        self.path = path
+        self.ttl = float(ttl_days) * 86400
+        self.names = {}
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                now = time.time()
+                self.names = {t: v for t, v in (json.load(f) or {}).items() if now - float(v[1]) <= self.ttl}
+        except Exception:
+            self.names = {}
+
+    def get(self, ticker):
+        v = self.names.get(ticker)
+        return v[0] if v else None
+
+    def put(self, ticker, name):
+        self.names[ticker] = [str(name), time.time()]
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.names, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+# python -m app.universe  — 오늘 스냅샷이 없으면 만들고 요약 출력(Actions universe job)
+def main():
+    from .main import load_config
+    cfg = load_config(os.environ.get("APP_CONFIG", "config.yaml"))
+    if not snapshot_path(cfg):
+        sys.exit("[universe] universe.snapshot_dir 가 설정되어 있지 않습니다")
+    snap = krx_snapshot(cfg)
+    tickers, _ = load_universe_and_names(cfg)
+    print(f"[universe] {snapshot_path(cfg)} 상장 {len(snap['Code'])}건, 유니버스 {len(tickers)}종목")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from .signals import run_signals, compile_plan
+from .marketcap import MarketCapProvider
+from .store import naive_index
+from .metrics import METRICS
+from . import providers
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+
+# 워커 프로세스 전역: 설정은 워커당 1회만 해석
+_W = {}
+
+# spawn 워커는 부모의 공급자 설정을 물려받지 않으므로 같은 설정(provider:, DATA_PROVIDER)으로 다시 연다
+# (replay/record 에서 시가총액 fallback 이 라이브 야후로 나가지 않도록)
+def _init_worker(cfg, caps):
+    from .scan import market_cap_fetcher_krx
+    providers.use(providers.open_provider(cfg))
+    _W["cfg"] = cfg
+    _W["plan"] = compile_plan(cfg)
+    _W["mcap"] = MarketCapProvider(loader=lambda: dict(caps), fallback=market_cap_fetcher_krx)
+
+# 배치의 모든 종목을 하나의 공유 메모리 블록에 연속 배치: 값 (N,5) float64 + 날짜 (N,) int64
+class SharedBatch:
+    def __init__(self, frames):
+        self.spans = []
+        total = sum(len(df) for df in frames.values())
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, total * 6 * 8))
+        vals = np.ndarray((total, 5), dtype=np.float64, buffer=self.shm.buf)
+        dates = np.ndarray((total,), dtype=np.int64, buffer=self.shm.buf, offset=total * 5 * 8)
+        pos = 0
+        for t, df in frames.items():
+            n = len(df)
+            vals[pos:pos+n] = df[FIELDS].to_numpy(dtype=np.float64)
+            dates[pos:pos+n] = naive_index(df.index).asi8
+            self.spans.append((t, pos, pos + n))
+            pos += n
+        self.total = total
+
+    def tasks(self, chunk):
+        for i in range(0, len(self.spans), chunk):
+            yield (self.shm.name, self.total, self.spans[i:i+chunk])
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+# 워커: 공유 메모리에서 종목 구간을 읽어 run_signals 실행.
+# ([(ticker, findings 또는 None, 오류)], 이 작업의 METRICS 기록) — 부모가 합친다(cond.*/skip.*/signal.*)
+def _eval_task(task):
+    name, total, spans = task
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        vals = np.ndarray((total, 5), dtype=np.float64, buffer=shm.buf)
+        dates = np.ndarray((total,), dtype=np.int64, buffer=shm.buf, offset=total * 5 * 8)
+        out = []
+        for t, a, b in spans:
+            df = pd.DataFrame(vals[a:b].copy(), columns=FIELDS, index=pd.DatetimeIndex(dates[a:b].astype("datetime64[ns]")))
+            try:
+                out.append((t, run_signals(df, _W["cfg"], ticker=t, market_cap_fetcher=_W["mcap"], plan=_W["plan"]), None))
+            except Exception as e:
+                out.append((t, None, str(e)))
+        # 워커 프로세스는 atexit 없이 끝나므로 기록 공급자는 작업마다 쓴다
+        providers.flush()
+        return out, METRICS.drain()
+    finally:
+        shm.close()
+
+class SignalPool:
+    def __init__(self, cfg, workers, chunk=16, market_caps=None):
+        caps = market_caps.load() if market_caps is not None else {}
+        self.chunk = max(1, int(chunk))
+        self.ex = ProcessPoolExecutor(max_workers=int(workers), mp_context=mp.get_context("spawn"),
+                                      initializer=_init_worker, initargs=(cfg, caps))
+
+    # frames 순서대로 (ticker, findings, 오류) 반환(결정적 순서)
+    def evaluate(self, frames):
+        batch = SharedBatch(frames)
+        try:
+            out = []
+            for part, (samples, counters) in self.ex.map(_eval_task, batch.tasks(self.chunk)):
+                out.extend(part)
+                METRICS.merge(samples, counters)
+            return out
+        finally:
+            batch.close()
+
+    def close(self):
+        self.ex.shutdown()
@@ -0,0 +1,44 @@
+import argparse
+import json
+import time
+
+from app.chart import (render_chart_png_bytes, render_chart_png_bytes_with_ichimoku,
+                       chart_job, render_batch)
+from app.indicators import ichimoku
+from bench.synthetic import synth_ohlcv
+
+# 기존 경로(차트마다 스타일/figure 생성) vs 배치 렌더러의 초당 차트 수 비교
+#   python -m bench.chart_bench --charts 40 --workers 4
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--charts", type=int, default=40)
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--dpi", type=int, default=160)
+    ap.add_argument("--format", default="png")
+    args = ap.parse_args()
+
+    frames = [synth_ohlcv(f"{i:06d}.KS", n=600) for i in range(args.charts)]
+    ichs = [ichimoku(df) for df in frames]
+    res = {}
+
+    t0 = time.perf_counter()
+    for i, df in enumerate(frames):
+        if i % 2:
+            render_chart_png_bytes_with_ichimoku(df.tail(260), title=f"T{i}", resistance=float(df["Close"].iloc[-1]))
+        else:
+            render_chart_png_bytes(df.tail(220), title=f"T{i}")
+    res["legacy"] = args.charts / (time.perf_counter() - t0)
+
+    jobs = [chart_job(df, f"T{i}", tail=260, ich=ichs[i], resistance=float(df["Close"].iloc[-1])) if i % 2
+            else chart_job(df, f"T{i}", tail=220) for i, df in enumerate(frames)]
+    t0 = time.perf_counter()
+    imgs = render_batch(jobs, workers=args.workers, dpi=args.dpi, fmt=args.format)
+    res["batch"] = args.charts / (time.perf_counter() - t0)
+    res["batch_avg_bytes"] = sum(len(b.getvalue()) for b in imgs) / max(1, len(imgs))
+
+    print(json.dumps({"charts": args.charts, "workers": args.workers, "dpi": args.dpi, "format": args.format,
+                      "charts_per_sec": {k: round(v, 2) for k, v in res.items() if k != "batch_avg_bytes"},
+                      "batch_avg_bytes": int(res["batch_avg_bytes"])}, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# 콜드 스타트: 새 인터프리터에서 진입 모듈을 import 하는 시간과 함께 올라오는 무거운 모듈
+#   python -m bench.startup_bench [--repeat 5] [--modules app.main app.universe]
+# wall_ms 는 인터프리터 기동 포함(프로세스 시작~종료), import_ms 는 -X importtime 의 해당 모듈 누적 시간
+MODULES = ["app.main", "app.universe", "app.scan", "app.chart", "app.telegram_client", "app.daemon"]
+HEAVY = ["pandas", "matplotlib", "mplfinance", "yfinance", "FinanceDataReader", "requests"]
+
+def _import_us(stderr, module):
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    return None
+
+def measure(module, repeat=5):
+    code = f"import sys, json; import {module}; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    walls, imports, heavy = [], [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+        walls.append(time.perf_counter() - t0)
+        if p.returncode != 0:
+            return {"error": p.stderr.strip().splitlines()[-1] if p.stderr.strip() else p.returncode}
+        us = _import_us(p.stderr, module)
+        if us is not None:
+            imports.append(us / 1e6)
+        heavy = json.loads(p.stdout.strip().splitlines()[-1])
+    return {"wall_ms": round(float(np.median(walls)) * 1000, 1),
+            "import_ms": round(float(np.median(imports)) * 1000, 1) if imports else None,
+            "heavy": heavy}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--modules", nargs="*", default=MODULES)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    bare = (time.perf_counter() - t0) * 1000
+    print(json.dumps({"python": sys.version.split()[0], "repeat": args.repeat, "bare_interpreter_ms": round(bare, 1),
+                      "modules": {m: measure(m, args.repeat) for m in args.modules}}, ensure_ascii=False, indent=1))
+
+if __name__ == "__main__":
+    main()
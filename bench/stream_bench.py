@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.main import load_config
+from app.indicators import CACHE
+from app.marketcap import MarketCapProvider
+from app.metrics import METRICS
+from app.stream import ReplayFeed, StreamScanner, write_replay
+from bench.synthetic import synth_universe
+
+# 스트리밍 모드 오프라인 측정: 합성 유니버스를 재생 파일로 만들고 마지막 --days 일을 봉 이벤트로 재생
+#   python -m bench.stream_bench --tickers 300 --days 5 [--queue 1000 --no-coalesce --out stream.json]
+# 결과: 처리량(bars/s), 봉 수신→평가 완료 지연 p50/p95, backpressure 대기
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", type=int, default=300)
+    ap.add_argument("--bars", type=int, default=2200)
+    ap.add_argument("--days", type=int, default=5, help="재생할 마지막 거래일 수")
+    ap.add_argument("--queue", type=int, default=1000)
+    ap.add_argument("--no-coalesce", action="store_true")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--config", default=os.environ.get("APP_CONFIG", "config.yaml"))
+    ap.add_argument("--replay", default=None, help="재생 파일을 여기에 남김(기본: 임시파일)")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    universe = synth_universe(args.tickers, args.bars, seed=args.seed)
+    dates = next(iter(universe.values())).index
+    start = dates[-args.days]
+    path = args.replay or os.path.join(tempfile.mkdtemp(), "replay.csv")
+    n = write_replay(universe, path)
+    print(f"[bench] replay {n} bars → {path}", file=sys.stderr)
+
+    caps_map = {t.split(".")[0]: 5e12 for t in universe}
+    feed = ReplayFeed(path, start=start)
+    METRICS.reset()
+    t0 = time.perf_counter()
+    scanner = StreamScanner(cfg, feed.history(), market_cap_fetcher=MarketCapProvider(loader=lambda: caps_map),
+                            queue_size=args.queue, coalesce=not args.no_coalesce)
+    warm_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    stats = scanner.run(feed)
+    run_s = time.perf_counter() - t0
+    CACHE.clear()
+
+    timers = METRICS.summary()["timers"]
+    out = {
+        "params": vars(args) | {"start": str(start.date())},
+        "warm_s": round(warm_s, 3),
+        "run_s": round(run_s, 3),
+        "bars_per_s": round(stats["bars"] / max(run_s, 1e-9), 1),
+        "latency": timers.get("stream.latency"),
+        "backpressure": timers.get("stream.backpressure"),
+        "stats": stats,
+    }
+    text = json.dumps(out, ensure_ascii=False, indent=1, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
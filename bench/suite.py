@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app import scan
+from app.main import load_config
+from app.indicators import sma, rma, bbands, ichimoku, dmi_dx, to_weekly, to_monthly, CACHE
+from app.timeframes import resample_many
+from app.signals import SIGNALS, SIGNAL_ORDER, signal_window
+from app.chart import render_chart_png_bytes_with_ichimoku, chart_job, render_batch
+from app.marketcap import MarketCapProvider
+from app.bars import bars_from_download
+from bench.synthetic import synth_universe, as_download
+
+# 오프라인 벤치마크(야후 없이 합성 유니버스로 단계별 시간 측정)
+#   python -m bench.suite --out bench.json [--tickers 2500 --bars 2200 --sample 200]
+# 결과 JSON 의 stages[이름] = {calls, total_s, per_call_ms}
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+class Timer:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, fn, items):
+        t0 = time.perf_counter()
+        n = 0
+        for it in items:
+            fn(it)
+            n += 1
+        self.add(name, time.perf_counter() - t0, n)
+
+    def add(self, name, secs, calls=1):
+        self.stages[name] = {"calls": calls, "total_s": round(secs, 4),
+                             "per_call_ms": round(secs * 1000 / max(1, calls), 3)}
+        print(f"[bench] {name:<45} {calls:>6}회 {secs:8.3f}s", file=sys.stderr)
+
+def _signal_kwargs(cfg, key):
+    return SIGNALS[key][1]((cfg.get("signals") or {}).get(key) or {})
+
+def bench_stages(timer, universe, cfg, caps, sample):
+    tickers = list(universe)[:sample]
+    raw = as_download(universe, tickers)
+    timer.run("extract_single_ticker_df", lambda t: scan.extract_single_ticker_df(raw, t), tickers)
+    t0 = time.perf_counter()
+    bars_from_download(raw, tickers)
+    timer.add("bars_from_download", time.perf_counter() - t0, len(tickers))
+
+    frames = {t: scan.extract_single_ticker_df(raw, t) for t in tickers}
+    dfs = [df for df in frames.values() if len(df) >= 260]
+
+    timer.run("indicators.sma", lambda df: sma(df["Close"], 20), dfs)
+    timer.run("indicators.rma", lambda df: rma(df["Close"], 14), dfs)
+    timer.run("indicators.bbands", lambda df: bbands(df["Close"], 55, 2.0), dfs)
+    timer.run("indicators.ichimoku", ichimoku, dfs)
+    timer.run("indicators.dmi_dx", dmi_dx, dfs)
+    timer.run("indicators.to_weekly", to_weekly, dfs)
+    timer.run("indicators.to_monthly", to_monthly, dfs)
+    t0 = time.perf_counter()
+    resample_many(dict(enumerate(dfs)), "W-FRI")
+    timer.add("timeframes.resample_many", time.perf_counter() - t0, len(dfs))
+
+    # 캐시 없이 신호 단독 비용(활성화 여부와 관계없이 전 신호, 스캔과 같은 LOOKBACK 꼬리 구간)
+    for key in SIGNAL_ORDER:
+        fn, kw = SIGNALS[key][0], _signal_kwargs(cfg, key)
+        views = [df.iloc[-signal_window(key, kw)[1]:] for df in dfs]
+        if key == "major_uptrend_pullback_bounce":
+            timer.run(f"signals.{key}", lambda df: fn(df, market_cap_fetcher=caps, ticker="000000.KS", **kw), views)
+        else:
+            timer.run(f"signals.{key}", lambda df: fn(df, **kw), views)
+    return dfs
+
+def bench_charts(timer, dfs, n):
+    dfs = dfs[:n]
+    ichs = [ichimoku(df) for df in dfs]
+    timer.run("chart.legacy", lambda i: render_chart_png_bytes_with_ichimoku(
+        dfs[i].tail(260), title=f"T{i}", ich=ichs[i], resistance=float(dfs[i]["Close"].iloc[-1])), range(len(dfs)))
+    jobs = [chart_job(df, f"T{i}", tail=260, ich=ichs[i], resistance=float(df["Close"].iloc[-1]))
+            for i, df in enumerate(dfs)]
+    t0 = time.perf_counter()
+    render_batch(jobs)
+    timer.add("chart.batch", time.perf_counter() - t0, len(jobs))
+
+# fetch_chunk 를 합성 데이터로 대체하고 저장소/디스크 캐시 없이 전체 스캔
+def bench_scan(timer, universe, cfg, caps):
+    scan_cfg = dict(cfg.get("scan") or {})
+    scan_cfg.update(store_dir=None, cache_dir=None, workers=0)
+    cfg = dict(cfg, scan=scan_cfg)
+
+    fetch_chunk, open_market_caps = scan.fetch_chunk, scan.open_market_caps
+    scan.fetch_chunk = lambda tickers, start, interval="1d", limiter=None: as_download(universe, tickers)
+    scan.open_market_caps = lambda c: caps
+    try:
+        CACHE.clear()
+        t0 = time.perf_counter()
+        results, stats = scan.scan_and_collect(list(universe), cfg)
+        secs = time.perf_counter() - t0
+    finally:
+        scan.fetch_chunk, scan.open_market_caps = fetch_chunk, open_market_caps
+        CACHE.clear()
+    timer.add("scan_and_collect", secs, len(universe))
+    # 알림 전까지 들고 있는 결과(종목별 차트 꼬리 Bars)의 크기
+    held = sum(df.nbytes for _, df, _ in results)
+    return ({k: stats[k] for k in ("total", "ok", "empty", "matched", "errors")}
+            | {"per_signal": stats["per_signal"], "results_kb": round(held / 1024, 1)})
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", type=int, default=2500)
+    ap.add_argument("--bars", type=int, default=2200)
+    ap.add_argument("--sample", type=int, default=200, help="단계별 측정에 쓸 종목 수")
+    ap.add_argument("--charts", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--config", default=os.environ.get("APP_CONFIG", "config.yaml"))
+    ap.add_argument("--skip-scan", action="store_true")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    t0 = time.perf_counter()
+    universe = synth_universe(args.tickers, args.bars, seed=args.seed)
+    gen_s = time.perf_counter() - t0
+    rng = np.random.default_rng(args.seed)
+    caps_map = {t.split(".")[0]: float(rng.uniform(1e10, 5e13)) for t in universe}
+    caps = MarketCapProvider(loader=lambda: caps_map)
+
+    timer = Timer()
+    dfs = bench_stages(timer, universe, cfg, caps, args.sample)
+    if args.charts > 0:
+        bench_charts(timer, dfs, args.charts)
+    scan_stats = None if args.skip_scan else bench_scan(timer, universe, cfg, caps)
+
+    out = {
+        "version": _git_rev(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "params": {"tickers": args.tickers, "bars": args.bars, "sample": args.sample, "charts": args.charts,
+                   "seed": args.seed, "engine": str((cfg.get("scan") or {}).get("engine", "ticker")),
+                   "generate_s": round(gen_s, 3)},
+        "stages": timer.stages,
+        "scan": scan_stats,
+    }
+    text = json.dumps(out, ensure_ascii=False, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import zlib
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open","High","Low","Close","Volume"]
+
+def _rng(ticker, seed):
+    return np.random.default_rng([int(seed), zlib.crc32(str(ticker).encode())])
+
+# 결정적 합성 일봉(기하 랜덤워크). 같은 seed/ticker 이면 항상 같은 값
+def synth_ohlcv(ticker, n=2200, end="2025-10-31", seed=0):
+    rng = _rng(ticker, seed)
+    idx = pd.bdate_range(end=end, periods=n)
+    close = np.round(rng.uniform(1_000, 200_000) * np.exp(np.cumsum(rng.normal(0.0003, 0.025, n))))
+    open_ = np.round(close * (1 + rng.normal(0, 0.01, n)))
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n))))
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.012, n))))
+    vol = rng.integers(10_000, 3_000_000, n).astype(np.float64)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": vol}, index=idx)
+
+def synth_tickers(n):
+    return [f"{i:06d}{'.KS' if i % 3 else '.KQ'}" for i in range(n)]
+
+# KRX 규모 합성 유니버스: 일부는 상장폐지(중간에 끝남), 일부는 신규상장(짧은 히스토리),
+# 일부는 거래정지 구간(NaN)이 있다. {ticker: df} (NaN 행 포함, yf.download 원본처럼)
+def synth_universe(n_tickers=2500, n_bars=2200, end="2025-10-31", seed=0,
+                   delisted=0.03, short=0.08, gaps=0.05):
+    out = {}
+    for t in synth_tickers(n_tickers):
+        df = synth_ohlcv(t, n=n_bars, end=end, seed=seed)
+        rng = _rng(t + "/shape", seed)
+        u = rng.random()
+        if u < delisted:
+            df.iloc[int(rng.integers(n_bars // 4, n_bars - 5)):] = np.nan
+        elif u < delisted + short:
+            df.iloc[:n_bars - int(rng.integers(20, 400))] = np.nan
+        if rng.random() < gaps:
+            a = int(rng.integers(0, n_bars - 30))
+            df.iloc[a:a + int(rng.integers(1, 30))] = np.nan
+        out[t] = df
+    return out
+
+# yf.download(group_by="ticker") 형태의 MultiIndex 프레임
+def as_download(frames, tickers=None, start=None):
+    tickers = list(frames) if tickers is None else [t for t in tickers if t in frames]
+    if not tickers:
+        return pd.DataFrame()
+    data = pd.concat({t: frames[t] for t in tickers}, axis=1)
+    if start is not None:
+        data = data.loc[data.index >= pd.Timestamp(start)]
+    return data
@@ -0,0 +1,41 @@
+import copy
+import os
+import zlib
+
+import pytest
+import yaml
+
+from bench.synthetic import synth_universe
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# config.yaml 의 신호를 모두 켜고 임계값을 풀어 합성 데이터에서도 신호가 뜨게 한 설정
+def loose_config():
+    with open(os.path.join(ROOT, "config.yaml"), "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    s = cfg["signals"]
+    for key in s:
+        s[key]["enabled"] = True
+    s["cloud_pullback_rebreak_full"].update(bb_k=0.5, retrace_vol_mult=0.5)
+    s["crash_ma_rebound"].update(min_dod_close_change=0.0, max_open_to_low_drawdown=-0.01,
+                                 min_low_to_close_rebound=0.005, near_ma_tolerance=0.05)
+    s["major_uptrend_pullback_bounce"].update(nhigh_weeks=4, weekly_lookback=3, min_market_cap_krw=0)
+    cfg["strategies"] = {}
+    cfg["scan"]["lookback_days"] = "auto"
+    return cfg
+
+# 종목별로 고정된 가짜 시가총액(네트워크 없음)
+def market_cap(ticker):
+    return 5e10 + (zlib.crc32(ticker.encode()) % 10) * 2e10
+
+@pytest.fixture
+def cfg():
+    return copy.deepcopy(_LOOSE)
+
+@pytest.fixture(scope="session")
+def universe():
+    # 수집 경로(bars_from_download)처럼 결측 행을 뺀 프레임
+    frames = {t: df.dropna() for t, df in synth_universe(200, 900, seed=3).items()}
+    return {t: df for t, df in frames.items() if not df.empty}
+
+_LOOSE = loose_config()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from app.backtest import parity_check, signal_masks
+
+from .conftest import market_cap
+
+TICKERS = ["000001.KS", "000007.KS", "000015.KQ", "000026.KS", "000033.KQ"]
+
+# 과거 마스크가 켜진 봉과 그 사이 봉들을 기준일로 잘라, 그날의 run_signals 판정과 마스크 마지막 값이 같은지
+def _endpoints(df, cfg, ticker):
+    masks = signal_masks(df, cfg, ticker=ticker, market_cap_fetcher=market_cap)
+    # 신호마다 처음/마지막 몇 번의 트리거 봉(워밍업 경계 근처 포함)
+    hits = set()
+    for key, m in masks.items():
+        idx = np.flatnonzero(m)
+        hits.update(int(i) for i in np.concatenate([idx[:3], idx[-2:]]))
+    return masks, sorted(hits | set(range(30, len(df), 97)) | {len(df) - 1})
+
+@pytest.mark.parametrize("ticker", TICKERS)
+def test_masks_match_run_signals(cfg, universe, ticker):
+    df = universe[ticker]
+    _, ends = _endpoints(df, cfg, ticker)
+    bad = {e: parity_check(df.iloc[:e + 1], cfg, ticker=ticker, market_cap_fetcher=market_cap) for e in ends}
+    assert {e: keys for e, keys in bad.items() if keys} == {}
+
+def test_endpoints_cover_cloud_and_golden_combo(cfg, universe):
+    fired = set()
+    for t in TICKERS:
+        masks, _ = _endpoints(universe[t], cfg, t)
+        fired |= {key for key, m in masks.items() if m.any()}
+    assert {"cloud_pullback_rebreak_full", "ichimoku_tenkan_golden_combo",
+            "major_uptrend_pullback_bounce", "crash_ma_rebound"} <= fired
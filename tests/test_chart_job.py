@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.backtest import signal_masks
+from app.bars import Bars, as_frame
+from app.indicators import CACHE
+from app.scan import RESULT_BARS, chart_job_for
+from app.signals import SIGNAL_NAMES, compile_plan, run_signals
+
+from .conftest import market_cap
+
+# 알림 차트는 구름돌파 신호가 계산한 일목을 다시 계산하지 않는다(스트리밍: 전체 df, 일괄: 결과 꼬리 Bars)
+def test_chart_reuses_signal_ichimoku(cfg, universe):
+    t = "000007.KS"
+    df = universe[t]
+    plan = compile_plan(cfg)
+    m = signal_masks(df, cfg, ticker=t, market_cap_fetcher=market_cap, plan=plan)["cloud_pullback_rebreak_full"]
+    df = df.iloc[:int(np.flatnonzero(m)[-1]) + 1]
+    CACHE.clear()
+    findings = run_signals(df, cfg, ticker=t, market_cap_fetcher=market_cap, cache=CACHE, plan=plan)
+    assert SIGNAL_NAMES["cloud_pullback_rebreak_full"] in {f["name"] for f in findings}
+    for frame in (df, as_frame(Bars.from_frame(df.iloc[-RESULT_BARS:]))):
+        misses = CACHE.misses
+        job = chart_job_for(t, frame, findings, name="x", plan=plan)
+        assert CACHE.misses == misses
+        assert len(job["dates"]) == 260 and np.isfinite(job["ich"]["tenkan"][-1])
+    CACHE.clear()
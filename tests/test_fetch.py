@@ -0,0 +1,43 @@
+import pandas as pd
+
+from app import providers, scan
+from app.metrics import METRICS
+from app.ratelimit import AdaptiveRateLimiter
+
+from bench.synthetic import synth_ohlcv
+
+class _Provider:
+    offline = False
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def download(self, tickers, start, interval):
+        self.calls += 1
+        r = self.replies.pop(0) if self.replies else pd.DataFrame()
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+def _fetch(monkeypatch, provider):
+    monkeypatch.setattr(providers, "current", lambda: provider)
+    limiter = AdaptiveRateLimiter(rate=1000.0, max_rate=1000.0)
+    METRICS.reset()
+    return scan.fetch_chunk(["005930.KS"], "2024-01-01", limiter=limiter), limiter
+
+def test_empty_download_keeps_rate(monkeypatch):
+    p = _Provider()
+    data, limiter = _fetch(monkeypatch, p)
+    assert data.empty
+    assert p.calls == scan.EMPTY_TRIES
+    assert limiter.rate == 1000.0
+    assert METRICS.counters.get("fetch.retry", 0) == 0
+
+def test_error_backs_off_then_recovers(monkeypatch):
+    df = synth_ohlcv("005930.KS", 50)
+    p = _Provider(RuntimeError("429"), df)
+    data, limiter = _fetch(monkeypatch, p)
+    assert len(data) == 50
+    assert p.calls == 2
+    assert METRICS.counters["fetch.retry"] == 1
@@ -0,0 +1,24 @@
+import pytest
+
+from app.signals import SIGNAL_NAMES, compile_plan, run_signals
+
+from .conftest import market_cap
+
+# 구름돌파는 260봉 안의 돌파만 보도록 의도적으로 바꿨으므로 제외(README 신호 엔진 절)
+CAPPED = {SIGNAL_NAMES["cloud_pullback_rebreak_full"]}
+
+# LOOKBACK 꼬리 view 로 돌린 결과가 전체 히스토리로 돌린 결과와 같은지(워밍업이 충분한지)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_trimmed_view_matches_full_history(cfg, universe, seed):
+    plan = compile_plan(cfg)
+    tickers = sorted(universe)[seed::25]
+    diff = []
+    for t in tickers:
+        df = universe[t]
+        for end in range(300, len(df) + 1, 7):
+            v = df.iloc[:end]
+            kw = dict(ticker=t, market_cap_fetcher=market_cap, plan=plan)
+            a = {f["name"] for f in run_signals(v, cfg, **kw)}
+            b = {f["name"] for f in run_signals(v, cfg, trim=False, **kw)}
+            diff += [(t, end, name) for name in (a ^ b) - CAPPED]
+    assert diff == []
@@ -0,0 +1,16 @@
+import pytest
+
+from app.panel import compare_with_reference, run_signals_panel
+
+from .conftest import market_cap
+
+# 여러 기준일(끝에서 잘라낸 길이)에서 패널 엔진이 종목별 참조 경로와 같은 결과를 내는지
+@pytest.mark.parametrize("cut", [0, 37, 120])
+def test_panel_matches_per_ticker_reference(cfg, universe, cut):
+    frames = {t: df.iloc[:len(df) - cut] for t, df in universe.items()}
+    assert compare_with_reference(frames, cfg, market_cap_fetcher=market_cap) == []
+
+def test_reference_comparison_is_not_vacuous(cfg, universe):
+    found = run_signals_panel(universe, cfg, market_cap_fetcher=market_cap)
+    fired = {f["name"] for fs in found.values() for f in fs}
+    assert len(fired) >= 3
@@ -0,0 +1,31 @@
+from app import providers
+
+class _Inner:
+    def market_cap(self, ticker):
+        return len(ticker) * 1e9
+
+    def name(self, ticker):
+        return f"종목{ticker[:6]}"
+
+def test_recording_writes_maps_once_on_flush(monkeypatch, tmp_path):
+    writes = []
+    put = providers._put_gz_json
+    monkeypatch.setattr(providers, "_put_gz_json", lambda path, data: (writes.append(path), put(path, data)))
+    rec = providers.RecordingProvider(_Inner(), str(tmp_path))
+    tickers = [f"{i:06d}.KS" for i in range(50)]
+    for t in tickers:
+        rec.market_cap(t)
+        rec.name(t)
+    assert writes == []
+    # 그새 다른 프로세스(워커)가 기록한 항목은 flush 후에도 남는다
+    other = providers.RecordingProvider(_Inner(), str(tmp_path))
+    other.market_cap("999999.KQ")
+    other.flush()
+    writes.clear()
+    rec.flush()
+    assert len(writes) == 2
+    rec.flush()
+    assert len(writes) == 2
+    replay = providers.ReplayProvider(str(tmp_path))
+    assert replay.market_cap(tickers[-1]) == 9e9 and replay.name(tickers[0]) == "종목000000"
+    assert replay.market_cap("999999.KQ") == 9e9
@@ -0,0 +1,108 @@
+import os
+
+import pandas as pd
+
+from app import providers, scan
+from app.bars import as_frame
+from app.metrics import METRICS
+from app.store import OVERLAP_DAYS, BarStore
+
+from bench.synthetic import synth_ohlcv
+
+TICKERS = ["000001.KS", "000002.KS", "000003.KQ"]
+
+# 메모리의 합성 일봉을 yf.download(group_by="ticker") 모양으로 돌려주는 공급자. upto 이후 봉은 아직 없는 날
+class _Provider:
+    offline = True
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.upto = None
+        self.calls = []
+
+    def download(self, tickers, start, interval="1d"):
+        self.calls.append((tuple(tickers), pd.Timestamp(start)))
+        parts = {}
+        for t in tickers:
+            df = self.frames[t]
+            df = df.loc[df.index >= pd.Timestamp(start)]
+            if self.upto is not None:
+                df = df.loc[df.index <= self.upto]
+            if len(df):
+                parts[t] = df
+        return pd.concat(parts, axis=1) if parts else pd.DataFrame()
+
+def _ns(df):
+    return df.set_axis(pd.DatetimeIndex(df.index, freq=None).as_unit("ns"))
+
+def _scan_cfg(cfg, tmp_path):
+    for key in cfg["signals"]:
+        cfg["signals"][key]["enabled"] = key in ("crash_ma_rebound", "sanity_ma5_gt_ma10")
+    cfg["scan"].update(store_dir=str(tmp_path / "bars"), state_dir="", engine="ticker", workers=0,
+                       prescreen=False, pipeline=False, send_chart=False)
+    return cfg
+
+def _scan(cfg, monkeypatch):
+    seen = {}
+    evaluate = scan.evaluate_batch
+    def spy(batch, frames, *a, **kw):
+        seen.update((t, as_frame(b)) for t, b in frames.items())
+        return evaluate(batch, frames, *a, **kw)
+    monkeypatch.setattr(scan, "evaluate_batch", spy)
+    scan.scan_and_collect(TICKERS, cfg)
+    return seen
+
+def test_second_scan_fetches_only_the_overlap(cfg, tmp_path, monkeypatch):
+    end = pd.Timestamp.now("UTC").tz_localize(None).normalize()
+    stub = _Provider({t: synth_ohlcv(t, n=700, end=end) for t in TICKERS})
+    monkeypatch.setattr(providers, "current", lambda: stub)
+    cfg = _scan_cfg(cfg, tmp_path)
+
+    # 1일차: 전체 수집 → 종목별 .npy 와 시작일 메타 저장
+    last = stub.upto = stub.frames[TICKERS[0]].index[-2]
+    _scan(cfg, monkeypatch)
+    d = tmp_path / "bars" / "1d"
+    assert {f"{t}.npy" for t in TICKERS} | {"_meta.json"} <= set(os.listdir(d))
+    first_start = stub.calls[-1][1]
+
+    # 2일차: 마지막 저장일 - OVERLAP_DAYS 부터만 요청하고, 병합 결과는 전체 수집과 같다
+    stub.upto = None
+    stub.calls.clear()
+    seen = _scan(cfg, monkeypatch)
+    assert stub.calls == [(tuple(TICKERS), last - pd.Timedelta(days=OVERLAP_DAYS))]
+    store = BarStore(str(tmp_path / "bars"))
+    for t in TICKERS:
+        full = _ns(stub.frames[t].loc[stub.frames[t].index >= first_start])
+        pd.testing.assert_frame_equal(_ns(seen[t].loc[seen[t].index >= first_start]), full)
+        pd.testing.assert_frame_equal(_ns(store.load(t).loc[full.index[0]:]), full)
+
+def test_empty_incremental_fetch_falls_back_to_stored_bars(cfg, tmp_path, monkeypatch):
+    stub = _Provider({t: synth_ohlcv(t, n=700, end=pd.Timestamp.now("UTC").tz_localize(None).normalize()) for t in TICKERS})
+    monkeypatch.setattr(providers, "current", lambda: stub)
+    cfg = _scan_cfg(cfg, tmp_path)
+    _scan(cfg, monkeypatch)
+    stub.frames = {t: df.iloc[:0] for t, df in stub.frames.items()}
+    METRICS.reset()
+    seen = _scan(cfg, monkeypatch)
+    assert METRICS.counters["fetch.stale"] == len(TICKERS)
+    assert all(len(seen[t]) > 0 for t in TICKERS)
+
+def test_merge_parts_combines_shard_updates(tmp_path):
+    import json
+
+    from app.store import merge_parts
+
+    root, a, b = tmp_path / "data", tmp_path / "a", tmp_path / "b"
+    base = {"000001.KS": "2020-01-01T00:00:00", "000002.KS": "2020-01-01T00:00:00"}
+    for d, meta in ((root, base), (a, {**base, "000001.KS": "2021-01-01T00:00:00"}),
+                    (b, {**base, "000003.KQ": "2022-01-01T00:00:00"})):
+        (d / "bars" / "1d").mkdir(parents=True)
+        (d / "bars" / "1d" / "_meta.json").write_text(json.dumps(meta))
+    (a / "bars" / "1d" / "000001.KS.npy").write_bytes(b"a")
+    (b / "bars" / "1d" / "000003.KQ.npy").write_bytes(b"b")
+    merge_parts(str(root), [str(a), str(b)])
+    d = root / "bars" / "1d"
+    assert json.loads((d / "_meta.json").read_text()) == {"000001.KS": "2021-01-01T00:00:00",
+                                                         "000002.KS": "2020-01-01T00:00:00",
+                                                         "000003.KQ": "2022-01-01T00:00:00"}
+    assert (d / "000001.KS.npy").read_bytes() == b"a" and (d / "000003.KQ.npy").read_bytes() == b"b"
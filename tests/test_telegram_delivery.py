@@ -0,0 +1,121 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.telegram_client import TelegramDelivery
+
+# 로컬 대역 서버. replies 에 (status, body) 를 차례로 돌려주고 다 쓰면 200 ok
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        srv = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        method = self.path.rsplit("/", 1)[-1]
+        srv.calls.append((method, body))
+        status, reply = srv.replies.pop(0) if srv.replies else (200, {"ok": True, "result": {}})
+        data = reply if isinstance(reply, bytes) else json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(monkeypatch):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.calls, srv.replies = [], []
+    th = threading.Thread(target=srv.serve_forever, daemon=True)
+    th.start()
+    monkeypatch.setenv("TELEGRAM_API_BASE", f"http://127.0.0.1:{srv.server_address[1]}")
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+def _delivery(**kw):
+    kw = {"min_interval": 0, "linger": 0.05, "max_tries": 3, **kw}
+    return TelegramDelivery("TOKEN", "42", **kw)
+
+def _png(i):
+    b = io.BytesIO(b"\x89PNG" + bytes([i]) * 16)
+    b.name = f"c{i}.png"
+    return b
+
+def test_honours_retry_after(server):
+    server.replies = [(429, {"ok": False, "parameters": {"retry_after": 0.2}})]
+    d = _delivery()
+    d.send_message("hello")
+    stats = d.close()
+    assert [c[0] for c in server.calls] == ["sendMessage", "sendMessage"]
+    assert stats["retries"] == 1 and stats["throttled_s"] == pytest.approx(0.2)
+    assert stats["messages"] == 1 and stats["failed"] == 0
+
+def test_retries_server_errors(server):
+    server.replies = [(502, {"ok": False})]
+    d = _delivery()
+    d.send_message("hello")
+    stats = d.close()
+    assert len(server.calls) == 2
+    assert stats["retries"] == 1 and stats["failed"] == 0
+
+def test_batches_photos_into_media_groups(server):
+    d = _delivery(group_size=3)
+    for i in range(4):
+        d.send_photo(_png(i), caption=f"#{i}")
+    d.send_message("done")
+    stats = d.close()
+    # 3장 묶음 → 남은 1장은 메시지 앞에서 단독 전송 → 메시지(순서 유지)
+    assert [c[0] for c in server.calls] == ["sendMediaGroup", "sendPhoto", "sendMessage"]
+    assert b"attach://p2" in server.calls[0][1]
+    assert stats["photos"] == 4 and stats["requests"] == 3
+
+def test_bad_json_counts_as_failure_and_queue_keeps_draining(server):
+    server.replies = [(200, b"<html>gateway</html>")]
+    d = _delivery()
+    d.send_message("first")
+    d.send_photo(object())  # 파일이 아닌 값: 전송 중 예외가 나도 스레드는 계속 돈다
+    d.send_message("second")
+    stats = d.close()
+    assert stats["failed"] == 2
+    assert (stats["messages"], stats["failed_messages"]) == (1, 1)
+    assert (stats["photos"], stats["failed_photos"]) == (0, 1)
+    assert [c[0] for c in server.calls] == ["sendMessage", "sendMessage"]
+
+def test_on_sent_runs_only_for_delivered_items(server):
+    server.replies = [(400, {"ok": False, "description": "chat not found"})]
+    sent = []
+    d = _delivery()
+    d.send_message("lost", on_sent=lambda: sent.append("lost"))
+    d.send_message("kept", on_sent=lambda: sent.append("kept"))
+    d.send_photo(_png(0), on_sent=lambda: sent.append("photo"))
+    d.close()
+    assert sent == ["kept", "photo"]
+
+# 큐 전송에서 원장은 전송이 확인된 알림만 기록한다(실패한 알림은 다음 실행에서 다시 나감)
+def test_streaming_notifier_records_ledger_after_send(server, cfg, tmp_path):
+    from app.ledger import bar_date
+    from app.scan import StreamingNotifier
+
+    from bench.synthetic import synth_ohlcv
+
+    cfg["scan"].update(ledger_path=str(tmp_path / "ledger.sqlite"), send_chart=False, cache_dir="", name_cache_path="")
+    df = synth_ohlcv("000001.KS", n=40)
+    findings = [{"name": "SANITY MA5>MA10", "trigger": True, "detail": ""}]
+    names = {"000001.KS": "가나다", "000002.KS": "라마바"}
+
+    server.replies = [(400, {"ok": False})]
+    n = StreamingNotifier(cfg, _delivery(), name_map=names)
+    n("000001.KS", df, findings)
+    n("000002.KS", df, findings)
+    n.finish({"matched": 2}, footer="-")
+    assert n.delivery.stats["failed_messages"] == 1
+
+    n = StreamingNotifier(cfg, _delivery(), name_map=names)
+    assert n.ledger.fresh("000001.KS", bar_date(df), findings) == findings
+    assert n.ledger.fresh("000002.KS", bar_date(df), findings) == []
+    n.ledger.close()
+    n.delivery.close()
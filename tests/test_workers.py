@@ -0,0 +1,40 @@
+from app import workers
+from app.metrics import METRICS
+from app.providers import ReplayProvider
+from app.signals import run_signals
+from app.workers import SignalPool
+
+from .conftest import market_cap
+
+class _Caps:
+    def __init__(self, tickers):
+        self.caps = {t: market_cap(t) for t in tickers}
+
+    def load(self):
+        return self.caps
+
+def test_pool_matches_in_process_and_returns_worker_metrics(cfg, universe, tmp_path):
+    # 워커는 기록 재생 공급자(빈 기록)로 열려 네트워크에 나가지 않는다
+    cfg["provider"] = {"mode": "replay", "fixtures_dir": str(tmp_path)}
+    frames = dict(list(universe.items())[:24])
+    METRICS.reset()
+    pool = SignalPool(cfg, 2, chunk=8, market_caps=_Caps(frames))
+    try:
+        got = {t: findings for t, findings, err in pool.evaluate(frames)}
+    finally:
+        pool.close()
+    assert any(k.startswith("cond.") for k in METRICS.counters)
+    assert sum(len(v) for k, v in METRICS.samples.items() if k.startswith("signal.")) > 0
+    for t, df in frames.items():
+        ref = run_signals(df, cfg, ticker=t, market_cap_fetcher=market_cap)
+        assert [f["name"] for f in got[t]] == [f["name"] for f in ref]
+
+def test_worker_installs_configured_provider(cfg, tmp_path):
+    cfg["provider"] = {"mode": "replay", "fixtures_dir": str(tmp_path)}
+    workers._init_worker(cfg, {})
+    try:
+        assert isinstance(workers.providers.current(), ReplayProvider)
+        # 기록이 없으므로 fallback 은 네트워크 없이 None
+        assert workers._W["mcap"]("000001.KS") is None
+    finally:
+        workers.providers.use(workers.providers.LiveProvider())